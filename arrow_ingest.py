@@ -0,0 +1,153 @@
+from pathlib import Path
+
+from report_inputs import open_zip_member
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+# --- Arrow Ingest ---
+#
+# Reads the futures and equity bhavcopies with the pyarrow CSV reader instead of pandas'
+# default parser. Only the columns the report uses are converted, with explicit types:
+#
+#   futures: CONTRACT_D, CLOSE_PRIC, OI_NO_CON and the TRADED_QUA/TRD_NO_CON pair the symbol
+#            master derives lot sizes from. The contracts are split into Instrument, Symbol
+#            (both categorical) and a pre-parsed Contract Date in Arrow, so
+#            calculate_futures_rollover skips its regex and date parsing.
+#   equity:  SYMBOL, SERIES (dictionary-encoded, so the EQ test compares a handful of
+#            distinct values instead of every row) and CLOSE_PRICE. The EQ and F&O symbol
+#            filters run on the Arrow table and only the kept rows are converted to pandas,
+#            with SYMBOL categorical like the futures Symbol.
+#
+# The numeric columns are handed to pandas without a copy (split_blocks). Prices stay float64
+# by default, so the reports are identical to the pandas reader's; float32 prices halve
+# their memory but change the last digits of some report values, so they are opt-in.
+
+INGEST_SETTINGS = {
+    'engine': 'pandas',
+    'float32': False,
+}
+
+CONTRACT_REGEX = r'^(?P<instrument>FUTSTK|FUTIDX)(?P<symbol>[A-Z0-9]+)(?P<expiry>\d{2}-[A-Z]{3}-\d{4})$'
+
+COMPRESSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+
+def arrow_available():
+    return pa is not None
+
+def configure_ingest(engine='pandas', float32=False):
+    """
+    Updates the settings used by load_futures and load_spot (e.g. from the --ingest and
+    --float32-prices command line switches). Without pyarrow the pandas reader is kept.
+    """
+    if engine == 'arrow' and not arrow_available():
+        print("Warning: pyarrow is not installed, using the pandas CSV reader (pip install pyarrow).")
+        engine = 'pandas'
+    INGEST_SETTINGS['engine'] = engine
+    INGEST_SETTINGS['float32'] = float32
+
+def _open_binary(file_path):
+    """
+    Opens an input file (plain or compressed) as a binary stream for the Arrow reader.
+    Arrow decompresses .gz and .zst itself.
+    """
+    path = Path(file_path)
+    if path.suffix == '.zip':
+        return open_zip_member(path)
+    return pa.input_stream(str(path), compression=COMPRESSIONS.get(path.suffix))
+
+def read_header(file_path):
+    """
+    The column names of an input file, stripped (the equity bhavcopy separates them with ', ').
+    """
+    with _open_binary(file_path) as f:
+        first_line = f.read(1 << 16).split(b'\n', 1)[0].decode('utf-8-sig')
+    return [name.strip() for name in first_line.split(',')]
+
+def read_csv_table(file_path, column_types):
+    """
+    Reads only the columns of column_types ({column name: Arrow type}) of an input file.
+    """
+    names = read_header(file_path)
+    with _open_binary(file_path) as f:
+        return pa_csv.read_csv(
+            f,
+            read_options=pa_csv.ReadOptions(column_names=names, skip_rows=1),
+            convert_options=pa_csv.ConvertOptions(include_columns=list(column_types), column_types=column_types),
+        )
+
+def _price_type(float32):
+    return pa.float32() if float32 else pa.float64()
+
+def _sorted_categorical(series):
+    # Categories in string order, so sorting and grouping order rows like plain strings do
+    return series.cat.set_categories(sorted(series.cat.categories))
+
+def read_futures_arrow(file_path, float32=False):
+    """
+    Reads a futures bhavcopy into Instrument, Symbol, Contract Date, CLOSE_PRIC, OI_NO_CON,
+    TRADED_QUA and TRD_NO_CON.
+    Contracts that do not match the FUT<STK|IDX><SYMBOL><DD-MMM-YYYY> format (or whose date
+    is not a real date) keep a missing Symbol and Contract Date, like
+    parse_contract_details_vectorized gives them.
+    """
+    table = read_csv_table(file_path, {
+        'CONTRACT_D': pa.string(),
+        'CLOSE_PRIC': _price_type(float32),
+        'OI_NO_CON': pa.float64(),
+        'TRADED_QUA': pa.float64(),
+        'TRD_NO_CON': pa.float64(),
+    })
+    parts = pc.extract_regex(pc.utf8_trim_whitespace(table['CONTRACT_D']), CONTRACT_REGEX)
+    expiry_text = pc.struct_field(parts, 'expiry')
+    expiry = pc.strptime(expiry_text, format='%d-%b-%Y', unit='us', error_is_null=True)
+    # strptime rolls impossible dates over (31-FEB becomes 03-MAR); pd.to_datetime rejects them
+    round_trip = pc.equal(pc.utf8_upper(pc.strftime(expiry, format='%d-%b-%Y')), expiry_text)
+    expiry = pc.if_else(round_trip, expiry, pa.scalar(None, expiry.type))
+
+    futures_df = pa.table({
+        'Instrument': pc.dictionary_encode(pc.struct_field(parts, 'instrument')),
+        'Symbol': pc.dictionary_encode(pc.struct_field(parts, 'symbol')),
+        'Contract Date': expiry,
+        'CLOSE_PRIC': table['CLOSE_PRIC'],
+        'OI_NO_CON': table['OI_NO_CON'],
+        'TRADED_QUA': table['TRADED_QUA'],
+        'TRD_NO_CON': table['TRD_NO_CON'],
+    }).to_pandas(split_blocks=True, self_destruct=True)
+    futures_df['Instrument'] = _sorted_categorical(futures_df['Instrument'])
+    futures_df['Symbol'] = _sorted_categorical(futures_df['Symbol'])
+    return futures_df
+
+def _eq_mask(series_column):
+    """
+    SERIES == 'EQ' for a dictionary-encoded column, evaluated once per distinct value.
+    """
+    chunks = []
+    for chunk in series_column.chunks:
+        is_eq = pc.equal(pc.utf8_trim_whitespace(chunk.dictionary), 'EQ')
+        chunks.append(pc.fill_null(pc.take(is_eq, chunk.indices), False))
+    return pa.chunked_array(chunks, type=pa.bool_())
+
+def read_spot_arrow(file_path, symbols=None, float32=False):
+    """
+    Arrow equivalent of read_spot_filtered: the SYMBOL and CLOSE_PRICE columns of the EQ
+    series rows of an equity bhavcopy, restricted to `symbols` when given, in file order.
+    """
+    table = read_csv_table(file_path, {
+        'SYMBOL': pa.string(),
+        'SERIES': pa.dictionary(pa.int32(), pa.string()),
+        'CLOSE_PRICE': _price_type(float32),
+    })
+    symbol = pc.utf8_trim_whitespace(table['SYMBOL'])
+    mask = _eq_mask(table['SERIES'])
+    if symbols is not None:
+        mask = pc.and_(mask, pc.is_in(symbol, value_set=pa.array(sorted(symbols), pa.string())))
+    kept = pa.table({'SYMBOL': symbol, 'CLOSE_PRICE': table['CLOSE_PRICE']}).filter(mask)
+    kept = kept.set_column(0, 'SYMBOL', pc.dictionary_encode(kept['SYMBOL']))
+    spot_df = kept.to_pandas(split_blocks=True, self_destruct=True)
+    spot_df['SYMBOL'] = _sorted_categorical(spot_df['SYMBOL'])
+    return spot_df
@@ -0,0 +1,398 @@
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import history_db
+import history_matrix
+from report_inputs import FOLDER2
+from signals import DEFAULT_THRESHOLDS, SIGNAL_LABELS, SIGNAL_SHEETS, classify_signals
+
+# --- Signal Backtest ---
+#
+# Evaluates the four signal buckets over every generated month at once. The signal inputs
+# (M_o_M%, Diff Rollover%, Diff Rollover Cost) and the forward returns of all stored months
+# are loaded as symbols x months arrays, every cell is classified in one classify_signals
+# call, and the statistics are grouped aggregations over the flat list of signalled cells.
+#
+# The forward return of a symbol in month m is the move of its spot from month m's expiry to
+# the next one: the M_o_M% of month m + 1 when that month is stored, else month m's own
+# Next_M_o_M% (0 in the report when the next spot file was missing, so 0 counts as missing).
+# A bucket trades in the direction of its M_o_M% sign: long for Long Rolls and Short
+# Covering, short for Short Rolls and Long Unwind. A signal is a hit when its trade return
+# is positive. The equity curve of a bucket compounds the equal-weighted mean trade return
+# of its signals month by month, starting at 1.
+
+# +1 (long) or -1 (short) per SIGNAL_LABELS position
+SIGNAL_DIRECTIONS = np.array([mom_sign for _, (mom_sign, _, _), _, _ in SIGNAL_SHEETS], dtype=float)
+
+STAT_COLUMNS = [
+    'Signals', 'Hit Rate%', 'Mean Fwd Return%', 'Median Fwd Return%', 'Mean Trade Return%', 'Median Trade Return%',
+]
+
+# Result table -> CSV file written next to the reports
+BACKTEST_FILES = {
+    'signals': 'Backtest_Signals.csv',
+    'sectors': 'Backtest_Sectors.csv',
+    'months': 'Backtest_Months.csv',
+}
+
+def month_name(index):
+    """
+    Converts a rolling_averages.month_index value back into its MmmYYYY name.
+    """
+    return datetime(index // 12, index % 12 + 1, 1).strftime('%b%Y')
+
+def forward_returns(months, mom, next_mom):
+    """
+    The forward return of every symbol and month (see the section comment).
+
+    Args:
+        months: The ascending month indices of the columns.
+        mom, next_mom: symbols x months arrays of M_o_M% and Next_M_o_M%.
+
+    Returns:
+        A symbols x months float array, NaN where the next spot is unknown.
+    """
+    months = np.asarray(months, dtype=np.int64)
+    forward = np.full(mom.shape, np.nan)
+    if not len(months):
+        return forward
+    next_position = np.minimum(np.searchsorted(months, months + 1), len(months) - 1)
+    has_next = months[next_position] == months + 1
+    forward[:, has_next] = mom[:, next_position[has_next]]
+
+    fallback = np.isnan(forward) & (next_mom != 0) & ~np.isnan(next_mom)
+    forward[fallback] = next_mom[fallback]
+    return forward
+
+class SignalPanel:
+    """
+    The signal inputs and forward returns of every stored month as symbols x months float
+    arrays, with the months (rolling_averages.month_index values) in ascending order.
+    A symbol listed twice in a month keeps its first row.
+    """
+
+    def __init__(self, symbols, sectors, months, mom, diff_pct, diff_cost, next_mom):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.sectors = np.asarray(sectors, dtype=object)
+        self.months = np.asarray(months, dtype=np.int64)
+        self.mom = mom
+        self.diff_pct = diff_pct
+        self.diff_cost = diff_cost
+        self.forward = forward_returns(self.months, mom, next_mom)
+
+    @classmethod
+    def from_mapped_history(cls, history):
+        """
+        Reads the panel out of a history_matrix.MappedHistory.
+        """
+        order = np.argsort(np.asarray(history.months, dtype=np.int64), kind='stable')
+
+        def values(metric):
+            # Back to the report's float64 2-decimal values
+            return np.round(history.matrix(metric)[:, order].astype(np.float64), 2)
+
+        sectors = [history.sectors.get(symbol, '0') for symbol in history.symbols]
+        return cls(history.symbols, sectors, np.asarray(history.months, dtype=np.int64)[order],
+                   values('M_o_M%'), values('Diff Rollover%'), values('Diff Rollover Cost'), values('Next_M_o_M%'))
+
+    @classmethod
+    def from_db(cls, connection):
+        """
+        Loads the panel from the rollover history database in one query.
+        """
+        history_df = history_db.query(
+            connection,
+            'SELECT month, symbol, sector, mom, diff_rollover_pct, diff_rollover_cost, next_mom '
+            'FROM rollover ORDER BY month, row',
+        ).drop_duplicates(['month', 'symbol'])
+        symbol_codes, symbols = pd.factorize(history_df['symbol'])
+        month_codes, months = pd.factorize(history_df['month'], sort=True)
+
+        matrices = []
+        for column in ('mom', 'diff_rollover_pct', 'diff_rollover_cost', 'next_mom'):
+            matrix = np.full((len(symbols), len(months)), np.nan)
+            matrix[symbol_codes, month_codes] = history_df[column].to_numpy(dtype=float)
+            matrices.append(matrix)
+
+        # The sector of each symbol's latest month; symbols without a sector are 0 in the report
+        sectors = history_df.groupby('symbol', sort=False)['sector'].last().reindex(symbols)
+        return cls(symbols, sectors.fillna('0').astype(str), months, *matrices)
+
+    def signal_codes(self, thresholds=DEFAULT_THRESHOLDS):
+        """
+        The SIGNAL_LABELS position of every cell's bucket, -1 outside every bucket.
+        """
+        signals = classify_signals(self.mom.ravel(), self.diff_pct.ravel(), self.diff_cost.ravel(), thresholds)
+        return signals.codes.reshape(self.mom.shape)
+
+    def trades(self, codes=None):
+        """
+        One row per signalled symbol and month with a known forward return.
+
+        Returns:
+            A DataFrame with Signal, Sectoral Index, Symbol, Month (month index), Fwd Return%
+            and Trade Return% (the forward return in the bucket's direction).
+        """
+        codes = self.signal_codes() if codes is None else codes
+        rows, columns = np.nonzero((codes >= 0) & ~np.isnan(self.forward))
+        buckets = codes[rows, columns]
+        forward = self.forward[rows, columns]
+        return pd.DataFrame({
+            'Signal': pd.Categorical.from_codes(buckets, categories=SIGNAL_LABELS),
+            'Sectoral Index': self.sectors[rows],
+            'Symbol': self.symbols[rows],
+            'Month': self.months[columns],
+            'Fwd Return%': forward,
+            'Trade Return%': SIGNAL_DIRECTIONS[buckets] * forward,
+        })
+
+# --- Statistics ---
+
+def trade_stats(trades_df, keys):
+    """
+    Signals, hit rate and mean/median forward and trade returns per group of `keys`.
+    """
+    trades_df = trades_df.assign(Hit=(trades_df['Trade Return%'] > 0) * 100.0)
+    stats = trades_df.groupby(keys, observed=True, sort=True).agg(**{
+        'Signals': ('Trade Return%', 'size'),
+        'Hit Rate%': ('Hit', 'mean'),
+        'Mean Fwd Return%': ('Fwd Return%', 'mean'),
+        'Median Fwd Return%': ('Fwd Return%', 'median'),
+        'Mean Trade Return%': ('Trade Return%', 'mean'),
+        'Median Trade Return%': ('Trade Return%', 'median'),
+    })
+    return stats.reset_index()
+
+def equity_curves(month_stats):
+    """
+    Adds the compounded Equity of each bucket to its month rows (ordered by month).
+    """
+    growth = 1 + month_stats['Mean Trade Return%'] / 100
+    month_stats['Equity'] = growth.groupby(month_stats['Signal'], observed=True).cumprod()
+    return month_stats
+
+def run_signal_backtest(panel, codes=None):
+    """
+    Backtests the signal buckets of a SignalPanel.
+
+    Returns:
+        A dict of DataFrames: 'signals' (one row per bucket, with its Months and Final
+        Equity), 'sectors' (per bucket and Sectoral Index) and 'months' (per bucket and month,
+        with the equity curve).
+    """
+    trades_df = panel.trades(codes)
+
+    month_stats = equity_curves(trade_stats(trades_df, ['Signal', 'Month']))
+    curves = month_stats.groupby('Signal', observed=True).agg(**{
+        'Months': ('Equity', 'size'),
+        'Final Equity': ('Equity', 'last'),
+    })
+    signal_stats = trade_stats(trades_df, ['Signal']).merge(curves, on='Signal', how='left')
+
+    sector_stats = trade_stats(trades_df, ['Signal', 'Sectoral Index'])
+    month_stats.insert(1, 'Month', month_stats.pop('Month').map(month_name))
+    return {
+        'signals': signal_stats[['Signal'] + STAT_COLUMNS + ['Months', 'Final Equity']],
+        'sectors': sector_stats[['Signal', 'Sectoral Index'] + STAT_COLUMNS],
+        'months': month_stats[['Signal', 'Month'] + STAT_COLUMNS + ['Equity']],
+    }
+
+# --- Threshold Sweep ---
+#
+# Evaluates a grid of classification thresholds on one SignalPanel. Every grid point
+# classifies the whole panel with its thresholds and reduces the signalled cells with
+# np.bincount, so one point costs a few array passes. The points are split into chunks over
+# a process pool; each worker receives the panel once (initializer), not once per point.
+# Configurations with fewer than `min_signals` signals are listed after the ranked ones.
+
+# --sweep grid key -> position in the thresholds tuple
+SWEEP_KEYS = {'mom': 0, 'pct': 1, 'cost': 2}
+
+THRESHOLD_COLUMNS = ['MoM Threshold', 'Diff Rollover% Threshold', 'Diff Rollover Cost Threshold']
+
+# --sweep-rank choice -> ranked column (higher is better)
+SWEEP_RANKS = {
+    'mean': 'Mean Trade Return%',
+    'median': 'Median Trade Return%',
+    'hit-rate': 'Hit Rate%',
+    'equity': 'Final Equity',
+}
+
+SWEEP_FILE = 'Backtest_Sweep.csv'
+
+_SWEEP_PANEL = None
+
+def parse_threshold_grid(grid_text):
+    """
+    Parses a threshold grid such as 'mom=0,2;pct=0,1,3,5;cost=0,0.05'. Keys left out keep the
+    report's 0 threshold.
+
+    Returns:
+        A list of the threshold values of mom, pct and cost, in that order.
+
+    Raises:
+        ValueError: An unknown key or a value that is not a number.
+    """
+    grid = [[0.0], [0.0], [0.0]]
+    for part in filter(None, (part.strip() for part in grid_text.split(';'))):
+        key, _, values = part.partition('=')
+        key = key.strip().lower()
+        if key not in SWEEP_KEYS:
+            raise ValueError(f"Unknown threshold '{key}' in the sweep grid. Use {', '.join(SWEEP_KEYS)}.")
+        try:
+            grid[SWEEP_KEYS[key]] = sorted({float(value) for value in values.split(',') if value.strip()})
+        except ValueError:
+            raise ValueError(f"The values of '{key}' in the sweep grid must be comma-separated numbers.")
+        if not grid[SWEEP_KEYS[key]]:
+            raise ValueError(f"'{key}' in the sweep grid has no values.")
+    return grid
+
+def evaluate_thresholds(panel, thresholds):
+    """
+    Backtests one threshold configuration: all four buckets together and the signal count and
+    hit rate of each bucket. The equity compounds the mean trade return of every month's
+    signals.
+
+    Returns:
+        A dict with the THRESHOLD_COLUMNS, the overall statistics and the per-bucket columns.
+    """
+    codes = panel.signal_codes(thresholds)
+    rows, columns = np.nonzero((codes >= 0) & ~np.isnan(panel.forward))
+    buckets = codes[rows, columns]
+    trades = SIGNAL_DIRECTIONS[buckets] * panel.forward[rows, columns]
+    hits = trades > 0
+
+    month_counts = np.bincount(columns, minlength=len(panel.months))
+    month_sums = np.bincount(columns, weights=trades, minlength=len(panel.months))
+    traded = month_counts > 0
+    month_means = month_sums[traded] / month_counts[traded]
+
+    result = dict(zip(THRESHOLD_COLUMNS, thresholds))
+    result.update({
+        'Signals': len(trades),
+        'Hit Rate%': hits.mean() * 100 if len(trades) else np.nan,
+        'Mean Trade Return%': trades.mean() if len(trades) else np.nan,
+        'Median Trade Return%': np.median(trades) if len(trades) else np.nan,
+        'Months': int(traded.sum()),
+        'Final Equity': np.prod(1 + month_means / 100),
+    })
+    bucket_counts = np.bincount(buckets, minlength=len(SIGNAL_LABELS))
+    bucket_hits = np.bincount(buckets, weights=hits, minlength=len(SIGNAL_LABELS))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bucket_rates = bucket_hits / bucket_counts * 100
+    for label, count, rate in zip(SIGNAL_LABELS, bucket_counts, bucket_rates):
+        result[f"{label} Signals"] = int(count)
+        result[f"{label} Hit Rate%"] = rate
+    return result
+
+def _init_sweep_worker(panel):
+    global _SWEEP_PANEL
+    _SWEEP_PANEL = panel
+
+def _evaluate_chunk(points):
+    return [evaluate_thresholds(_SWEEP_PANEL, thresholds) for thresholds in points]
+
+def sweep_thresholds(panel, grid, workers=None, min_signals=30, rank_by='mean'):
+    """
+    Evaluates every combination of a threshold grid (see parse_threshold_grid) on a panel.
+
+    Args:
+        workers: Number of worker processes. Defaults to the number of CPUs; 1 runs in this process.
+        min_signals: Configurations with fewer signals are not ranked.
+        rank_by: A SWEEP_RANKS key.
+
+    Returns:
+        A DataFrame with one row per configuration, best first, and its Rank.
+    """
+    points = list(itertools.product(*grid))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(points) == 1:
+        rows = [evaluate_thresholds(panel, thresholds) for thresholds in points]
+    else:
+        # A few chunks per worker keep the pool busy without sending one task per point
+        chunk_size = max(1, math.ceil(len(points) / (workers * 4)))
+        chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_sweep_worker,
+                                 initargs=(panel,)) as pool:
+            rows = [row for chunk_rows in pool.map(_evaluate_chunk, chunks) for row in chunk_rows]
+
+    sweep_df = pd.DataFrame(rows)
+    rank_column = SWEEP_RANKS[rank_by]
+    ranked = sweep_df['Signals'] >= min_signals
+    sweep_df = pd.concat([
+        sweep_df[ranked].sort_values([rank_column, 'Signals'], ascending=False, kind='stable'),
+        sweep_df[~ranked].sort_values('Signals', ascending=False, kind='stable'),
+    ], ignore_index=True)
+    sweep_df.insert(0, 'Rank', pd.array(list(range(1, int(ranked.sum()) + 1)) + [None] * int((~ranked).sum()),
+                                        dtype='Int64'))
+    return sweep_df
+
+# --- Command ---
+
+def load_signal_panel(folder2_path, source='matrix'):
+    """
+    Loads the SignalPanel of a CSV folder from the memory-mapped history matrix ('matrix') or
+    the rollover history database ('db'). Either imports the CSV reports on first use.
+    """
+    if source == 'db':
+        return SignalPanel.from_db(history_db.open_for_folder(folder2_path))
+    return SignalPanel.from_mapped_history(history_matrix.open_for_folder(folder2_path))
+
+def run_backtest(folder2=FOLDER2, source='matrix'):
+    """
+    Backtests every generated month of folder2, prints the per-bucket results and writes the
+    bucket, sector and month tables as CSV files into folder2.
+    """
+    folder2_path = Path(folder2)
+    start = time.perf_counter()
+    panel = load_signal_panel(folder2_path, source)
+    if not len(panel.months):
+        print(f"No generated months found in {folder2_path}.")
+        return None
+    loaded = time.perf_counter()
+    results = run_signal_backtest(panel)
+    finished = time.perf_counter()
+
+    print(f"\n--- Signal Backtest: {month_name(int(panel.months[0]))} to {month_name(int(panel.months[-1]))}, "
+          f"{len(panel.symbols)} symbols ---")
+    print(results['signals'].round(2).to_string(index=False))
+
+    for key, filename in BACKTEST_FILES.items():
+        results[key].to_csv(folder2_path / filename, index=False, float_format='%.2f')
+    print(f"\nBacktest tables written to {folder2_path} ({', '.join(BACKTEST_FILES.values())}).")
+    print(f"Loaded {len(panel.months)} months in {loaded - start:.2f}s, backtested in {finished - loaded:.2f}s.")
+    return results
+
+def run_sweep(grid_text, folder2=FOLDER2, source='matrix', workers=None, min_signals=30, rank_by='mean', top=20):
+    """
+    Sweeps a threshold grid over every generated month of folder2, prints the `top` ranked
+    configurations and writes the whole ranked table to Backtest_Sweep.csv in folder2.
+    """
+    grid = parse_threshold_grid(grid_text)
+    folder2_path = Path(folder2)
+    start = time.perf_counter()
+    panel = load_signal_panel(folder2_path, source)
+    if not len(panel.months):
+        print(f"No generated months found in {folder2_path}.")
+        return None
+    loaded = time.perf_counter()
+    sweep_df = sweep_thresholds(panel, grid, workers, min_signals, rank_by)
+    finished = time.perf_counter()
+
+    print(f"\n--- Threshold Sweep: {len(sweep_df)} configurations ranked by {SWEEP_RANKS[rank_by]} "
+          f"(at least {min_signals} signals) ---")
+    overview = ['Rank'] + THRESHOLD_COLUMNS + ['Signals', 'Hit Rate%', 'Mean Trade Return%', 'Median Trade Return%', 'Final Equity']
+    print(sweep_df[overview].head(top).round(2).to_string(index=False))
+
+    sweep_df.to_csv(folder2_path / SWEEP_FILE, index=False, float_format='%.2f')
+    print(f"\nSweep table written to {folder2_path / SWEEP_FILE}.")
+    print(f"Loaded {len(panel.months)} months in {loaded - start:.2f}s, swept in {finished - loaded:.2f}s.")
+    return sweep_df
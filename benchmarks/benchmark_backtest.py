@@ -0,0 +1,99 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backtest import SignalPanel, parse_threshold_grid, run_signal_backtest, sweep_thresholds
+from history_matrix import MappedHistory
+from report_math import shift_month
+from synthetic_data import SECTORS, symbol_names
+
+# --- Benchmark: signal backtest over a long history ---
+#
+# Writes a synthetic history matrix of `years` x 12 months for `symbols` symbols (random
+# walks of spot with noisy rollover deviations), then times loading it into a SignalPanel
+# and running the bucket, sector and month statistics. Loading is timed both cold (a fresh
+# MappedHistory) and warm, and the backtest is repeated for its best run. A threshold grid is
+# then swept in this process and over a process pool.
+
+DEFAULT_GRID = 'mom=0,1,2,4;pct=0,1,2,3,5;cost=0,0.02,0.05,0.1,0.2'
+
+def synthetic_history(folder, symbols, months, end_month='Nov2025', seed=7):
+    """
+    Writes `months` report frames ending at end_month into a MappedHistory under folder.
+    """
+    rng = np.random.default_rng(seed)
+    names = symbol_names('SYM', symbols)
+    sectors = np.asarray(SECTORS, dtype=object)[rng.integers(0, len(SECTORS), symbols)]
+    spot = 100 + rng.random(symbols) * 2000
+    history = MappedHistory(Path(folder), Path(folder))
+    for offset in range(months - 1, -1, -1):
+        next_spot = spot * (1 + rng.normal(0, 0.08, symbols))
+        final_df = pd.DataFrame({
+            'Sectoral Index': sectors,
+            'Symbol': names,
+            'Spot': spot.round(2),
+            'M_o_M%': rng.normal(0, 8, symbols).round(2),
+            'Rollover%': (85 + rng.normal(0, 5, symbols)).round(2),
+            'Rollover cost': rng.normal(0.6, 0.3, symbols).round(2),
+            'Basis': rng.normal(5, 3, symbols).round(2),
+            'Diff Rollover%': rng.normal(0, 4, symbols).round(2),
+            'Diff Rollover Cost': rng.normal(0, 0.2, symbols).round(2),
+            'Next_M_o_M%': ((next_spot - spot) / spot * 100).round(2),
+        })
+        history.write_month(shift_month(end_month, -offset), final_df)
+        spot = next_spot
+    return history
+
+def run_benchmark(years, symbols, repeat, grid_text, workers):
+    months = years * 12
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        synthetic_history(folder, symbols, months)
+        print(f"Wrote {months} months x {symbols} symbols in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        panel = SignalPanel.from_mapped_history(MappedHistory.open(folder, folder))
+        cold = time.perf_counter() - start
+
+        load_times = []
+        backtest_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            panel = SignalPanel.from_mapped_history(MappedHistory.open(folder, folder))
+            load_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            results = run_signal_backtest(panel)
+            backtest_times.append(time.perf_counter() - start)
+
+        signals = int(results['signals']['Signals'].sum())
+        print(f"{'Step':<22}{'Time (s)':>10}")
+        print(f"{'load (cold)':<22}{cold:>10.3f}")
+        print(f"{'load (warm)':<22}{min(load_times):>10.3f}")
+        print(f"{'backtest':<22}{min(backtest_times):>10.3f}")
+
+        grid = parse_threshold_grid(grid_text)
+        points = len(grid[0]) * len(grid[1]) * len(grid[2])
+        for label, sweep_workers in (('sweep (1 process)', 1), (f'sweep ({workers or "all"} workers)', workers)):
+            start = time.perf_counter()
+            sweep_thresholds(panel, grid, workers=sweep_workers)
+            print(f"{label:<22}{time.perf_counter() - start:>10.3f}")
+        print(f"{signals} signalled symbol-months of {panel.mom.size} cells, {points} sweep configurations")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Times the signal backtest on a synthetic history matrix of years x 12 months and N symbols."
+    )
+    parser.add_argument('--years', type=int, default=12, help='Years of monthly history.')
+    parser.add_argument('--symbols', type=int, default=1000, help='Number of symbols.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs (best run is reported).')
+    parser.add_argument('--grid', type=str, default=DEFAULT_GRID, help='Threshold grid of the sweep (see --sweep).')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes of the parallel sweep. Defaults to the number of CPUs.')
+    args = parser.parse_args()
+    run_benchmark(args.years, args.symbols, args.repeat, args.grid, args.workers)
@@ -0,0 +1,66 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# --- Benchmark: pandas engine vs lean engine for the CSV report ---
+
+# Each scenario is (name, command). Commands run inside a scratch copy of the data folders.
+SCENARIOS = {
+    'pandas import': [sys.executable, '-c', 'import generate_files'],
+    'lean import': [sys.executable, '-c', 'import lean_report'],
+    'pandas --csv-only': [sys.executable, 'generate_files.py', '{month}', '--csv-only'],
+    'pandas with xlsx': [sys.executable, 'generate_files.py', '{month}'],
+    'lean': [sys.executable, 'lean_report.py', '{month}'],
+}
+
+def prepare_workdir(workdir):
+    """
+    Copies the scripts and input/output folders into workdir so benchmark runs never touch the repo.
+    """
+    for script in REPO_DIR.glob('*.py'):
+        shutil.copy2(script, workdir)
+    for folder in ('fo_data', 'equity_data', 'generated_csv_data'):
+        shutil.copytree(REPO_DIR / folder, Path(workdir) / folder)
+    shutil.copy2(REPO_DIR / 'index.csv', workdir)
+
+def run_once(command, workdir):
+    """
+    Runs one command and returns (wall time in seconds, peak RSS in MB) of that child process.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    if status != 0:
+        raise RuntimeError(f"{' '.join(command)} exited with status {status}")
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return elapsed, usage.ru_maxrss / scale
+
+def run_benchmark(month_year, repeat):
+    with tempfile.TemporaryDirectory() as workdir:
+        prepare_workdir(workdir)
+        print(f"{'Scenario':<22}{'Best wall (s)':>15}{'Peak RSS (MB)':>15}")
+        for name, command in SCENARIOS.items():
+            command = [part.format(month=month_year) for part in command]
+            results = [run_once(command, workdir) for _ in range(repeat)]
+            best_time = min(r[0] for r in results)
+            peak_rss = max(r[1] for r in results)
+            print(f"{name:<22}{best_time:>15.3f}{peak_rss:>15.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Reports startup time, run time and peak RSS of the pandas and lean CSV report engines."
+    )
+    parser.add_argument('month_year', nargs='?', default='OCT25', help='The month (MMMYY) to generate (default OCT25).')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs per scenario (best time is reported).')
+    args = parser.parse_args()
+
+    run_benchmark(args.month_year, args.repeat)
@@ -0,0 +1,80 @@
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_files import REPORT_COLUMNS, write_excel_report
+from signals import SIGNAL_SHEETS, add_signal_column
+
+# --- Benchmark: pandas to_excel workbook vs constant_memory xlsxwriter workbook ---
+
+def write_with_to_excel(final_df, output_path):
+    """
+    The previous workbook path: one to_excel call per sheet on filtered and sorted copies.
+    Formatting is left out, so this understates its real cost.
+    """
+    final_df = final_df[REPORT_COLUMNS]
+    with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+        final_df.to_excel(writer, sheet_name='Rollover Data', index=False, float_format='%.2f', startrow=4)
+        for sheet_name, (mom_sign, pct_sign, cost_sign), sort_cols, ascending in SIGNAL_SHEETS:
+            sheet_df = final_df[(final_df['M_o_M%'] * mom_sign > 0) & (final_df['Diff Rollover%'] * pct_sign > 0)
+                                & (final_df['Diff Rollover Cost'] * cost_sign > 0)]
+            sheet_df = sheet_df.sort_values(by=sort_cols, ascending=ascending)
+            sheet_df.to_excel(writer, sheet_name=sheet_name, index=False, float_format='%.2f', startrow=4)
+
+def measure(writer, repeat):
+    """
+    Returns (best wall time in seconds, peak traced memory in MB) of writer().
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            writer()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Memory is traced in a separate run because tracemalloc slows everything down
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        writer()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+def run_benchmark(report_csv, repeat, scale):
+    final_df = pd.read_csv(report_csv)
+    if scale > 1:
+        final_df = pd.concat([final_df] * scale, ignore_index=True)
+    add_signal_column(final_df)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        old_time, old_peak = measure(lambda: write_with_to_excel(final_df, tmp_path / 'old.xlsx'), repeat)
+        new_time, new_peak = measure(lambda: write_excel_report(final_df, tmp_path, 'New', '', '', ''), repeat)
+
+    print(f"Rows: {len(final_df)}")
+    print(f"{'Writer':<28}{'Best wall (s)':>15}{'Peak mem (MB)':>15}")
+    print(f"{'to_excel per sheet':<28}{old_time:>15.3f}{old_peak:>15.1f}")
+    print(f"{'constant_memory xlsxwriter':<28}{new_time:>15.3f}{new_peak:>15.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Compares the per-sheet to_excel workbook with the constant_memory xlsxwriter workbook."
+    )
+    parser.add_argument('report_csv', nargs='?', help='A generated *_Rollover_Data.csv (default: the newest one).')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per writer (best run is reported).')
+    parser.add_argument('--scale', type=int, default=1, help='Repeat the report rows this many times.')
+    args = parser.parse_args()
+
+    report_csv = args.report_csv or max((Path(__file__).resolve().parent.parent / 'generated_csv_data').glob('*_Rollover_Data.csv'),
+                                        key=lambda p: p.stat().st_mtime)
+    run_benchmark(report_csv, args.repeat, args.scale)
@@ -0,0 +1,135 @@
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from arrow_ingest import read_futures_arrow, read_spot_arrow
+from benchmark_engines import REPO_DIR
+from generate_files import parse_contract_details_vectorized, read_spot_filtered
+from input_cache import read_input_csv
+
+# --- Benchmark: pandas reader vs Arrow ingest ---
+#
+# For every fo_data and equity_data file, times the current path (pd.read_csv of the whole
+# futures file plus the contract regex, or the chunked EQ filter of the equity file) against
+# arrow_ingest with float64 and float32 prices, checks that the float64 frames hold the
+# same values, and reports the in-memory size of each result. The peak RSS of reading the
+# whole set is measured per reader in a fresh child process that imports only that reader's
+# module, and is reported next to the peak RSS of the same imports without any read, so the
+# difference is the memory the reads themselves take. The child reports its own peak
+# (VmHWM): its ru_maxrss as seen by this process would start at this process's RSS, which
+# already holds pandas, pyarrow and generate_files.
+
+# Prints the peak RSS of the child process in MB
+PEAK_RSS_SNIPPET = (
+    "import resource; status = Path('/proc/self/status'); "
+    "hwm = [line.split()[1] for line in status.read_text().splitlines() if line.startswith('VmHWM')] if status.exists() else []; "
+    "print(int(hwm[0]) / 1024 if hwm else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / "
+    "(1024 * 1024 if sys.platform == 'darwin' else 1024))"
+)
+
+# Reads every input of the data set with one reader; run as a child process for its peak RSS
+SET_SNIPPET = (
+    "import sys; sys.path.insert(0, {repo!r}); from pathlib import Path; {imports}; "
+    "fo = sorted(Path({repo!r}, 'fo_data').glob('fo*.csv')); eq = sorted(Path({repo!r}, 'equity_data').glob('sec_bhavdata_full_*.csv')); "
+    "frames = [{futures} for p in fo] + [{spot} for p in eq]; " + PEAK_RSS_SNIPPET
+)
+
+# Imports only, for the baseline RSS of a reader
+IMPORT_SNIPPET = "import sys; sys.path.insert(0, {repo!r}); from pathlib import Path; {imports}; " + PEAK_RSS_SNIPPET
+
+# Reader -> (imports, futures read, spot read). The pandas reader functions live in generate_files;
+# the Arrow readers return pandas frames, so their baseline imports pandas as well.
+READERS = {
+    'pandas': ("from input_cache import read_input_csv; "
+               "from generate_files import parse_contract_details_vectorized, read_spot_filtered",
+               "(lambda df: df.join(parse_contract_details_vectorized(df['CONTRACT_D'])))(read_input_csv(p, skipinitialspace=True))",
+               "read_spot_filtered(p)"),
+    'arrow': ("import pandas; import arrow_ingest as a", "a.read_futures_arrow(p)", "a.read_spot_arrow(p)"),
+    'arrow float32': ("import pandas; import arrow_ingest as a", "a.read_futures_arrow(p, float32=True)", "a.read_spot_arrow(p, float32=True)"),
+}
+
+def pandas_futures(file_path):
+    futures_df = read_input_csv(file_path, skipinitialspace=True)
+    return futures_df.join(parse_contract_details_vectorized(futures_df['CONTRACT_D']))
+
+def run_child(snippet):
+    """
+    Runs a Python snippet in a fresh process and returns (wall time in seconds, the peak RSS in MB it printed).
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', snippet], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, float(result.stdout.split()[-1])
+
+def best_time(reader, file_path, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = reader(file_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+def check_futures(pandas_df, arrow_df, file_path):
+    columns = ['Instrument', 'Symbol', 'Contract Date', 'CLOSE_PRIC', 'OI_NO_CON', 'TRADED_QUA', 'TRD_NO_CON']
+    expected = pandas_df[columns].astype({'Instrument': object, 'Symbol': object, 'OI_NO_CON': float,
+                                          'TRADED_QUA': float, 'TRD_NO_CON': float})
+    actual = arrow_df[columns].astype({'Instrument': object, 'Symbol': object})
+    pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_index_type=False, obj=str(file_path))
+
+def check_spot(pandas_df, arrow_df, file_path):
+    expected = pandas_df.astype({'SYMBOL': object})
+    actual = arrow_df.astype({'SYMBOL': object})
+    pd.testing.assert_frame_equal(expected, actual, check_dtype=False, obj=str(file_path))
+
+def run_benchmark(fo_files, equity_files, repeat):
+    print(f"{'File':<34}{'Rows':>8}{'pandas (s)':>12}{'arrow (s)':>11}{'f32 (s)':>9}{'Speedup':>9}"
+          f"{'pandas MB':>11}{'arrow MB':>10}{'f32 MB':>8}")
+    totals = [0.0, 0.0, 0.0]
+    for kind, files in (('futures', fo_files), ('spot', equity_files)):
+        for file_path in files:
+            if kind == 'futures':
+                pandas_time, pandas_df = best_time(pandas_futures, file_path, repeat)
+                arrow_time, arrow_df = best_time(read_futures_arrow, file_path, repeat)
+                f32_time, f32_df = best_time(lambda p: read_futures_arrow(p, float32=True), file_path, repeat)
+                check_futures(pandas_df, arrow_df, file_path)
+                rows = len(pandas_df)
+            else:
+                pandas_time, pandas_df = best_time(read_spot_filtered, file_path, repeat)
+                arrow_time, arrow_df = best_time(read_spot_arrow, file_path, repeat)
+                f32_time, f32_df = best_time(lambda p: read_spot_arrow(p, float32=True), file_path, repeat)
+                check_spot(pandas_df, arrow_df, file_path)
+                rows = sum(1 for _ in open(file_path)) - 1
+            totals = [totals[0] + pandas_time, totals[1] + arrow_time, totals[2] + f32_time]
+            print(f"{Path(file_path).name:<34}{rows:>8}{pandas_time:>12.4f}{arrow_time:>11.4f}{f32_time:>9.4f}"
+                  f"{pandas_time / arrow_time:>8.1f}x{frame_mb(pandas_df):>11.2f}{frame_mb(arrow_df):>10.2f}{frame_mb(f32_df):>8.2f}")
+    print(f"{'Total':<34}{'':>8}{totals[0]:>12.4f}{totals[1]:>11.4f}{totals[2]:>9.4f}{totals[0] / totals[1]:>8.1f}x")
+
+    print(f"\n{'Reader (whole set)':<22}{'Wall (s)':>10}{'Peak RSS (MB)':>15}{'Imports (MB)':>14}{'Reads (MB)':>12}")
+    for name, (imports, futures, spot) in READERS.items():
+        snippet = SET_SNIPPET.format(repo=str(REPO_DIR), imports=imports, futures=futures, spot=spot)
+        runs = [run_child(snippet) for _ in range(repeat)]
+        baseline_snippet = IMPORT_SNIPPET.format(repo=str(REPO_DIR), imports=imports)
+        baseline = min(run_child(baseline_snippet)[1] for _ in range(repeat))
+        peak = max(r[1] for r in runs)
+        print(f"{name:<22}{min(r[0] for r in runs):>10.3f}{peak:>15.1f}{baseline:>14.1f}{peak - baseline:>12.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Compares parse time and memory of the pandas reader and the Arrow ingest on the fo_data and equity_data files."
+    )
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per reader (best run is reported).')
+    args = parser.parse_args()
+
+    fo_files = sorted(str(p) for p in (REPO_DIR / 'fo_data').glob('fo*.csv'))
+    equity_files = sorted(str(p) for p in (REPO_DIR / 'equity_data').glob('sec_bhavdata_full_*.csv'))
+    run_benchmark(fo_files, equity_files, args.repeat)
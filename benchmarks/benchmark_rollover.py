@@ -0,0 +1,70 @@
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_files import calculate_futures_rollover, calculate_futures_rollover_loop
+
+# --- Benchmark: per-symbol loop vs vectorized futures rollover ---
+
+def time_engine(engine, futures_df, repeat):
+    """
+    Runs one rollover engine `repeat` times on fresh copies of futures_df and returns
+    (best wall time in seconds, result of the last run).
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        df = futures_df.copy()
+        start = time.perf_counter()
+        # Engines print skipped symbols; keep them out of the timing table
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = engine(df)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def run_benchmark(fo_files, repeat, scale):
+    """
+    Times calculate_futures_rollover_loop against calculate_futures_rollover for every fo file
+    and checks that both produce the same frame and the same current month names.
+    """
+    print(f"{'File':<16}{'Rows':>8}{'Loop (s)':>12}{'Vector (s)':>12}{'Speedup':>10}")
+    for fo_file in fo_files:
+        futures_df = pd.read_csv(fo_file, skipinitialspace=True)
+        if scale > 1:
+            # Replicate the file with renamed symbols to mimic a larger universe
+            copies = []
+            for i in range(scale):
+                copy = futures_df.copy()
+                copy['CONTRACT_D'] = copy['CONTRACT_D'].str.replace(r'^(FUTSTK[A-Z0-9]+?)(\d{2}-)', rf'\g<1>X{i}\g<2>', regex=True)
+                copies.append(copy)
+            futures_df = pd.concat(copies, ignore_index=True)
+
+        loop_time, (loop_df, loop_names) = time_engine(calculate_futures_rollover_loop, futures_df, repeat)
+        vector_time, (vector_df, vector_names) = time_engine(calculate_futures_rollover, futures_df, repeat)
+
+        # The loop engine only knows stock futures
+        vector_df = vector_df[vector_df['Instrument'] == 'FUTSTK'].drop(columns=['Instrument'])
+        pd.testing.assert_frame_equal(loop_df, vector_df, check_index_type=False)
+        assert loop_names == vector_names, f"Current month names differ for {fo_file}"
+
+        print(f"{Path(fo_file).name:<16}{len(futures_df):>8}{loop_time:>12.4f}{vector_time:>12.4f}{loop_time / vector_time:>9.1f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Compares the per-symbol loop and the vectorized futures rollover engines on the fo_data files."
+    )
+    parser.add_argument('fo_files', nargs='*', help='Futures bhavcopies to benchmark. Defaults to every fo_data/fo*.csv file.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per engine (best run is reported).')
+    parser.add_argument('--scale', type=int, default=1, help='Replicate each file this many times with renamed symbols.')
+    args = parser.parse_args()
+
+    fo_files = args.fo_files or sorted(str(p) for p in (Path(__file__).resolve().parent.parent / 'fo_data').glob('fo*.csv'))
+    run_benchmark(fo_files, args.repeat, args.scale)
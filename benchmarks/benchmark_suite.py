@@ -0,0 +1,173 @@
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark_engines import REPO_DIR, run_once
+from synthetic_data import generate_dataset
+
+# --- Reproducible Benchmark Suite ---
+#
+# Generates a synthetic bhavcopy set (benchmarks/synthetic_data.py) of a chosen size, then
+# times the report scenarios on it in a scratch folder: a full backfill of every month, a
+# single-month report with history in place, and the historical averages alone for each
+# average source. Every scenario reports its best wall time, its input rows per second and
+# the peak RSS of the child process. The results are written as JSON, so runs of different
+# versions (or sizes) can be compared with --compare.
+
+RESULTS_FOLDER = REPO_DIR / 'benchmarks' / 'results'
+
+# Runs the historical averages of one month from one source, without building a report
+AVERAGES_SNIPPET = (
+    "from pathlib import Path; import generate_files as g; "
+    "g.configure_averages(source='{source}', window={window}, rebuild=True); "
+    "g.get_historical_averages(Path(g.FOLDER2), {{}}, '{month}')"
+)
+
+def prepare_workdir(workdir, dataset):
+    """
+    Copies the scripts into workdir and generates the synthetic inputs there.
+    """
+    for script in REPO_DIR.glob('*.py'):
+        shutil.copy2(script, workdir)
+    return generate_dataset(workdir, **dataset)
+
+def scenarios(info, window, use_cache):
+    """
+    Returns [(name, command, input rows)] in run order. The backfill runs first, so the
+    single-month and averages scenarios find the history months they need.
+    """
+    months = info['report_months']
+    first_month, last_month = months[0], months[-1]
+    average_month = datetime.strptime(last_month, '%b%y').strftime('%b%Y')
+    cache_args = [] if use_cache else ['--no-cache']
+
+    fo_rows = info['fo_rows_per_file']
+    equity_rows = info['equity_rows_per_file']
+    # Each month reads its futures file and the previous, current and (except the last month) next equity file
+    backfill_rows = len(months) * (fo_rows + 3 * equity_rows) - equity_rows
+    single_rows = fo_rows + 2 * equity_rows
+    average_rows = min(window, len(months) - 1) * info['symbols']
+
+    result = [
+        ('backfill --csv-only',
+         [sys.executable, 'generate_files.py', '--range', f'{first_month}:{last_month}', '--csv-only', *cache_args],
+         backfill_rows),
+        ('single month --csv-only',
+         [sys.executable, 'generate_files.py', last_month, '--csv-only', *cache_args],
+         single_rows),
+        ('single month with xlsx',
+         [sys.executable, 'generate_files.py', last_month, *cache_args],
+         single_rows),
+    ]
+    for source in ('csv', 'store', 'db', 'matrix'):
+        snippet = AVERAGES_SNIPPET.format(source=source, window=window, month=average_month)
+        result.append((f'averages only ({source})', [sys.executable, '-c', snippet], average_rows))
+    return result
+
+def git_version():
+    """
+    The commit the scripts were benchmarked at, with a '-dirty' suffix for uncommitted changes.
+    """
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f"{revision}-dirty" if dirty else revision
+
+def run_suite(dataset, window, repeat, use_cache):
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"Generating {dataset['symbols']} symbols x {dataset['depth']} contracts x {dataset['months']} months...")
+        info = prepare_workdir(workdir, dataset)
+
+        results = []
+        print(f"{'Scenario':<26}{'Best wall (s)':>15}{'Rows/s':>14}{'Peak RSS (MB)':>15}")
+        for name, command, rows in scenarios(info, window, use_cache):
+            runs = [run_once(command, workdir) for _ in range(repeat)]
+            best_time = min(r[0] for r in runs)
+            peak_rss = max(r[1] for r in runs)
+            rows_per_second = rows / best_time if best_time > 0 else None
+            print(f"{name:<26}{best_time:>15.3f}{rows_per_second:>14,.0f}{peak_rss:>15.1f}")
+            results.append({
+                'scenario': name,
+                'command': ' '.join(command[1:]),
+                'rows': rows,
+                'best_wall_s': round(best_time, 4),
+                'all_wall_s': [round(r[0], 4) for r in runs],
+                'rows_per_s': round(rows_per_second, 1),
+                'peak_rss_mb': round(peak_rss, 1),
+            })
+
+    return {
+        'version': git_version(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': info,
+        'window': window,
+        'repeat': repeat,
+        'cache': use_cache,
+        'scenarios': results,
+    }
+
+def print_comparison(baseline, current):
+    """
+    Prints the wall time and peak RSS of each scenario against a saved baseline run.
+    """
+    previous = {entry['scenario']: entry for entry in baseline['scenarios']}
+    print(f"\nCompared with {baseline['version']} ({baseline['timestamp']}):")
+    print(f"{'Scenario':<26}{'Wall (s)':>20}{'Speedup':>10}{'Peak RSS (MB)':>22}")
+    for entry in current['scenarios']:
+        old = previous.get(entry['scenario'])
+        if old is None:
+            print(f"{entry['scenario']:<26}{'(new scenario)':>20}")
+            continue
+        speedup = old['best_wall_s'] / entry['best_wall_s'] if entry['best_wall_s'] else float('nan')
+        print(f"{entry['scenario']:<26}{old['best_wall_s']:>9.3f} -> {entry['best_wall_s']:<7.3f}{speedup:>9.2f}x"
+              f"{old['peak_rss_mb']:>10.1f} -> {entry['peak_rss_mb']:<8.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Times backfill, single-month and averages-only runs on a synthetic bhavcopy set "
+                    "and writes throughput and peak RSS as JSON."
+    )
+    parser.add_argument('--symbols', type=int, default=1000, help='Number of F&O stock symbols (e.g. 1000, 10000, 100000).')
+    parser.add_argument('--depth', type=int, default=3, help='Futures contracts per symbol.')
+    parser.add_argument('--months', type=int, default=7, help='Number of report months (history plus the target month).')
+    parser.add_argument('--end-month', default='OCT25', help='Last report month (MMMYY).')
+    parser.add_argument('--noise-ratio', type=float, default=1.0, help='Non-F&O equity rows per F&O symbol.')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed of the synthetic data.')
+    parser.add_argument('--window', type=int, default=6, help='Months in the historical averages.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs per scenario (best time is reported).')
+    parser.add_argument('--cache', action='store_true', help='Keep the parsed input cache on (default: every run parses the CSVs).')
+    parser.add_argument('--output', help='JSON file for the results (default benchmarks/results/<version>_<symbols>.json).')
+    parser.add_argument('--compare', help='A previous results JSON to compare against.')
+    args = parser.parse_args()
+
+    dataset = {
+        'symbols': args.symbols,
+        'depth': args.depth,
+        'months': args.months,
+        'end_month': args.end_month,
+        'noise_ratio': args.noise_ratio,
+        'seed': args.seed,
+    }
+    report = run_suite(dataset, args.window, args.repeat, args.cache)
+
+    output = Path(args.output) if args.output else RESULTS_FOLDER / f"{report['version']}_{args.symbols}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        print_comparison(json.loads(Path(args.compare).read_text()), report)
@@ -0,0 +1,200 @@
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from report_inputs import EQUITY_FOLDER, FO_FOLDER, INDEX_FILE, calculate_expiry_date
+
+# --- Synthetic Bhavcopy Generator ---
+#
+# Writes fo<DDMMYY>.csv, sec_bhavdata_full_<DDMMYYYY>.csv and index.csv files with the column
+# layout of the real NSE files for any number of symbols, contracts per symbol and months.
+# The same arguments and seed always produce the same files, so benchmark runs are comparable.
+
+FO_COLUMNS = [
+    'CONTRACT_D', 'PREVIOUS_S', 'OPEN_PRICE', 'HIGH_PRICE', 'LOW_PRICE', 'CLOSE_PRIC',
+    'SETTLEMENT', 'NET_CHANGE', 'OI_NO_CON', 'TRADED_QUA', 'TRD_NO_CON', 'TRADED_VAL',
+]
+
+EQUITY_COLUMNS = [
+    'SYMBOL', 'SERIES', 'DATE1', 'PREV_CLOSE', 'OPEN_PRICE', 'HIGH_PRICE', 'LOW_PRICE',
+    'LAST_PRICE', 'CLOSE_PRICE', 'AVG_PRICE', 'TTL_TRD_QNTY', 'TURNOVER_LACS',
+    'NO_OF_TRADES', 'DELIV_QTY', 'DELIV_PER',
+]
+
+INDEX_SYMBOLS = ['NIFTY', 'BANKNIFTY', 'FINNIFTY', 'MIDCPNIFTY', 'NIFTYNXT50']
+
+SECTORS = [
+    'NIFTY Auto', 'NIFTY Bank', 'NIFTY Energy', 'NIFTY FMCG', 'NIFTY IT', 'NIFTY Metal',
+    'NIFTY Pharma', 'NIFTY Realty', 'NIFTY Financial Services', 'NIFTY Industrial',
+]
+
+# Series of the non-F&O rows that pad the equity bhavcopy, like GS, SME and BE rows in the real file
+NOISE_SERIES = ['BE', 'SM', 'ST', 'GB', 'N1']
+
+def symbol_names(prefix, count):
+    """
+    FUTSTK-compatible symbol names (letters and digits only): SYM0000000, SYM0000001, ...
+    """
+    return [f"{prefix}{i:07d}" for i in range(count)]
+
+def expiry_dates(end_month, months):
+    """
+    Expiry dates of the `months` months ending at end_month (MMMYY), oldest first.
+    """
+    end_dt = datetime.strptime(end_month, '%b%y')
+    dates = []
+    for offset in range(months - 1, -1, -1):
+        month_dt = end_dt - relativedelta(months=offset)
+        dates.append(calculate_expiry_date(month_dt.year, month_dt.month, False))
+    return dates
+
+def _write_padded_csv(df, path, separator):
+    # The real equity bhavcopy separates its fields with ', ', which to_csv cannot write directly
+    text = df.to_csv(index=False, float_format='%.2f', lineterminator='\n')
+    path.write_text(text.replace(',', separator) if separator != ',' else text)
+
+def write_futures_file(path, symbols, base_prices, expiries, rng):
+    """
+    Writes one futures bhavcopy: len(expiries) contracts for every stock symbol and index.
+    """
+    all_symbols = symbols + INDEX_SYMBOLS
+    prices = np.concatenate([base_prices, rng.uniform(10000, 60000, len(INDEX_SYMBOLS))])
+    count = len(all_symbols)
+    depth = len(expiries)
+
+    instrument = np.array(['FUTSTK'] * len(symbols) + ['FUTIDX'] * len(INDEX_SYMBOLS), dtype=object)
+    contracts = []
+    for rank, expiry in enumerate(expiries):
+        carry = 1 + 0.006 * (rank + 1) + rng.normal(0, 0.002, count)
+        close = prices * carry
+        # Open interest moves from the current contract to the next ones as expiry nears
+        oi = np.round(rng.uniform(1000, 200000, count) * (0.15 if rank == 0 else 1.0 / rank))
+        lot = rng.choice([25, 50, 75, 125, 250, 500, 1000], count)
+        contracts_traded = np.round(rng.uniform(100, 50000, count))
+        contracts.append(pd.DataFrame({
+            'CONTRACT_D': instrument + np.array(all_symbols, dtype=object) + expiry.strftime('%d-%b-%Y').upper(),
+            'PREVIOUS_S': close * (1 + rng.normal(0, 0.01, count)),
+            'OPEN_PRICE': close * (1 + rng.normal(0, 0.005, count)),
+            'HIGH_PRICE': close * 1.01,
+            'LOW_PRICE': close * 0.99,
+            'CLOSE_PRIC': close,
+            'SETTLEMENT': close,
+            'NET_CHANGE': rng.normal(0, 1, count),
+            'OI_NO_CON': oi,
+            'TRADED_QUA': contracts_traded * lot,
+            'TRD_NO_CON': contracts_traded,
+            'TRADED_VAL': contracts_traded * lot * close,
+        }))
+    fo_df = pd.concat(contracts, ignore_index=True)
+    # Real files list the contracts of a symbol together, not grouped by expiry
+    order = np.argsort(np.tile(np.arange(count), depth), kind='stable')
+    fo_df = fo_df.iloc[order]
+    fo_df.to_csv(path, index=False, columns=FO_COLUMNS, float_format='%.7f', lineterminator='\n')
+
+def write_equity_file(path, symbols, prices, noise_symbols, trade_date, rng):
+    """
+    Writes one equity bhavcopy: an EQ row for every F&O symbol plus non-F&O padding rows.
+    """
+    count = len(symbols) + len(noise_symbols)
+    closes = np.concatenate([prices, rng.uniform(5, 2000, len(noise_symbols))])
+    series = ['EQ'] * len(symbols) + list(rng.choice(NOISE_SERIES, len(noise_symbols)))
+    equity_df = pd.DataFrame({
+        'SYMBOL': symbols + noise_symbols,
+        'SERIES': series,
+        'DATE1': trade_date.strftime('%d-%b-%Y'),
+        'PREV_CLOSE': closes * (1 + rng.normal(0, 0.01, count)),
+        'OPEN_PRICE': closes * (1 + rng.normal(0, 0.005, count)),
+        'HIGH_PRICE': closes * 1.02,
+        'LOW_PRICE': closes * 0.98,
+        'LAST_PRICE': closes,
+        'CLOSE_PRICE': closes,
+        'AVG_PRICE': closes,
+        'TTL_TRD_QNTY': rng.integers(100, 1000000, count),
+        'TURNOVER_LACS': closes * 10,
+        'NO_OF_TRADES': rng.integers(10, 100000, count),
+        'DELIV_QTY': rng.integers(10, 100000, count),
+        'DELIV_PER': rng.uniform(5, 95, count),
+    })
+    # Interleave the padding rows with the F&O rows, like the alphabetical real file
+    equity_df = equity_df.iloc[rng.permutation(count)]
+    _write_padded_csv(equity_df[EQUITY_COLUMNS], path, ', ')
+
+def generate_dataset(out_dir, symbols=1000, depth=3, months=7, end_month='OCT25', noise_ratio=1.0, seed=7):
+    """
+    Generates a complete input set under out_dir: a futures file for each of the `months` months
+    ending at end_month, an equity file for each of those expiries plus the one before (for the
+    first month's M_o_M%), and index.csv.
+
+    Returns:
+        A dict describing the dataset (sizes, months and row counts per file).
+    """
+    out_dir = Path(out_dir)
+    fo_folder = out_dir / FO_FOLDER
+    equity_folder = out_dir / EQUITY_FOLDER
+    fo_folder.mkdir(parents=True, exist_ok=True)
+    equity_folder.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    stock_symbols = symbol_names('SYM', symbols)
+    noise_symbols = symbol_names('PAD', int(symbols * noise_ratio))
+
+    sectors = rng.choice(SECTORS, symbols)
+    pd.DataFrame({
+        'Sectoral Index': sectors,
+        'Company Name': [f"{s} Ltd" for s in stock_symbols],
+        'Symbol': stock_symbols,
+    }).to_csv(out_dir / INDEX_FILE, index=False)
+
+    # One expiry before the report months for the first month's previous spot, and
+    # depth - 1 after them for the far contracts of the last month
+    last_contract_month = (datetime.strptime(end_month, '%b%y') + relativedelta(months=depth - 1)).strftime('%b%y')
+    all_expiries = expiry_dates(last_contract_month, months + depth)
+    first = 1
+    prices = rng.lognormal(6, 1, symbols)
+
+    fo_rows = symbols * depth + len(INDEX_SYMBOLS) * depth
+    equity_rows = symbols + len(noise_symbols)
+    for i, expiry in enumerate(all_expiries[:first + months]):
+        if i > 0:
+            prices = prices * np.exp(rng.normal(0, 0.08, symbols))
+        write_equity_file(equity_folder / f"sec_bhavdata_full_{expiry:%d%m%Y}.csv", stock_symbols, prices,
+                          noise_symbols, expiry, rng)
+        if i >= first:
+            write_futures_file(fo_folder / f"fo{expiry:%d%m%y}.csv", stock_symbols, prices,
+                               all_expiries[i:i + depth], rng)
+
+    report_months = [expiry.strftime('%b%y').upper() for expiry in all_expiries[first:first + months]]
+    return {
+        'symbols': symbols,
+        'depth': depth,
+        'months': months,
+        'end_month': end_month,
+        'noise_ratio': noise_ratio,
+        'seed': seed,
+        'report_months': report_months,
+        'fo_rows_per_file': fo_rows,
+        'equity_rows_per_file': equity_rows,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Writes synthetic fo*.csv, sec_bhavdata_full_*.csv and index.csv files in the real NSE layouts."
+    )
+    parser.add_argument('out_dir', help='Folder to write fo_data/, equity_data/ and index.csv into.')
+    parser.add_argument('--symbols', type=int, default=1000, help='Number of F&O stock symbols (e.g. 1000, 10000, 100000).')
+    parser.add_argument('--depth', type=int, default=3, help='Futures contracts per symbol.')
+    parser.add_argument('--months', type=int, default=7, help='Number of report months (history plus the target month).')
+    parser.add_argument('--end-month', default='OCT25', help='Last report month (MMMYY).')
+    parser.add_argument('--noise-ratio', type=float, default=1.0, help='Non-F&O equity rows per F&O symbol.')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed.')
+    args = parser.parse_args()
+
+    info = generate_dataset(args.out_dir, args.symbols, args.depth, args.months, args.end_month, args.noise_ratio, args.seed)
+    print(f"Generated {info['months']} months ({', '.join(info['report_months'])}) of {info['symbols']} symbols in {args.out_dir}")
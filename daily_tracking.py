@@ -0,0 +1,123 @@
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from generate_files import (
+    EQUITY_FOLDER, FO_FOLDER, calculate_basis_and_cost, calculate_expiry_date,
+    calculate_futures_rollover, futures_symbols, list_dated_files, load_futures, load_spot,
+)
+from rolling_averages import STORE_FOLDER
+
+# --- Daily Rollover Tracking ---
+#
+# Tracks how rollover builds up during a series: every daily fo*.csv between the previous
+# expiry (exclusive) and the series expiry (inclusive) is processed in date order and its
+# per-symbol Rollover%, Rollover cost and Basis are stored as one Parquet part per day under
+# generated_store/daily/<Mon><YYYY>/. Days already in the store are not recomputed, so adding
+# a new day only costs that day's files.
+
+DAILY_FOLDER = STORE_FOLDER / 'daily'
+
+DAILY_COLUMNS = ['Date', 'Symbol', 'Spot', 'Future Price', 'Basis', 'Rollover%', 'Rollover cost']
+
+def series_window(month_year):
+    """
+    Returns (previous expiry, series expiry, series name in MmmYYYY) for a MMMYY month.
+    Unlike get_curr_and_prev_month_dates, the series expiry may still be in the future.
+    """
+    if month_year:
+        try:
+            month_dt = datetime.strptime(month_year, '%b%y')
+        except ValueError:
+            raise ValueError("Input format must be MMMYY (e.g., DEC25).")
+    else:
+        month_dt = datetime.now()
+
+    prev_dt = month_dt - relativedelta(months=1)
+    curr_expiry = calculate_expiry_date(month_dt.year, month_dt.month, False)
+    prev_expiry = calculate_expiry_date(prev_dt.year, prev_dt.month, False)
+    return prev_expiry, curr_expiry, curr_expiry.strftime('%b%Y')
+
+def calculate_daily_metrics(futures_df, spot_df, trade_date):
+    """
+    Computes one day's Rollover%, Rollover cost and Basis per symbol with the same formulas
+    as generate_rollover_report. Symbols without a spot price keep their Rollover%.
+    """
+    final_df, _ = calculate_futures_rollover(futures_df)
+    final_df = final_df[final_df['Instrument'] == 'FUTSTK'].drop(columns=['Instrument'])
+    if final_df.empty:
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+
+    if spot_df is not None:
+        spot_df = spot_df[spot_df['SYMBOL'].isin(final_df.index)].drop_duplicates(subset=['SYMBOL']).set_index('SYMBOL')
+        final_df = final_df.join(spot_df, how='left')
+    else:
+        final_df['Spot'] = float('nan')
+
+    calculate_basis_and_cost(final_df)
+    final_df.reset_index(inplace=True)
+    final_df.insert(0, 'Date', pd.Timestamp(trade_date))
+    return final_df[DAILY_COLUMNS]
+
+def _write_part(df, part_path):
+    part_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary name first so readers never see a partial day
+    tmp_path = part_path.with_suffix(f'.{os.getpid()}.tmp')
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, part_path)
+
+def run_daily_mode(month_year, fo_folder=FO_FOLDER, equity_folder=EQUITY_FOLDER, daily_folder=DAILY_FOLDER):
+    """
+    Adds every not-yet-stored trading day of the series to the daily store.
+    A day is recomputed only when its fo file is newer than its stored part.
+    """
+    prev_expiry, curr_expiry, series_name = series_window(month_year)
+    print(f"--- Daily rollover tracking for the {series_name} series ({prev_expiry:%d-%b-%Y} to {curr_expiry:%d-%b-%Y}) ---")
+
+    fo_files = {d: p for d, p in list_dated_files(fo_folder, 'fo').items() if prev_expiry < d <= curr_expiry}
+    spot_files = list_dated_files(equity_folder, 'sec_bhavdata_full_')
+    series_folder = Path(daily_folder) / series_name
+
+    if not fo_files:
+        print(f"No futures files found in {fo_folder} for the {series_name} series.")
+        return
+
+    new_days = 0
+    for trade_date in sorted(fo_files):
+        fo_path = fo_files[trade_date]
+        part_path = series_folder / f"{trade_date:%Y%m%d}.parquet"
+        if part_path.exists() and part_path.stat().st_mtime >= fo_path.stat().st_mtime:
+            continue
+
+        spot_path = spot_files.get(trade_date)
+        if spot_path is None:
+            print(f"Warning: No equity bhavcopy for {trade_date:%d-%b-%Y}, Basis and Rollover cost will be blank.")
+
+        futures_df = load_futures(fo_path)
+        spot_df = load_spot(spot_path, 'Spot', futures_symbols(futures_df)) if spot_path is not None else None
+        day_df = calculate_daily_metrics(futures_df, spot_df, trade_date)
+        _write_part(day_df, part_path)
+        new_days += 1
+        print(f"Stored {len(day_df)} symbols for {trade_date:%d-%b-%Y}")
+
+    print(f"\nDaily store for {series_name}: {new_days} new days, {len(list(series_folder.glob('*.parquet')))} days in total.")
+    print(f"Store location: {series_folder.resolve()}")
+
+def load_daily_series(series_name, daily_folder=DAILY_FOLDER):
+    """
+    Loads every stored day of a series (e.g. Oct2025) as one long frame sorted by Date and Symbol.
+    """
+    parts = sorted((Path(daily_folder) / series_name).glob('*.parquet'))
+    if not parts:
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+    series_df = pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
+    return series_df.sort_values(['Date', 'Symbol'], ignore_index=True)
+
+def daily_matrix(series_df, metric):
+    """
+    Pivots a daily series into a symbol x day table of one metric (Rollover%, Rollover cost or Basis).
+    """
+    return series_df.pivot_table(index='Symbol', columns='Date', values=metric, aggfunc='first')
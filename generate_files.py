@@ -1,12 +1,37 @@
+import numpy as np
 import pandas as pd
 import argparse
+import logging
 import re
+import time
 from pathlib import Path
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 
-from xlsxwriter.utility import xl_rowcol_to_cell
-import calendar
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from arrow_ingest import INGEST_SETTINGS, configure_ingest, read_futures_arrow, read_spot_arrow
+from input_cache import CACHE_SETTINGS, configure_cache, load_cached, read_csv_cached
+from report_inputs import (
+    EQUITY_FOLDER, FO_FOLDER, FOLDER1, FOLDER2, INDEX_FILE, calculate_expiry_date,
+    get_curr_and_prev_month_dates, get_last_weekday_of_month, input_source, list_dated_files,
+    resolve_report_inputs, try_file_read,
+)
+import history_db
+import history_matrix
+from history_stats import HISTORY_STAT_COLUMNS, history_stats
+from profiling import (
+    PROFILE_SETTINGS, concurrent_stage, configure_profiling, merge_stage_records, print_profile_report,
+    run_profiled, stage,
+)
+from report_math import month_index
+from rolling_averages import RollingAverageStore
+from sector_summary import build_sector_summary, sector_summary_filename
+from signals import add_signal_column, signal_sheet_rows
+from symbol_master import SymbolMaster
+
+# Debug output (intermediate frames, resolved paths) goes through this logger; see --log-level
+logger = logging.getLogger('rollover')
 
 # --- Utility Functions ---
 
@@ -38,22 +63,30 @@ def generate_last_six_months(input_month_year: str) -> list:
     """
     Generates a list of strings for the last 6 months in MMMYYYY format,
     starting from the month *before* the input month.
+    """
+    return generate_last_n_months(input_month_year, 6)
+
+def generate_last_n_months(input_month_year: str, months: int) -> list:
+    """
+    Generates a list of strings for the last `months` months in MMMYYYY format,
+    starting from the month *before* the input month.
 
     Args:
         input_month_year: A string representing a month and year in MMMYYYY format (e.g., "DEC2023").
+        months: The number of months to go back (the averaging window).
 
     Returns:
-        A list of 6 strings, each in MMMYYYY format.
+        A list of `months` strings, each in MMMYYYY format.
     """
     # 1. Parse the input string into a datetime object
     # We use a default day (like 1) for the parsing to work
     date_obj = datetime.strptime(input_month_year, "%b%Y")
 
-    # 2. Generate the last 6 months
-    # The list will contain the 6 months *leading up to* the input month
-    # If the user wants to include the input month itself, adjust the range to -5 to 0
+    # 2. Generate the last N months
+    # The list will contain the N months *leading up to* the input month
+    # If the user wants to include the input month itself, adjust the range to -(N-1) to 0
     past_months = []
-    for i in range(1, 7):
+    for i in range(1, months + 1):
         # Subtract 'i' months from the input date using relativedelta
         # This handles month/year transitions correctly
         previous_date = date_obj - relativedelta(months=i)
@@ -65,9 +98,9 @@ def generate_last_six_months(input_month_year: str) -> list:
     # The list is generated from most recent to oldest, so reverse it to be chronological
     return past_months[::-1]
 
-def calculate_averages(folder1_path, current_month_symbol_map, curr_month_year):
+def calculate_averages(folder1_path, current_month_symbol_map, curr_month_year, window=6):
     """
-    Reads the last 6 monthly Rollover Data files from folder1 and calculates 
+    Reads the last `window` (6 by default) monthly Rollover Data files from folder1 and calculates
     the average Rollover% and Rollover Cost for each Symbol.
     """
     historical_data = []
@@ -79,10 +112,10 @@ def calculate_averages(folder1_path, current_month_symbol_map, curr_month_year):
     # })
 
     # 1. Find and sort historical files
-    print(folder1_path)
+    logger.debug("History folder: %s", folder1_path)
 
-    prev_months = generate_last_six_months(curr_month_year)
-    print(prev_months)
+    prev_months = generate_last_n_months(curr_month_year, window)
+    logger.debug("Months to average: %s", prev_months)
     # print(folder1_path.glob('*_Rollover_Data.csv'))
     # history_files = sorted(
     #     folder1_path.glob('*_Rollover_Data.csv'),
@@ -95,13 +128,16 @@ def calculate_averages(folder1_path, current_month_symbol_map, curr_month_year):
     files_to_average = []
     for monYear in prev_months:
         file = monYear + "_Rollover_Data.csv"
-        print(file)
+        logger.debug("Looking for %s", file)
         filePath = list(folder1_path.glob(file))
-        print(filePath[0])
+        if not filePath:
+            print(f"No rollover file found for {monYear}, leaving it out of the average.")
+            continue
+        logger.debug("Found %s", filePath[0])
         files_to_average.append(filePath[0])
 
 
-    print(files_to_average)
+    logger.debug("Files to average: %s", files_to_average)
     if not files_to_average:
         print("No historical rollover files found for averaging. Avg. columns will be 0.")
         # Return a DataFrame of zeros if no history exists
@@ -131,7 +167,6 @@ def calculate_averages(folder1_path, current_month_symbol_map, curr_month_year):
         
     # Concatenate all historical data
     all_history = pd.concat(historical_data, ignore_index=True)
-    print("ABC")
     # 3. Group by Symbol and calculate the average
     # Important: This calculates the average across all entries in the 6 files.
     avg_df = all_history.groupby('Symbol').agg(
@@ -142,331 +177,860 @@ def calculate_averages(folder1_path, current_month_symbol_map, curr_month_year):
         'Rollover cost': 'Avg. Rollover Cost'
     })
 
-    print("START AVG")
     final_avg_df = avg_df.reset_index()
-    print(final_avg_df)
-    print("DONE AVG")
+    logger.debug("Historical averages:\n%s", final_avg_df)
     return final_avg_df
 
-# --- Main Logic ---
+# Where historical averages come from: the incremental rolling average store ('store'),
+# the legacy re-read of the last `window` CSV files ('csv'), an indexed query on the
+# rollover history database ('db') or a slice of the memory-mapped history matrix ('matrix').
+AVERAGE_SETTINGS = {
+    'source': 'store',
+    'window': 6,
+    'rebuild': False,
+}
+
+_AVERAGE_STORES = {}
 
-def generate_rollover_report(folder1, folder2, file1_path, file2_path, file3_path, file4_path, file5_path_prev, curr_date_6, prev_date_6, next_date_6):
+def configure_averages(source='store', window=6, rebuild=False):
     """
-    Main function to process financial files and generate the rollover report.
+    Updates the settings used by get_historical_averages (e.g. from the --avg-source,
+    --avg-window and --rebuild-averages command line switches).
     """
-    print("--- Starting Rollover Report Generation ---")
+    AVERAGE_SETTINGS['source'] = source
+    AVERAGE_SETTINGS['window'] = window
+    AVERAGE_SETTINGS['rebuild'] = rebuild
+
+def _average_store(folder2_path):
+    key = (str(Path(folder2_path).resolve()), AVERAGE_SETTINGS['window'])
+    if key not in _AVERAGE_STORES:
+        store = RollingAverageStore.open(folder2_path, AVERAGE_SETTINGS['window'])
+        if AVERAGE_SETTINGS['rebuild']:
+            store.clear() # Every month is read again from the CSVs on first use
+        _AVERAGE_STORES[key] = store
+    return _AVERAGE_STORES[key]
+
+def get_historical_averages(folder2_path, current_month_symbol_map, curr_month_year):
+    """
+    Returns the Avg. Roll Over / Avg. Rollover Cost of every symbol over the months before
+    curr_month_year, from the configured source.
+    """
+    with stage('averages') as record:
+        if AVERAGE_SETTINGS['source'] == 'csv':
+            avg_df = calculate_averages(folder2_path, current_month_symbol_map, curr_month_year, AVERAGE_SETTINGS['window'])
+        elif AVERAGE_SETTINGS['source'] == 'db':
+            avg_df = history_db.averages_for(history_db.open_for_folder(folder2_path), curr_month_year, AVERAGE_SETTINGS['window'])
+        elif AVERAGE_SETTINGS['source'] == 'matrix':
+            avg_df = history_matrix.open_for_folder(folder2_path).averages_for(curr_month_year, AVERAGE_SETTINGS['window'])
+        else:
+            avg_df = _average_store(folder2_path).averages_for(curr_month_year)
+        record.rows_out = len(avg_df)
+    return avg_df
+
+def record_month_history(final_df, folder2_path, curr_month_year):
+    """
+    Writes a newly generated month into the rollover history database and the memory-mapped
+    history matrix and, with the 'store' source, into the rolling average store, so the next
+    month's averages and z-scores need no file reads.
+    """
+    with stage('history', rows_in=len(final_df)):
+        # The month's CSV was just written, so the stores are not refreshed from it first
+        history_db.write_month(history_db.open_for_folder(folder2_path, refresh_months=False), curr_month_year, final_df)
+        history_matrix.open_for_folder(folder2_path, refresh_months=False).write_month(curr_month_year, final_df)
+        if AVERAGE_SETTINGS['source'] == 'store':
+            _average_store(folder2_path).update(curr_month_year, final_df)
 
-    # Define paths
-    folder1_path = Path(folder1)
-    folder2_path = Path(folder2)
-    file1_path = Path(file1_path)
-    file2_path = Path(file2_path)
-    file3_path = Path(file3_path)
-    file4_path = Path(file4_path)
-    file5_path = file5_path_prev
-    if file5_path_prev != "":
-        file5_path = Path(file5_path_prev)
+# --- Historical Z-Scores and Percentiles ---
 
-    if not folder1_path.exists():
-        folder1_path.mkdir(parents=True, exist_ok=True)
-        print(f"Created output folder: {folder1}")
+HISTORY_STATS_SETTINGS = {
+    'enabled': False,
+}
 
-    if not folder2_path.exists():
-        folder2_path.mkdir(parents=True, exist_ok=True)
-        print(f"Created output folder: {folder2}")
+def configure_history_stats(enabled=False):
+    """
+    Turns the z-score and percentile columns on or off (e.g. from the --history-stats switch).
+    """
+    HISTORY_STATS_SETTINGS['enabled'] = enabled
+
+def add_history_stats(final_df, folder2_path, curr_month_year):
+    """
+    With --history-stats, adds the z-score and percentile rank of Rollover%, Rollover cost
+    and Basis against each symbol's full history before curr_month_year (HISTORY_STAT_COLUMNS).
+    """
+    if not HISTORY_STATS_SETTINGS['enabled']:
+        return final_df
+    with stage('history stats', rows_in=len(final_df)) as record:
+        stats = history_stats(history_matrix.open_for_folder(folder2_path), month_index(curr_month_year), final_df)
+        final_df[HISTORY_STAT_COLUMNS] = stats.round(2)
+        record.rows_out = len(final_df)
+    return final_df
+
+def report_columns(final_df):
+    """
+    The columns written to the CSV and Excel reports: REPORT_COLUMNS plus the history stat
+    columns when they were added.
+    """
+    return REPORT_COLUMNS + [column for column in HISTORY_STAT_COLUMNS if column in final_df.columns]
+
+# --- Futures Rollover Engine ---
+
+# Stock futures (FUTSTK) and index futures (FUTIDX) contracts, parsed in the same pass.
+INSTRUMENTS = ['FUTSTK', 'FUTIDX']
+CONTRACT_PATTERN = r'^(FUTSTK|FUTIDX)([A-Z0-9]+)(\d{2}-[A-Z]{3}-\d{4})$'
+
+def parse_contract_details_vectorized(contract_series):
+    """
+    Vectorized version of parse_contract_details that also accepts index futures.
+
+    Extracts the Instrument (FUTSTK or FUTIDX), Symbol and Contract Date for every CONTRACT_D
+    value with a single str.extract and a single to_datetime call. Rows that do not match the
+    FUT<STK|IDX><SYMBOL><DD-MMM-YYYY> format (or whose date cannot be parsed) get NaN/NaT.
+    """
+    parts = contract_series.str.extract(CONTRACT_PATTERN)
+    return pd.DataFrame({
+        'Instrument': parts[0],
+        'Symbol': parts[1],
+        'Contract Date': pd.to_datetime(parts[2], format='%d-%b-%Y', errors='coerce'),
+    }, index=contract_series.index)
+
+def contract_details(futures_df):
+    """
+    The Instrument, Symbol and Contract Date of every row of a futures frame: the columns
+    the Arrow ingest pre-parsed, else parse_contract_details_vectorized of CONTRACT_D.
+    """
+    if 'Contract Date' in futures_df.columns:
+        return futures_df[['Instrument', 'Symbol', 'Contract Date']]
+    return parse_contract_details_vectorized(futures_df['CONTRACT_D'])
+
+def calculate_futures_rollover(futures_df):
+    """
+    Computes the per-symbol futures columns (Future Price, Rollover%, the rollover cost
+    numerator, the current month close and the Total OI of the first three contracts) of
+    stock and index futures as whole-array expressions.
+
+    Contracts are ranked per instrument and symbol with groupby().cumcount() and pivoted into
+    current / next / next-to-next columns, so no per-symbol Python loop is needed.
+
+    Returns:
+        A tuple (final_df indexed by Symbol with an Instrument column,
+        {stock symbol: current month name in MmmYYYY}).
+    """
+    with stage('parse contracts', rows_in=len(futures_df)) as record:
+        if 'Contract Date' not in futures_df.columns:
+            futures_df[['Instrument', 'Symbol', 'Contract Date']] = parse_contract_details_vectorized(futures_df['CONTRACT_D'])
+
+        unparsed = futures_df['Symbol'].isna() | futures_df['Contract Date'].isna()
+        if unparsed.any():
+            print(f"Warning: Skipped {int(unparsed.sum())} contract rows that do not match the FUT<STK|IDX><SYMBOL><DD-MMM-YYYY> format.")
 
-    try:
-        # 1. Read Futures Data (file1)
-        print(f"Reading futures data from {file1_path.name}...")
-        futures_df = pd.read_csv(file1_path, skipinitialspace=True)
-        
-        # Apply the parsing function and create new columns
-        futures_df[['Symbol', 'Contract Date']] = futures_df['CONTRACT_D'].apply(
-            lambda x: pd.Series(parse_contract_details(x))
-        )
-        
         futures_df.dropna(subset=['Symbol', 'Contract Date'], inplace=True)
-        
-        # Identify the month order (Current, Next, Next-to-Next) based on Contract Date
-        futures_df.sort_values(['Symbol', 'Contract Date'], inplace=True)
-        
-        # The first date for any Symbol is the current month contract date
-        current_month_dates = futures_df.groupby('Symbol')['Contract Date'].first()
-        current_month_names = {
-            symbol: date.strftime('%b%Y') 
-            for symbol, date in current_month_dates.items()
-        }
-        
-        # Use the most frequent current month name for the output filename
-        if not current_month_names:
-            print("Error: No valid symbols found in futures data.")
-            return
-            
-        current_month_name = max(set(current_month_names.values()), key=list(current_month_names.values()).count)
-        output_filename = f"{current_month_name}_Rollover_Data.csv"
-        output_filename_2 = f"{current_month_name}_Rollover_Data.xlsx"
+        record.rows_out = len(futures_df)
 
-        # --- Futures Calculation Logic ---
-        
-        # Group by Symbol to perform calculations on the 3-row blocks
-        grouped_futures = futures_df.groupby('Symbol')
-        
-        rollover_results = []
-        
-        for symbol, group in grouped_futures:
-            # Check if we have at least 2 contracts (current and next)
-            if len(group) < 2:
-                print(f"Skipping {symbol}: Less than 2 contract months available.")
-                continue
+    with stage('rollover calc', rows_in=len(futures_df)) as record:
+        final_df, current_month_names = _rollover_columns(futures_df)
+        record.rows_out = len(final_df)
+    return final_df, current_month_names
 
-            # Assuming the sorted group order is: Current, Next, Next-to-Next
-            curr = group.iloc[0]
-            next_m = group.iloc[1]
-            
-            # Use next-to-next only if it exists
-            next_to_next_m = group.iloc[2] if len(group) > 2 else None
+def _rollover_columns(futures_df):
+    """
+    The ranking and pivot half of calculate_futures_rollover, on already parsed contracts.
+    """
+    # Identify the month order (Current, Next, Next-to-Next) based on Contract Date
+    futures_df.sort_values(['Instrument', 'Symbol', 'Contract Date'], inplace=True)
+    futures_df['Rank'] = futures_df.groupby(['Instrument', 'Symbol']).cumcount()
+
+    # The first date for any Symbol is the current month contract date
+    current_month_dates = futures_df.loc[(futures_df['Rank'] == 0) & (futures_df['Instrument'] == 'FUTSTK')].set_index('Symbol')['Contract Date']
+    current_month_names = dict(zip(current_month_dates.index, current_month_dates.dt.strftime('%b%Y')))
+
+    # One row per instrument and symbol with the close price and open interest of the first three contracts
+    pivot = futures_df[futures_df['Rank'] < 3].pivot(index=['Instrument', 'Symbol'], columns='Rank', values=['CLOSE_PRIC', 'OI_NO_CON'])
+
+    # Check if we have at least 2 contracts (current and next)
+    has_next = pivot[('CLOSE_PRIC', 1)].notna() if ('CLOSE_PRIC', 1) in pivot.columns else pd.Series(False, index=pivot.index)
+    if not has_next.all():
+        skipped = [symbol for _, symbol in pivot.index[~has_next]]
+        print(f"Skipping {len(skipped)} symbols with less than 2 contract months available: {', '.join(skipped)}")
+    pivot = pivot[has_next]
+
+    if pivot.empty:
+        return pd.DataFrame(columns=['Future Price', 'Rollover%', 'Temp Rollover Cost Num', 'Curr Month Close', 'Total OI', 'Rolled OI', 'Instrument']), current_month_names
+
+    curr_close = pivot[('CLOSE_PRIC', 0)]
+    next_close = pivot[('CLOSE_PRIC', 1)]
+    curr_oi = pivot[('OI_NO_CON', 0)]
+    next_oi = pivot[('OI_NO_CON', 1)]
+    # Use next-to-next only if it exists
+    if ('OI_NO_CON', 2) in pivot.columns:
+        next_to_next_oi = pivot[('OI_NO_CON', 2)].fillna(0)
+    else:
+        next_to_next_oi = pd.Series(0.0, index=pivot.index)
+
+    total_oi = curr_oi + next_oi + next_to_next_oi
+    rollover_pct = ((next_oi + next_to_next_oi) / total_oi * 100).where(total_oi != 0, 0.0)
+
+    final_df = pd.DataFrame({
+        'Future Price': next_close,
+        'Rollover%': rollover_pct,
+        'Temp Rollover Cost Num': next_close - curr_close,
+        'Curr Month Close': curr_close, # Used for M_o_M%
+        'Total OI': total_oi, # Weight of the sector summary
+        'Rolled OI': next_oi + next_to_next_oi, # Rolled-over part of Total OI, for the sector Rollover%
+    })
+    final_df.columns.name = None
+    final_df['Instrument'] = final_df.index.get_level_values('Instrument')
+    final_df.index = final_df.index.get_level_values('Symbol')
+    return final_df, current_month_names
 
-            # 1. Future Price (Next Month's Close Price)
-            future_price = next_m['CLOSE_PRIC']
+def calculate_futures_rollover_loop(futures_df):
+    """
+    Reference implementation of calculate_futures_rollover using a per-row apply and a
+    per-symbol loop. Kept for tests/test_generate_files.py and benchmarks/benchmark_rollover.py
+    to check that both paths agree.
+    """
+    futures_df[['Symbol', 'Contract Date']] = futures_df['CONTRACT_D'].apply(
+        lambda x: pd.Series(parse_contract_details(x))
+    )
 
-            # 2. Spot (Will be merged later from file2) - Placeholder for now
-            # Spot calculation will be done after merging file2 data
-            
-            # 3. Rollover Cost
-            # Formula: (Next Month CLOSE_PRIC - Curr Month CLOSE_PRIC) / (Current Month Spot) * 100
-            # Since Spot is unknown here, we use the Current Month CLOSE_PRIC as a temporary stand-in
-            # and will correct the division denominator after merging Spot.
-            temp_rollover_cost_numerator = next_m['CLOSE_PRIC'] - curr['CLOSE_PRIC']
-            
-            # 4. Rollover %
-            curr_oi = curr['OI_NO_CON']
-            next_oi = next_m['OI_NO_CON']
-            next_to_next_oi = next_to_next_m['OI_NO_CON'] if next_to_next_m is not None else 0
-            
-            if (curr_oi + next_oi + next_to_next_oi) == 0:
-                rollover_pct = 0.0
-            else:
-                rollover_pct = (next_oi + next_to_next_oi) / (curr_oi + next_oi + next_to_next_oi) * 100
-            
-            rollover_results.append({
-                'Symbol': symbol,
-                'Future Price': future_price,
-                'Rollover%': rollover_pct,
-                'Temp Rollover Cost Num': temp_rollover_cost_numerator,
-                'Curr Month Close': curr['CLOSE_PRIC'], # Used for M_o_M%
-            })
-            
-        if not rollover_results:
-            print("Error: No valid rollover calculations could be performed.")
-            return
+    futures_df.dropna(subset=['Symbol', 'Contract Date'], inplace=True)
+
+    # Identify the month order (Current, Next, Next-to-Next) based on Contract Date
+    futures_df.sort_values(['Symbol', 'Contract Date'], inplace=True)
+
+    # The first date for any Symbol is the current month contract date
+    current_month_dates = futures_df.groupby('Symbol')['Contract Date'].first()
+    current_month_names = {
+        symbol: date.strftime('%b%Y')
+        for symbol, date in current_month_dates.items()
+    }
+
+    # Group by Symbol to perform calculations on the 3-row blocks
+    grouped_futures = futures_df.groupby('Symbol')
+
+    rollover_results = []
+
+    for symbol, group in grouped_futures:
+        # Check if we have at least 2 contracts (current and next)
+        if len(group) < 2:
+            print(f"Skipping {symbol}: Less than 2 contract months available.")
+            continue
+
+        # Assuming the sorted group order is: Current, Next, Next-to-Next
+        curr = group.iloc[0]
+        next_m = group.iloc[1]
+
+        # Use next-to-next only if it exists
+        next_to_next_m = group.iloc[2] if len(group) > 2 else None
+
+        # 1. Future Price (Next Month's Close Price)
+        future_price = next_m['CLOSE_PRIC']
+
+        # 3. Rollover Cost numerator, divided by the Spot once file2 is merged
+        temp_rollover_cost_numerator = next_m['CLOSE_PRIC'] - curr['CLOSE_PRIC']
+
+        # 4. Rollover %
+        curr_oi = curr['OI_NO_CON']
+        next_oi = next_m['OI_NO_CON']
+        next_to_next_oi = next_to_next_m['OI_NO_CON'] if next_to_next_m is not None else 0
+
+        if (curr_oi + next_oi + next_to_next_oi) == 0:
+            rollover_pct = 0.0
+        else:
+            rollover_pct = (next_oi + next_to_next_oi) / (curr_oi + next_oi + next_to_next_oi) * 100
+
+        rollover_results.append({
+            'Symbol': symbol,
+            'Future Price': future_price,
+            'Rollover%': rollover_pct,
+            'Temp Rollover Cost Num': temp_rollover_cost_numerator,
+            'Curr Month Close': curr['CLOSE_PRIC'], # Used for M_o_M%
+            'Total OI': float(curr_oi + next_oi + next_to_next_oi), # Weight of the sector summary
+            'Rolled OI': float(next_oi + next_to_next_oi), # Rolled-over part of Total OI, for the sector Rollover%
+        })
+
+    if not rollover_results:
+        return pd.DataFrame(columns=['Future Price', 'Rollover%', 'Temp Rollover Cost Num', 'Curr Month Close', 'Total OI', 'Rolled OI']), current_month_names
+
+    return pd.DataFrame(rollover_results).set_index('Symbol'), current_month_names
+
+# --- Main Logic ---
+
+def load_futures(file1_path):
+    """
+    Reads the futures bhavcopy (file1), with the pandas reader or the Arrow ingest
+    (see arrow_ingest.py and --ingest).
+    """
+    print(f"Reading futures data from {Path(file1_path).name}...")
+    with stage('read futures') as record:
+        if INGEST_SETTINGS['engine'] == 'arrow':
+            float32 = INGEST_SETTINGS['float32']
+            futures_df = load_cached(file1_path, lambda p: read_futures_arrow(p, float32), reader='futures_arrow', float32=float32)
+        else:
+            futures_df = read_csv_cached(file1_path, skipinitialspace=True)
+        record.rows_out = len(futures_df)
+    return futures_df
+
+# Rows per chunk when streaming an equity bhavcopy
+SPOT_CHUNK_ROWS = 50000
+
+def futures_symbols(futures_df):
+    """
+    Returns the set of FUTSTK symbols in a futures bhavcopy (the F&O universe of the month).
+    FUTIDX symbols are left out: index closes come from the ind_close_all files, not the
+    equity bhavcopy.
+    """
+    details = contract_details(futures_df)
+    return set(details.loc[details['Instrument'] == 'FUTSTK', 'Symbol'].dropna())
+
+def read_spot_filtered(file_path, symbols=None, chunk_rows=SPOT_CHUNK_ROWS):
+    """
+    Streams an equity bhavcopy (plain or compressed) in chunks of chunk_rows and keeps only the EQ series rows,
+    restricted to `symbols` when given. Peak memory depends on the chunk size and the
+    number of kept rows, not on the size of the exchange-wide file.
+
+    Returns:
+        A DataFrame with the SYMBOL and CLOSE_PRICE columns of the kept rows, in file order.
+    """
+    kept = []
+    with input_source(file_path) as source:
+        reader = pd.read_csv(source, usecols=['SYMBOL', 'SERIES', 'CLOSE_PRICE'], skipinitialspace=True, chunksize=chunk_rows)
+        for chunk in reader:
+            mask = chunk['SERIES'] == 'EQ'
+            if symbols is not None:
+                mask &= chunk['SYMBOL'].isin(symbols)
+            kept.append(chunk.loc[mask, ['SYMBOL', 'CLOSE_PRICE']])
+
+    if not kept:
+        return pd.DataFrame(columns=['SYMBOL', 'CLOSE_PRICE'])
+    return pd.concat(kept, ignore_index=True)
+
+def load_spot(file_path, column_name, symbols=None):
+    """
+    Reads the SYMBOL and CLOSE_PRICE columns of the EQ series rows of an equity bhavcopy,
+    with CLOSE_PRICE renamed to column_name (Spot, PrevMonthSpot or NextMonthSpot).
+    With symbols (usually the month's F&O universe), only those symbols are kept.
+    """
+    print(f"Reading spot data from {Path(file_path).name}...")
+    symbols = None if symbols is None else set(symbols)
+    with stage('read spot') as record:
+        if INGEST_SETTINGS['engine'] == 'arrow':
+            float32 = INGEST_SETTINGS['float32']
+            loader, reader = (lambda p: read_spot_arrow(p, symbols, float32)), 'spot_eq_arrow'
+        else:
+            float32 = False
+            loader, reader = (lambda p: read_spot_filtered(p, symbols)), 'spot_eq'
+        spot_df = load_cached(
+            file_path,
+            loader,
+            reader=reader,
+            float32=float32,
+            symbols=None if symbols is None else sorted(symbols),
+        )
+        record.rows_out = len(spot_df)
+    return spot_df.rename(columns={'CLOSE_PRICE': column_name})
+
+# Index names in the ind_close_all files and the symbol of their FUTIDX contracts
+INDEX_FUTURE_SYMBOLS = {
+    'Nifty 50': 'NIFTY',
+    'Nifty Bank': 'BANKNIFTY',
+    'Nifty Financial Services': 'FINNIFTY',
+    'Nifty Midcap Select': 'MIDCPNIFTY',
+    'Nifty Next 50': 'NIFTYNXT50',
+}
+
+def load_index_closes(file_path, column_name):
+    """
+    Reads the closing values of the indices with futures from an ind_close_all file,
+    as a Series named column_name indexed by the FUTIDX symbol.
+    Returns None when file_path is "" (no index close file for that date).
+    """
+    if file_path == "":
+        return None
+    print(f"Reading index closes from {Path(file_path).name}...")
+    index_df = read_csv_cached(file_path, usecols=['Index Name', 'Closing Index Value'], skipinitialspace=True)
+    index_df['Symbol'] = index_df['Index Name'].map(INDEX_FUTURE_SYMBOLS)
+    index_df = index_df.dropna(subset=['Symbol']).drop_duplicates(subset=['Symbol'])
+    return index_df.set_index('Symbol')['Closing Index Value'].rename(column_name)
+
+def load_symbol_master(file4_path, futures_inputs, master=None):
+    """
+    Opens the symbol master and brings it up to date with the sectoral index mapping (file4)
+    and the given [(futures file path, futures_df), ...]. Only a changed index file or a
+    futures file the master has not recorded yet is parsed. An already open master
+    (e.g. the one watch mode keeps in memory) is updated instead of reading the file again.
+    """
+    with stage('symbol master') as record:
+        if master is None:
+            master = SymbolMaster.open()
+        changed = master.update_from_index(file4_path)
+        for fo_path, futures_df in futures_inputs:
+            if not master.knows_futures_file(fo_path):
+                master.update_from_futures(fo_path, futures_df, contract_details(futures_df))
+                changed = True
+        if changed:
+            master.save()
+        record.rows_out = len(master.symbols)
+    return master
+
+# Threads reading the inputs of a single-month report (futures, three spot files, two index close files)
+INPUT_THREADS = 6
+
+def _timed_load(loader, *args):
+    start = time.perf_counter()
+    result = loader(*args)
+    return result, time.perf_counter() - start
+
+def load_report_inputs(file1_path, file2_path, file3_path, file4_path, file5_path, index_close_path="", prev_index_close_path=""):
+    """
+    Reads the inputs of one month on a thread pool (pandas' CSV parser releases the GIL for
+    most of a read) and prints how long each read took.
+
+    The spot files are filtered to the month's F&O symbols. If the symbol master already
+    recorded the futures file, those symbols are known before any file is read and every
+    read starts at once; otherwise the spot files keep all EQ rows (the spot joins drop the
+    symbols without futures either way). While the spot reads run, the symbol master is
+    updated and the futures rollover is calculated on the main thread. (With --profile, these
+    overlapping stages are timed inside one 'read inputs' stage, which alone records the
+    peak memory.)
+
+    Returns:
+        The arguments of build_rollover_frame: (futures_df, spot_df, prev_spot_df, next_spot_df,
+        master, index_close, prev_index_close, futures rollover).
+    """
+    start = time.perf_counter()
+    master = SymbolMaster.open()
+    symbols = master.futures_universe(file1_path) if master.knows_futures_file(file1_path) else None
+
+    with concurrent_stage('read inputs'), ThreadPoolExecutor(max_workers=INPUT_THREADS) as pool:
+        jobs = {'futures': (file1_path, pool.submit(_timed_load, load_futures, file1_path))}
+        for label, file_path, column_name in (('spot', file2_path, 'Spot'), ('prev spot', file3_path, 'PrevMonthSpot'),
+                                              ('next spot', file5_path, 'NextMonthSpot')):
+            if file_path != "":
+                jobs[label] = (file_path, pool.submit(_timed_load, load_spot, file_path, column_name, symbols))
+        for label, file_path, column_name in (('index close', index_close_path, 'Spot'),
+                                              ('prev index close', prev_index_close_path, 'PrevMonthSpot')):
+            if file_path != "":
+                jobs[label] = (file_path, pool.submit(_timed_load, load_index_closes, file_path, column_name))
+
+        futures_df = jobs['futures'][1].result()[0]
+        master = load_symbol_master(file4_path, [(file1_path, futures_df)], master)
+        futures_rollover = calculate_futures_rollover(futures_df)
+
+        loaded = {label: job.result() for label, (_, job) in jobs.items()}
+
+    print(f"\nRead {len(jobs)} inputs in {time.perf_counter() - start:.2f}s:")
+    for label, (file_path, _) in jobs.items():
+        print(f"  {label:<17}{Path(file_path).name:<36}{loaded[label][1]:>7.3f}s")
+
+    def frame(label):
+        return loaded[label][0] if label in loaded else None
+
+    return (futures_df, frame('spot'), frame('prev spot'), frame('next spot'), master,
+            frame('index close'), frame('prev index close'), futures_rollover)
+
+def build_rollover_frame(futures_df, spot_df, prev_spot_df, next_spot_df, master, index_close=None, prev_index_close=None,
+                         futures_rollover=None):
+    """
+    Computes everything that depends only on the month's own inputs: the futures columns,
+    the spot joins, the sector lookup, Basis, Rollover cost, M_o_M% and Next_M_o_M%.
+    The joins run on the integer ids of the symbol master (see load_symbol_master).
+
+    Index futures come out of the same rollover pass and are finished by build_index_rollover_frame.
+
+    next_spot_df may be None when the next expiry's spot file does not exist yet, and
+    index_close / prev_index_close (from load_index_closes) when there is no index close file.
+    futures_rollover is the calculate_futures_rollover(futures_df) result when the caller
+    already computed it (e.g. while the spot files were still being read).
+
+    Returns:
+        A tuple (final_df with Symbol ID and Symbol columns, index_df, current month name,
+        {symbol: current month name}), or None if no rollover could be calculated.
+    """
+    # Parse contracts, rank them per symbol and compute the rollover columns of both instruments
+    if futures_rollover is None:
+        futures_rollover = calculate_futures_rollover(futures_df)
+    futures_rollover_df, current_month_names = futures_rollover
+    is_index = futures_rollover_df['Instrument'] == 'FUTIDX'
+    with stage('index futures', rows_in=int(is_index.sum())) as record:
+        index_df = build_index_rollover_frame(futures_rollover_df[is_index].drop(columns=['Instrument']), index_close, prev_index_close)
+        record.rows_out = len(index_df)
+    final_df = futures_rollover_df[~is_index].drop(columns=['Instrument'])
+
+    # Use the most frequent current month name for the output filename
+    if not current_month_names:
+        print("Error: No valid symbols found in futures data.")
+        return None
+
+    current_month_name = max(set(current_month_names.values()), key=list(current_month_names.values()).count)
+
+    if final_df.empty:
+        print("Error: No valid rollover calculations could be performed.")
+        return None
+
+    print("Futures calculations completed.")
+
+    with stage('spot joins', rows_in=len(final_df)) as record:
+        # Join on the symbol ids of the master instead of building string indexes
+        final_df.index = pd.Index(master.ids(final_df.index), name='Symbol ID')
+
+        def by_symbol_id(df):
+            # Keep only the spot rows of symbols that have futures
+            ids = master.ids(df['SYMBOL'])
+            keep = np.isin(ids, final_df.index)
+            return df.loc[keep].drop(columns=['SYMBOL']).set_axis(pd.Index(ids[keep], name='Symbol ID'))
+
+        spot_df = by_symbol_id(spot_df)
+        prev_spot_df = by_symbol_id(prev_spot_df)
+        if next_spot_df is not None:
+            next_spot_df = by_symbol_id(next_spot_df)
 
-        final_df = pd.DataFrame(rollover_results).set_index('Symbol')
-        
-        print("Futures calculations completed.")
-
-        # 2. Read Spot Data (file2)
-        print(f"Reading spot data from {file2_path.name}...")
-        spot_df = pd.read_csv(file2_path, usecols=['SYMBOL', 'CLOSE_PRICE'], skipinitialspace=True)
-        spot_df.rename(columns={'CLOSE_PRICE': 'Spot'}, inplace=True)
-        spot_df = spot_df[spot_df['SYMBOL'].isin(final_df.index)].set_index('SYMBOL')
-
-        print(f"Reading prev month spot data from {file3_path.name}...")
-        prev_spot_df = pd.read_csv(file3_path, usecols=['SYMBOL', 'CLOSE_PRICE'], skipinitialspace=True)
-        prev_spot_df.rename(columns={'CLOSE_PRICE': 'PrevMonthSpot'}, inplace=True)
-        prev_spot_df = prev_spot_df[prev_spot_df['SYMBOL'].isin(final_df.index)].set_index('SYMBOL')
-
-        print(f"Reading next month spot data from {file5_path}...")
-        if file5_path != "":
-            next_spot_df = pd.read_csv(file5_path, usecols=['SYMBOL', 'CLOSE_PRICE'], skipinitialspace=True)
-            next_spot_df.rename(columns={'CLOSE_PRICE': 'NextMonthSpot'}, inplace=True)
-            next_spot_df = next_spot_df[next_spot_df['SYMBOL'].isin(final_df.index)].set_index('SYMBOL')
-
-        print("EHY")
         # Merge spot data into the final results
         final_df = final_df.join(spot_df, how='inner')
         final_df = final_df.join(prev_spot_df, how='inner')
-        if file5_path != "":
+        if next_spot_df is not None:
             final_df = final_df.join(next_spot_df, how='inner')
+        record.rows_out = len(final_df)
 
-        print("EHY")
+    logger.debug("After the spot joins:\n%s", final_df)
 
-        # --- File 4: Sectoral Index Merge (Updated to use left join) ---
-        print(f"Reading sectoral index data from {file4_path.name}...")
+    # --- File 4: Sectoral Index Lookup ---
 
-        # Note: We assume the column name for Sectoral Index in file4 is exactly 'sectoral index'
-        sector_df = pd.read_csv(file4_path, usecols=['Sectoral Index', 'Symbol'], skipinitialspace=True)
-        sector_df.drop_duplicates(subset=['Symbol'], inplace=True) # Ensure unique symbol for merging
+    with stage('sector join', rows_in=len(final_df)) as record:
+        # Symbols that are not in index.csv get NaN (blank), like the old left join.
+        final_df['Sectoral Index'] = master.sectors(final_df.index)
 
-        # Set Symbol as index for joining with final_df
-        sector_df.set_index('Symbol', inplace=True)
+        final_df.reset_index(inplace=True) # Symbol ID is now a column
+        final_df.insert(1, 'Symbol', master.names(final_df['Symbol ID']))
+        record.rows_out = len(final_df)
 
-        # Perform the merge. Use how='left' to keep all symbols from final_df
-        # and fill 'sectoral index' with NaN (blank) if not found in file4.
-        final_df = final_df.join(sector_df, how='left')
+    # --- Final Calculations requiring Spot Price ---
 
-        final_df.reset_index(inplace=True) # Symbol is now a column
+    # 5. Basis and 6. Rollover Cost
+    calculate_basis_and_cost(final_df)
 
-        # --- Final Calculations requiring Spot Price ---
-        
-        # 5. Basis (Current month row)
-        # Formula: Future Price (next month close) - Spot (file2 close)
-        final_df['Basis'] = final_df['Future Price'] - final_df['Spot']
-        
-        # 6. Rollover Cost (Corrected)
-        # Formula: (Next Month CLOSE_PRIC - Curr Month CLOSE_PRIC) / (Current Month Spot) * 100
-        final_df['Rollover cost'] = (final_df['Temp Rollover Cost Num'] / final_df['Spot']) * 100
-        final_df.drop(columns=['Temp Rollover Cost Num'], inplace=True)
+    # 7. M_o_M%
+    # Formula: (CLOSE_PRICE in file2 (Spot) - CLOSE_PRIC in file3 (Prev Month Close)) / (CLOSE_PRIC in file3 (Prev Month Close)) * 100
+    final_df['M_o_M%'] = (final_df['Spot'] - final_df['PrevMonthSpot']) / final_df['PrevMonthSpot'] * 100
+    final_df.drop(columns=['Curr Month Close', 'PrevMonthSpot'], inplace=True)
+    final_df['Next_M_o_M%'] = 0
+    if next_spot_df is not None:
+        final_df['Next_M_o_M%'] = (final_df['NextMonthSpot'] - final_df['Spot']) / final_df['Spot'] * 100
+        final_df.drop(columns=['NextMonthSpot'], inplace=True)
 
-        # 7. M_o_M%
-        # Formula: (CLOSE_PRICE in file2 (Spot) - CLOSE_PRIC in file3 (Prev Month Close)) / (CLOSE_PRIC in file3 (Prev Month Close)) * 100
-        final_df['M_o_M%'] = (final_df['Spot'] - final_df['PrevMonthSpot']) / final_df['PrevMonthSpot'] * 100
-        final_df.drop(columns=['Curr Month Close', 'PrevMonthSpot'], inplace=True)
-        final_df['Next_M_o_M%'] = 0
-        if file5_path != "":
-            final_df['Next_M_o_M%'] = (final_df['NextMonthSpot'] - final_df['Spot']) / final_df['Spot'] * 100
-            final_df.drop(columns=['NextMonthSpot'], inplace=True)
+    return final_df, index_df, current_month_name, current_month_names
 
+# Columns of the index futures CSV report, in order
+INDEX_REPORT_COLUMNS = ['Symbol', 'Spot', 'Future Price', 'Basis', 'Rollover%', 'Rollover cost', 'M_o_M%']
 
-        # 3. Read Historical Averages
-        print(f"Calculating 6-month historical averages from {folder1}...")
-        print(f"current month names {current_month_names}")
-        avg_df = calculate_averages(folder2_path, current_month_names, current_month_name)
-
-        # Set Symbol as index for joining with final_df
-        print(avg_df)
-        avg_df.set_index('Symbol', inplace=True)
-        final_df = final_df.rename(columns={'index': 'Symbol'})
-        final_df.set_index('Symbol', inplace=True)
-        print(avg_df)
-        print(final_df)
-        # Merge averages into the final results
-        final_df = final_df.join(avg_df, how='left').fillna(0)
-        print(final_df)
-        print("DONE")
-        # --- Difference Calculations ---
-
-        # 8. Diff Rollover%
-        final_df['Diff Rollover%'] = final_df['Rollover%'] - final_df['Avg. Roll Over']
-
-        # 9. Diff Rollover Cost
-        final_df['Diff Rollover Cost'] = final_df['Rollover cost'] - final_df['Avg. Rollover Cost']
-
-        # 10. Sort the final data: first by sectoral index, then by symbol
-        final_df.sort_values(by=['Sectoral Index', 'Symbol'], inplace=True)
-
-        # List of columns to be rounded
-        rounding_cols = [
-            'Spot', 'M_o_M%', 'Next_M_o_M%', 'Future Price', 'Basis', 'Rollover%',
-            'Avg. Roll Over', 'Rollover cost', 'Avg. Rollover Cost',
-            'Diff Rollover%', 'Diff Rollover Cost'
-        ]
-
-        # Round the numerical columns to 2 decimal places
-        final_df[rounding_cols] = final_df[rounding_cols].round(2)
-
-        # --- Final Output ---
-
-        # Reorder and rename columns to match the requested output
-        final_df.reset_index(inplace=True)
-        
-        print(final_df)
-        output_columns = [
-            'Sectoral Index', 'Symbol', 'Spot', 'Future Price', 'Basis', 'Rollover%',
-            'Avg. Roll Over', 'Rollover cost', 'Avg. Rollover Cost', 
-            'Diff Rollover%', 'Diff Rollover Cost', 'M_o_M%', 'Next_M_o_M%'
-        ]
-
-        print("DONE2")
-        final_df = final_df[output_columns]
-        print("DONE3")
-
-        output_path = folder2_path / output_filename
-        final_df.to_csv(output_path, index=False, float_format='%.2f')
-        print(f"\nSuccessfully generated report: {output_filename}")
-        print(f"Output saved to: {output_path.resolve()}")
-
-        output_path_2 = folder1_path / output_filename_2
-        # Create a Pandas ExcelWriter object using the xlsxwriter engine
+def build_index_rollover_frame(index_futures_df, index_close=None, prev_index_close=None):
+    """
+    Finishes the FUTIDX rows of calculate_futures_rollover: the index close is the Spot for
+    Basis and Rollover cost, and the previous expiry's close gives M_o_M%. Without an index
+    close file those columns stay blank and only Future Price and Rollover% are filled.
+
+    Returns:
+        The rounded index report rows, sorted by Symbol, in INDEX_REPORT_COLUMNS order.
+    """
+    index_df = index_futures_df.copy()
+    index_df['Spot'] = index_close.reindex(index_df.index) if index_close is not None else np.nan
+    prev_close = prev_index_close.reindex(index_df.index) if prev_index_close is not None else np.nan
+
+    calculate_basis_and_cost(index_df)
+    index_df['M_o_M%'] = (index_df['Spot'] - prev_close) / prev_close * 100
+
+    index_df = index_df.rename_axis('Symbol').reset_index().sort_values('Symbol', ignore_index=True)
+    index_df[INDEX_REPORT_COLUMNS[1:]] = index_df[INDEX_REPORT_COLUMNS[1:]].astype(float).round(2)
+    return index_df[INDEX_REPORT_COLUMNS]
+
+def calculate_basis_and_cost(final_df):
+    """
+    Adds the Basis and Rollover cost columns to a frame holding the futures columns and Spot,
+    and drops the rollover cost numerator.
+    """
+    # 5. Basis (Current month row)
+    # Formula: Future Price (next month close) - Spot (file2 close)
+    final_df['Basis'] = final_df['Future Price'] - final_df['Spot']
+
+    # 6. Rollover Cost (Corrected)
+    # Formula: (Next Month CLOSE_PRIC - Curr Month CLOSE_PRIC) / (Current Month Spot) * 100
+    final_df['Rollover cost'] = (final_df['Temp Rollover Cost Num'] / final_df['Spot']) * 100
+    final_df.drop(columns=['Temp Rollover Cost Num'], inplace=True)
+    return final_df
+
+# Columns of the CSV report and of every Excel sheet, in order
+REPORT_COLUMNS = [
+    'Sectoral Index', 'Symbol', 'Spot', 'Future Price', 'Basis', 'Rollover%',
+    'Avg. Roll Over', 'Rollover cost', 'Avg. Rollover Cost',
+    'Diff Rollover%', 'Diff Rollover Cost', 'M_o_M%', 'Next_M_o_M%'
+]
+
+def finalize_rollover_frame(final_df, avg_df, master):
+    """
+    Joins the historical averages, computes the difference columns, sorts, rounds
+    and reorders final_df into the output layout, plus the Symbol ID, Total OI, Rolled OI
+    and categorical Signal columns.
+    """
+    with stage('finalize', rows_in=len(final_df)) as record:
+        final_df = _finalize_rollover_frame(final_df, avg_df, master)
+        record.rows_out = len(final_df)
+    return final_df
+
+def _finalize_rollover_frame(final_df, avg_df, master):
+    # Index the averages by symbol id for joining with final_df. Symbols the master has
+    # never seen cannot be in final_df, so they are dropped.
+    avg_ids = master.ids(avg_df['Symbol'])
+    avg_df = avg_df.loc[avg_ids >= 0].drop(columns=['Symbol']).set_axis(pd.Index(avg_ids[avg_ids >= 0], name='Symbol ID'))
+    final_df = final_df.set_index('Symbol ID')
+    logger.debug("Averages by symbol id:\n%s", avg_df)
+    # Merge averages into the final results
+    final_df = final_df.join(avg_df, how='left').fillna(0)
+    logger.debug("After the averages join:\n%s", final_df)
+    # --- Difference Calculations ---
+
+    # 8. Diff Rollover%
+    final_df['Diff Rollover%'] = final_df['Rollover%'] - final_df['Avg. Roll Over']
+
+    # 9. Diff Rollover Cost
+    final_df['Diff Rollover Cost'] = final_df['Rollover cost'] - final_df['Avg. Rollover Cost']
+
+    # 10. Sort the final data: first by sectoral index, then by symbol
+    final_df.sort_values(by=['Sectoral Index', 'Symbol'], inplace=True)
+
+    # List of columns to be rounded
+    rounding_cols = [
+        'Spot', 'M_o_M%', 'Next_M_o_M%', 'Future Price', 'Basis', 'Rollover%',
+        'Avg. Roll Over', 'Rollover cost', 'Avg. Rollover Cost',
+        'Diff Rollover%', 'Diff Rollover Cost'
+    ]
+
+    # Round the numerical columns to 2 decimal places
+    final_df[rounding_cols] = final_df[rounding_cols].round(2)
+
+    # --- Final Output ---
+
+    # Reorder and rename columns to match the requested output
+    final_df.reset_index(inplace=True)
+    logger.debug("Sorted and rounded report:\n%s", final_df)
+
+    final_df = final_df[REPORT_COLUMNS + ['Symbol ID', 'Total OI', 'Rolled OI']].copy()
+
+    # 11. Label every row with its signal bucket (kept out of the CSV and Excel columns)
+    return add_signal_column(final_df)
+
+def write_csv_report(final_df, folder2_path, current_month_name):
+    """
+    Writes the <Mon><YYYY>_Rollover_Data.csv report into folder2.
+    """
+    output_filename = f"{current_month_name}_Rollover_Data.csv"
+    output_path = folder2_path / output_filename
+    with stage('CSV write', rows_in=len(final_df)):
+        final_df[report_columns(final_df)].to_csv(output_path, index=False, float_format='%.2f')
+    print(f"\nSuccessfully generated report: {output_filename}")
+    print(f"Output saved to: {output_path.resolve()}")
+
+def write_sector_report(final_df, folder2_path, current_month_name):
+    """
+    Builds the sector summary of a finalized report frame (see sector_summary.py) and
+    writes it as <Mon><YYYY>_Sector_Summary.csv into folder2.
+
+    Returns:
+        The sector summary, for the Sector Summary sheet of the workbook.
+    """
+    output_path = folder2_path / sector_summary_filename(current_month_name)
+    with stage('sector summary', rows_in=len(final_df)) as record:
+        sector_df = build_sector_summary(final_df, folder2_path, current_month_name, AVERAGE_SETTINGS['window'])
+        sector_df.to_csv(output_path, index=False, float_format='%.2f')
+        record.rows_out = len(sector_df)
+    print(f"\nSuccessfully generated report: {output_path.name}")
+    print(f"Output saved to: {output_path.resolve()}")
+    return sector_df
+
+def write_index_report(index_df, folder2_path, current_month_name):
+    """
+    Writes the index futures rows into <Mon><YYYY>_Index_Rollover.csv in folder2.
+    """
+    if index_df.empty:
+        return
+    output_filename = f"{current_month_name}_Index_Rollover.csv"
+    output_path = folder2_path / output_filename
+    index_df.to_csv(output_path, index=False, float_format='%.2f')
+    print(f"\nSuccessfully generated report: {output_filename}")
+    print(f"Output saved to: {output_path.resolve()}")
+
+def excel_cell_rows(final_df):
+    """
+    Converts final_df once into rows of Excel cell values, the way to_excel(float_format='%.2f')
+    writes them: floats rounded through '%.2f', NaN as blank cells.
+    """
+    rows = []
+    for record in final_df.itertuples(index=False, name=None):
+        row = []
+        for value in record:
+            if isinstance(value, (float, np.floating)):
+                if np.isnan(value):
+                    value = None
+                elif np.isinf(value):
+                    value = 'inf' if value > 0 else '-inf'
+                else:
+                    value = float('%.2f' % value)
+            elif isinstance(value, np.integer):
+                value = int(value)
+            row.append(value)
+        rows.append(row)
+    return rows
+
+def calculate_column_widths(final_df):
+    """
+    Column widths for every sheet: the longest value or header in the column plus 2,
+    capped at 50, with the first column fixed at 35.
+    """
+    widths = []
+    for col in final_df.columns:
+        # If the column is empty, max_len will be 0, so we default to header length.
         try:
-            writer = pd.ExcelWriter(output_path_2, engine='xlsxwriter')
-            # Write the DataFrame to a specific sheet
-            final_df.to_excel(writer, sheet_name='Rollover Data', index=False, float_format='%.2f', startrow=4)
-
-            # Get the workbook and worksheet objects
-            workbook  = writer.book
-            worksheet = writer.sheets['Rollover Data']
-
-            # --- Filtering and Writing to New Sheets ---
-
-            # 1. Long Rolls
-            long_rolls_df = final_df[(final_df['M_o_M%'] > 0) & (final_df['Diff Rollover%'] > 0) & (final_df['Diff Rollover Cost'] > 0)]
-            long_rolls_df_sorted = long_rolls_df.sort_values(by=['Diff Rollover Cost', 'Diff Rollover%', 'M_o_M%'], ascending=[False, False, False])
-            long_rolls_df_sorted.to_excel(writer, sheet_name='Long Rolls', index=False, float_format='%.2f', startrow=4)
-            worksheet_lr = writer.sheets['Long Rolls']
-            # worksheet_lr.write(0, 0, "Long Rolls (MoM+ , %Roll+ , Cost+)", green_format)
-            # worksheet_lr.write(1, 0, "Short Rolls (MoM- , %Roll+ , Cost-)", red_format)
-            # worksheet_lr.write(2, 0, "Short Covering (MoM+ , %Roll- , Cost+)", light_green_format)
-            # worksheet_lr.write(3, 0, "Long Unwind (MoM- , %Roll- , Cost-)", light_red_format)
-            # worksheet_lr.freeze_panes(5, 2)
-
-
-            # 2. Short Rolls
-            short_rolls_df = final_df[(final_df['M_o_M%'] < 0) & (final_df['Diff Rollover%'] > 0) & (final_df['Diff Rollover Cost'] < 0)]
-            short_rolls_df_sorted = short_rolls_df.sort_values(by=['Diff Rollover%', 'Diff Rollover Cost', 'M_o_M%'], ascending=[False, True, True])
-            short_rolls_df_sorted.to_excel(writer, sheet_name='Short Rolls', index=False, float_format='%.2f', startrow=4)
-            worksheet_sr = writer.sheets['Short Rolls']
-            # worksheet_sr.write(0, 0, "Long Rolls (MoM+ , %Roll+ , Cost+)", green_format)
-            # worksheet_sr.write(1, 0, "Short Rolls (MoM- , %Roll+ , Cost-)", red_format)
-            # worksheet_sr.write(2, 0, "Short Covering (MoM+ , %Roll- , Cost+)", light_green_format)
-            # worksheet_sr.write(3, 0, "Long Unwind (MoM- , %Roll- , Cost-)", light_red_format)
-            # worksheet_sr.freeze_panes(5, 2)
-
-            # 3. Short Covering
-            short_covering_df = final_df[(final_df['M_o_M%'] > 0) & (final_df['Diff Rollover%'] < 0) & (final_df['Diff Rollover Cost'] > 0)]
-            short_covering_df_sorted = short_covering_df.sort_values(by=['M_o_M%', 'Diff Rollover Cost', 'Diff Rollover%'], ascending=[False, False, True])
-            short_covering_df_sorted.to_excel(writer, sheet_name='Short Covering', index=False, float_format='%.2f', startrow=4)
-            worksheet_sc = writer.sheets['Short Covering']
-            # worksheet_sc.write(0, 0, "Long Rolls (MoM+ , %Roll+ , Cost+)", green_format)
-            # worksheet_sc.write(1, 0, "Short Rolls (MoM- , %Roll+ , Cost-)", red_format)
-            # worksheet_sc.write(2, 0, "Short Covering (MoM+ , %Roll- , Cost+)", light_green_format)
-            # worksheet_sc.write(3, 0, "Long Unwind (MoM- , %Roll- , Cost-)", light_red_format)
-            # worksheet_sc.freeze_panes(5, 2)
-
-
-            # 4. Long Unwind
-            long_unwind_df = final_df[(final_df['M_o_M%'] < 0) & (final_df['Diff Rollover%'] < 0) & (final_df['Diff Rollover Cost'] < 0)]
-            long_unwind_df_sorted = long_unwind_df.sort_values(by=['M_o_M%', 'Diff Rollover Cost', 'Diff Rollover%'], ascending=[True, True, True])
-            long_unwind_df_sorted.to_excel(writer, sheet_name='Long Unwind', index=False, float_format='%.2f', startrow=4)
-            worksheet_lu = writer.sheets['Long Unwind']
-            # worksheet_lu.write(0, 0, "Long Rolls (MoM+ , %Roll+ , Cost+)", green_format)
-            # worksheet_lu.write(1, 0, "Short Rolls (MoM- , %Roll+ , Cost-)", red_format)
-            # worksheet_lu.write(2, 0, "Short Covering (MoM+ , %Roll- , Cost+)", light_green_format)
-            # worksheet_lu.write(3, 0, "Long Unwind (MoM- , %Roll- , Cost-)", light_red_format)
-            # worksheet_lu.freeze_panes(5, 2)
-
-            apply_worksheet_formatting (final_df, worksheet, workbook, curr_date_6, prev_date_6, next_date_6)
-            apply_worksheet_formatting (long_rolls_df, worksheet_lr, workbook, curr_date_6, prev_date_6, next_date_6)
-            apply_worksheet_formatting (short_rolls_df, worksheet_sr, workbook, curr_date_6, prev_date_6, next_date_6)
-            apply_worksheet_formatting (short_covering_df, worksheet_sc, workbook, curr_date_6, prev_date_6, next_date_6)
-            apply_worksheet_formatting (long_unwind_df, worksheet_lu, workbook, curr_date_6, prev_date_6, next_date_6)
-
-            # Close the Pandas Excel writer and output the Excel file.
-            writer.close()
-            print(f"\nSuccessfully generated report: {output_filename_2}")
-            print(f"Output saved to: {output_path_2.resolve()}")
-
-        except ImportError:
-            # Fallback to CSV if xlsxwriter is not available
-            print("Warning: 'xlsxwriter' not found. Falling back to CSV without conditional formatting.")
-            output_filename = f"{current_month_name}_Rollover_Data.csv"
-            output_path = folder1_path / output_filename
-            final_df.to_csv(output_path, index=False, float_format='%.2f')
-        
+            max_len = max(final_df[col].astype(str).str.len().max(), len(col)) + 2
+        except (TypeError, ValueError):
+            max_len = len(col) + 2
+        # Constrain max width to prevent extremely wide columns
+        widths.append(min(max_len, 50))
+    widths[0] = 35
+    return widths
+
+def create_highlight_formats(workbook):
+    """
+    Creates the four signal highlight formats once per workbook, keyed by signal name.
+    """
+    return {
+        # Green / light green for Long Rolls / Short Covering
+        'Long Rolls': workbook.add_format({'bg_color': '#C6EFCE', 'font_color': '#006100'}),
+        'Short Covering': workbook.add_format({'bg_color': '#EEFBF0', 'font_color': '#006100'}),
+        # Red / light red for Short Rolls / Long Unwind
+        'Short Rolls': workbook.add_format({'bg_color': '#FFC7CE', 'font_color': '#9C0006'}),
+        'Long Unwind': workbook.add_format({'bg_color': '#FFEBF0', 'font_color': '#9C0006'}),
+    }
+
+def write_excel_report(final_df, folder1_path, current_month_name, curr_date_6, prev_date_6, next_date_6, sector_df=None):
+    """
+    Writes the <Mon><YYYY>_Rollover_Data.xlsx workbook (full sheet plus the four signal sheets,
+    and a Sector Summary sheet when sector_df is given) into folder1.
+
+    Rows are written straight through xlsxwriter in constant_memory mode. The cell values,
+    column widths and highlight formats are prepared once and shared by all five sheets.
+    Each row gets the fill of its Signal bucket as a static cell format, so Excel has no
+    conditional formulas to evaluate when the workbook is opened.
+    """
+    output_filename_2 = f"{current_month_name}_Rollover_Data.xlsx"
+    output_path_2 = folder1_path / output_filename_2
+    try:
+        import xlsxwriter
+    except ImportError:
+        # Fallback to CSV if xlsxwriter is not available
+        print("Warning: 'xlsxwriter' not found. Falling back to CSV without signal highlighting.")
+        output_filename = f"{current_month_name}_Rollover_Data.csv"
+        output_path = folder1_path / output_filename
+        final_df[report_columns(final_df)].to_csv(output_path, index=False, float_format='%.2f')
+        return
+
+    with stage('XLSX write', rows_in=len(final_df)):
+        columns = report_columns(final_df)
+        report_df = final_df[columns]
+        cell_rows = excel_cell_rows(report_df)
+        column_widths = calculate_column_widths(report_df)
+        sheet_rows = signal_sheet_rows(final_df)
+        row_signals = final_df['Signal'].tolist()
+
+        # constant_memory flushes every row once the next one starts, so each sheet is
+        # written strictly top to bottom: legend, header, then data.
+        # Cell values are already typed, so skip xlsxwriter's per-string formula/URL detection
+        workbook = xlsxwriter.Workbook(output_path_2, {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False,
+        })
+        formats = create_highlight_formats(workbook)
+
+        sheets = [('Rollover Data', range(len(cell_rows)))] + list(sheet_rows.items())
+        for sheet_name, row_positions in sheets:
+            worksheet = workbook.add_worksheet(sheet_name)
+            apply_worksheet_formatting(worksheet, formats, column_widths, curr_date_6, prev_date_6, next_date_6)
+            worksheet.write_row(4, 0, columns)
+            for excel_row, position in enumerate(row_positions, start=5):
+                # Rows outside every bucket have a NaN Signal and stay unformatted
+                worksheet.write_row(excel_row, 0, cell_rows[position], formats.get(row_signals[position]))
+
+        if sector_df is not None:
+            worksheet = workbook.add_worksheet('Sector Summary')
+            for i, width in enumerate(calculate_column_widths(sector_df)):
+                worksheet.set_column(i, i, width)
+            worksheet.freeze_panes(1, 1)
+            worksheet.write_row(0, 0, list(sector_df.columns))
+            for excel_row, row in enumerate(excel_cell_rows(sector_df), start=1):
+                worksheet.write_row(excel_row, 0, row)
+
+        workbook.close()
+    print(f"\nSuccessfully generated report: {output_filename_2}")
+    print(f"Output saved to: {output_path_2.resolve()}")
+
+def generate_rollover_report(folder1, folder2, file1_path, file2_path, file3_path, file4_path, file5_path_prev, curr_date_6, prev_date_6, next_date_6, csv_only=False, index_close_path="", prev_index_close_path=""):
+    """
+    Main function to process financial files and generate the rollover report.
+    With csv_only, only the CSV report is written and the Excel workbook is skipped.
+    The index close files are optional ("" when missing) and only used for the index futures report.
+    """
+    print("--- Starting Rollover Report Generation ---")
+
+    # Define paths
+    folder1_path = Path(folder1)
+    folder2_path = Path(folder2)
+    file1_path = Path(file1_path)
+    file2_path = Path(file2_path)
+    file3_path = Path(file3_path)
+    file4_path = Path(file4_path)
+    file5_path = file5_path_prev
+    if file5_path_prev != "":
+        file5_path = Path(file5_path_prev)
+
+    ensure_output_folders(folder1_path, folder2_path)
+
+    try:
+        # 1. Read the futures, spot and sectoral index inputs concurrently, and
+        # 2. run the futures calculations while the spot files are still being read
+        inputs = load_report_inputs(file1_path, file2_path, file3_path, file4_path, file5_path, index_close_path, prev_index_close_path)
+        master = inputs[4]
+        result = build_rollover_frame(*inputs)
+        if result is None:
+            return
+        final_df, index_df, current_month_name, current_month_names = result
+
+        # 3. Read Historical Averages
+        print(f"Calculating {AVERAGE_SETTINGS['window']}-month historical averages from {folder2}...")
+        logger.debug("Current month names: %s", current_month_names)
+        avg_df = get_historical_averages(folder2_path, current_month_names, current_month_name)
+        final_df = finalize_rollover_frame(final_df, avg_df, master)
+        final_df = add_history_stats(final_df, folder2_path, current_month_name)
+
+        # 4. Write the CSV and Excel reports
+        write_csv_report(final_df, folder2_path, current_month_name)
+        write_index_report(index_df, folder2_path, current_month_name)
+        sector_df = write_sector_report(final_df, folder2_path, current_month_name)
+        record_month_history(final_df, folder2_path, current_month_name)
+        if not csv_only:
+            write_excel_report(final_df, folder1_path, current_month_name, curr_date_6, prev_date_6, next_date_6, sector_df)
+
     except FileNotFoundError as e:
         print(f"Error: One of the input files was not found. Details: {e}")
     except Exception as e:
         print(f"An unexpected error occurred during processing: {e}")
 
+def ensure_output_folders(folder1_path, folder2_path):
+    """
+    Creates the Excel (folder1) and CSV (folder2) output folders if they do not exist.
+    """
+    for folder_path in (folder1_path, folder2_path):
+        if not folder_path.exists():
+            folder_path.mkdir(parents=True, exist_ok=True)
+            print(f"Created output folder: {folder_path}")
+
 # def add_legend(filename, legend_items):
 #     """
 #     Adds a color-coded legend to the top of an Excel worksheet.
@@ -508,221 +1072,188 @@ def generate_rollover_report(folder1, folder2, file1_path, file2_path, file3_pat
 #     wb.save(filename)
 #     print(f"Legend added to {filename}")
 
-def apply_worksheet_formatting(final_df, worksheet, workbook, curr_date_6, prev_date_6, next_date_6):
-    # --- AUTO-FIT COLUMN WIDTHS ---
-    # Set column widths based on the maximum length of the data in each column
-    for i, col in enumerate(final_df.columns):
-        # Calculate the max length of data + 2 for a little padding
-        # If the column is empty, max_len will be 0, so we default to header length.
-        try:
-            # Get the maximum length of the string representation of all items in the column
-            max_len = max(final_df[col].astype(str).str.len().max(), len(col)) + 2
-        except:
-            # Fallback if the column contains un-stringable data or is empty
-            max_len = len(col) + 2
-            # Constrain max width to prevent extremely wide columns
-        max_len = min(max_len, 50)
-
-        # if i == 0:
-        #     max_len = max_len + 5
-
+def apply_worksheet_formatting(worksheet, formats, column_widths, curr_date_6, prev_date_6, next_date_6):
+    """
+    Sets the column widths and frozen panes and writes the legend and expiry dates (rows 0-3).
+    Must run before the header and data rows when the workbook is in constant_memory mode.
+    """
+    # --- COLUMN WIDTHS ---
+    for i, width in enumerate(column_widths):
         # Set the width for the current column (i, i are start and end columns)
-        worksheet.set_column(i, i, max_len)
-
-    worksheet.set_column(0, 0, 35)
-
-    # Define the green format for highlighting
-    green_format = workbook.add_format({
-        'bg_color': '#C6EFCE',
-        'font_color': '#006100'
-    })
-    light_green_format = workbook.add_format({
-        'bg_color': '#EEFBF0',
-        'font_color': '#006100'
-    })
-
-    # Define the red format for highlighting
-    red_format = workbook.add_format({
-        'bg_color': '#FFC7CE',
-        'font_color': '#9C0006'
-    })
-    light_red_format = workbook.add_format({
-        'bg_color': '#FFEBF0',
-        'font_color': '#9C0006'
-    })
+        worksheet.set_column(i, i, width)
 
     worksheet.freeze_panes(5, 2)
-    worksheet.write(0, 0, "Long Rolls (MoM+ , %Roll+ , Cost+)", green_format)
-    worksheet.write(1, 0, "Short Rolls (MoM- , %Roll+ , Cost-)", red_format)
-    worksheet.write(2, 0, "Short Covering (MoM+ , %Roll- , Cost+)", light_green_format)
-    worksheet.write(3, 0, "Long Unwind (MoM- , %Roll- , Cost-)", light_red_format)
-
+    worksheet.write(0, 0, "Long Rolls (MoM+ , %Roll+ , Cost+)", formats['Long Rolls'])
     worksheet.write(0, 1, "Current Date")
     worksheet.write(0, 2, curr_date_6)
+    worksheet.write(1, 0, "Short Rolls (MoM- , %Roll+ , Cost-)", formats['Short Rolls'])
     worksheet.write(1, 1, "Prev Date")
     worksheet.write(1, 2, prev_date_6)
+    worksheet.write(2, 0, "Short Covering (MoM+ , %Roll- , Cost+)", formats['Short Covering'])
     worksheet.write(2, 1, "Next Date")
     worksheet.write(2, 2, next_date_6)
+    worksheet.write(3, 0, "Long Unwind (MoM- , %Roll- , Cost-)", formats['Long Unwind'])
 
-    # Define the conditional formatting rule
-    # Data starts from row 2 (header in row 1).
-    # Columns (1-indexed for Excel):
-    # M_o_M% is column C (index 2)
-    # Diff Rollover% is column J (index 9)
-    # Diff Rollover Cost is column K (index 10)
-
-    max_row = len(final_df)
-    max_col = len(final_df.columns)
-    # The range covers all data cells (from A6 to the last data cell)
-    data_range = f'A6:{xl_rowcol_to_cell(max_row+4, max_col - 1)}'
-
-    # The formula checks cell values in the *current* row (relative to A2)
-    formula_green = '=AND($L6>0, $J6>0, $K6>0)'
-    formula_red = '=AND($L6<0, $J6>0, $K6<0)'
-    formula_light_green = '=AND($L6>0, $J6<0, $K6>0)'
-    formula_light_red = '=AND($L6<0, $J6<0, $K6<0)'
-
-    # Apply the conditional format to the entire data range
-    worksheet.conditional_format(data_range, {
-        'type': 'formula',
-        'criteria': formula_green,
-        'format': green_format
-    })
-    worksheet.conditional_format(data_range, {
-        'type': 'formula',
-        'criteria': formula_red,
-        'format': red_format
-    })
-    worksheet.conditional_format(data_range, {
-        'type': 'formula',
-        'criteria': formula_light_red,
-        'format': light_red_format
-    })
-    worksheet.conditional_format(data_range, {
-        'type': 'formula',
-        'criteria': formula_light_green,
-        'format': light_green_format
-    })
+# --- Batch Mode ---
 
-def get_last_weekday_of_month(year, month, weekday):
+def parse_month_range(month_range):
     """
-    Calculates the date of the last specified weekday (0=Mon, 6=Sun) of a given month.
+    Expands a FROM:TO range of MMMYY months (e.g. FEB25:NOV25) into the list of
+    MMMYY months it covers, oldest first.
     """
-    # Get the number of days in the month
-    _, num_days = calendar.monthrange(year, month)
-
-    # Start checking from the last day of the month
-    for day in range(num_days, num_days - 7, -1):
-        target_date = datetime(year, month, day)
-        # Check if the day is the target weekday
-        if target_date.weekday() == weekday:
-            return target_date
-    return None
-
-def calculate_expiry_date(year, month, give_error):
+    try:
+        start_str, end_str = month_range.split(':')
+        start = datetime.strptime(start_str, '%b%y')
+        end = datetime.strptime(end_str, '%b%y')
+    except ValueError:
+        raise ValueError("Range format must be MMMYY:MMMYY (e.g., FEB25:NOV25).")
+
+    if end < start:
+        raise ValueError(f"Range end {end_str} is before range start {start_str}.")
+
+    months = []
+    while start <= end:
+        months.append(start.strftime('%b%y').upper())
+        start += relativedelta(months=1)
+    return months
+
+def find_available_months(fo_folder=FO_FOLDER):
     """
-    Calculates the expiry date (last Thursday or last Tuesday) for a given month/year.
+    Lists the MMMYY months that have a futures bhavcopy (fo{DDMMYY}.csv or fo{DDMMYYYY}.csv)
+    in fo_folder, oldest first.
     """
-    # September 2025 is 2025-09-01
-    sept_2025 = datetime(2025, 9, 1)
-
-    current_month_start = datetime(year, month, 1)
-
-    if current_month_start < sept_2025:
-        # Before September 2025: Last Thursday (Thursday is 3 in Python's calendar: 0=Mon, 6=Sun)
-        weekday_to_find = calendar.THURSDAY  # 3
-    else:
-        # September 2025 onwards: Last Tuesday (Tuesday is 1)
-        weekday_to_find = calendar.TUESDAY   # 1
+    months = {datetime(file_date.year, file_date.month, 1) for file_date in list_dated_files(fo_folder, 'fo')}
+    return [month.strftime('%b%y').upper() for month in sorted(months)]
 
-    expiry_date = get_last_weekday_of_month(year, month, weekday_to_find)
-
-    if expiry_date is None:
-        raise ValueError(f"Could not calculate expiry date for {year}-{month:02d}")
-
-    current_datetime = datetime.now()
-
-    if current_datetime < expiry_date and give_error:
-        raise ValueError(f"Current date {current_datetime} is less than expiry date for {expiry_date}")
-
-    return expiry_date
-
-def get_curr_and_prev_month_dates(input_month_year):
+def _configure_batch_worker(cache_settings, ingest_settings, profile_settings):
     """
-    Parses the input MMMYY string, calculates current and previous month's expiry dates,
-    and returns them in DDMMYY format, with an optional DDMMYYYY fallback.
+    Process pool initializer: applies the parent's cache, ingest and profiling settings.
     """
-    if input_month_year:
-        # Parse the input string (e.g., 'DEC-25')
-        try:
-            current_month_dt = datetime.strptime(input_month_year, '%b%y')
-        except ValueError:
-            raise ValueError("Input format must be MMMYY (e.g., DEC25).")
-    else:
-        # Use current month and year if input is empty
-        current_month_dt = datetime.now()
-
-    curr_year = current_month_dt.year
-    curr_month = current_month_dt.month
-
-    # Calculate Current Month Date
-    curr_month_expiry = calculate_expiry_date(curr_year, curr_month, True)
-    curr_month_date_6 = curr_month_expiry.strftime('%d%m%y')
-    curr_month_date_8 = curr_month_expiry.strftime('%d%m%Y')
+    configure_cache(cache_settings['enabled'], cache_settings['rebuild'], cache_settings['folder'],
+                    cache_settings['max_bytes'] / (1024 * 1024))
+    configure_ingest(ingest_settings['engine'], ingest_settings['float32'])
+    configure_profiling(profile_settings['enabled'], profile_settings['format'])
 
+def _batch_result(job):
+    """
+    The result of a run_profiled pool task; the stages the worker recorded join this process's profile.
+    """
+    result, records = job.result()
+    merge_stage_records(records)
+    return result
 
-    # Calculate Previous Month Date
-    # Go back one month
-    if curr_month == 1:
-        prev_month = 12
-        prev_year = curr_year - 1
-    else:
-        prev_month = curr_month - 1
-        prev_year = curr_year
-
-    if curr_month == 12:
-        next_month = 1
-        next_year = curr_year + 1
-    else:
-        next_month = curr_month + 1
-        next_year = curr_year
+def _load_batch_input(kind, file_path, symbols=None):
+    """
+    Process pool task: parses one batch input (a futures or an equity bhavcopy).
+    """
+    if kind == 'futures':
+        return load_futures(file_path)
+    return load_spot(file_path, 'CLOSE_PRICE', symbols)
 
-    prev_month_expiry = calculate_expiry_date(prev_year, prev_month, True)
-    prev_month_date_6 = prev_month_expiry.strftime('%d%m%y')
-    prev_month_date_8 = prev_month_expiry.strftime('%d%m%Y')
+def run_batch(month_years, folder1=FOLDER1, folder2=FOLDER2, workers=None, csv_only=False):
+    """
+    Generates the reports for several months in one process pool.
+
+    1. Every distinct input file referenced by the months is parsed once, in parallel.
+       An equity bhavcopy used as one month's current spot and the next month's previous
+       spot is only read once.
+    2. The futures and spot calculations of all months run in parallel.
+    3. The averaging stage runs month by month in chronological order, because each
+       month's historical average reads the *_Rollover_Data.csv of the months before it.
+    """
+    folder1_path = Path(folder1)
+    folder2_path = Path(folder2)
+    ensure_output_folders(folder1_path, folder2_path)
 
-    next_month_expiry = calculate_expiry_date(next_year, next_month, False)
-    next_month_date_6 = next_month_expiry.strftime('%d%m%y')
-    next_month_date_8 = next_month_expiry.strftime('%d%m%Y')
+    # 1. Resolve the inputs of every month
+    print("\n--- Locating Input Files ---")
+    month_inputs = {}
+    for month_year in month_years:
+        try:
+            month_inputs[month_year] = resolve_report_inputs(month_year)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"Skipping {month_year}: {e}")
+
+    if not month_inputs:
+        print("Error: No month in the batch has a complete set of input files.")
+        return
+
+    futures_files = {str(inputs['file1']) for inputs in month_inputs.values()}
+    spot_files = set()
+    for inputs in month_inputs.values():
+        spot_files.update(str(inputs[key]) for key in ('file2', 'file3', 'file5') if inputs[key] != "")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_configure_batch_worker,
+                             initargs=(dict(CACHE_SETTINGS), dict(INGEST_SETTINGS), dict(PROFILE_SETTINGS))) as pool:
+
+        # 2. Parse every distinct input file once
+        print(f"\n--- Parsing {len(futures_files)} futures and {len(spot_files)} spot files ---")
+        # The futures files come first: their symbols decide which spot rows are kept
+        # Every task runs through run_profiled, so the stages of the workers reach --profile
+        futures_jobs = {('futures', path): pool.submit(run_profiled, _load_batch_input, 'futures', path)
+                        for path in futures_files}
+        frames = {key: _batch_result(job) for key, job in futures_jobs.items()}
+        master = load_symbol_master(INDEX_FILE, [(path, frames[('futures', path)]) for path in futures_files])
+        symbols = set().union(*(master.futures_universe(path) for path in futures_files))
+        spot_jobs = {('spot', path): pool.submit(run_profiled, _load_batch_input, 'spot', path, symbols)
+                     for path in spot_files}
+        frames.update((key, _batch_result(job)) for key, job in spot_jobs.items())
+
+        def spot_frame(path, column_name):
+            if path == "":
+                return None
+            return frames[('spot', str(path))].rename(columns={'CLOSE_PRICE': column_name})
+
+        # 3. Futures and spot calculations for every month
+        print(f"\n--- Calculating rollover for {len(month_inputs)} months ---")
+        build_jobs = {}
+        for month_year, inputs in month_inputs.items():
+            build_jobs[month_year] = pool.submit(
+                run_profiled, build_rollover_frame,
+                frames[('futures', str(inputs['file1']))],
+                spot_frame(inputs['file2'], 'Spot'),
+                spot_frame(inputs['file3'], 'PrevMonthSpot'),
+                spot_frame(inputs['file5'], 'NextMonthSpot'),
+                master,
+                load_index_closes(inputs['index_close'], 'Spot'),
+                load_index_closes(inputs['prev_index_close'], 'PrevMonthSpot'),
+            )
+
+        # 4. Averages in chronological order, then the reports
+        excel_jobs = []
+        ordered_months = sorted(month_inputs, key=lambda m: datetime.strptime(m, '%b%y'))
+        for month_year in ordered_months:
+            try:
+                result = _batch_result(build_jobs[month_year])
+            except Exception as e:
+                print(f"An unexpected error occurred while processing {month_year}: {e}")
+                continue
+            if result is None:
+                continue
 
-    return {
-        'curr_6': curr_month_date_6,
-        'curr_8': curr_month_date_8,
-        'prev_6': prev_month_date_6,
-        'prev_8': prev_month_date_8,
-        'next_6': next_month_date_6,
-        'next_8': next_month_date_8,
-        'current_month_name': curr_month_expiry.strftime('%b%Y')
-    }
+            final_df, index_df, current_month_name, current_month_names = result
+            dates = month_inputs[month_year]['dates']
 
-def try_file_read(file_path_6, file_path_8, file_type, give_empty_string):
-    """Tries to read or generate a file using DDMMYY, falls back to DDMMYYYY."""
-    path_6 = Path(file_path_6)
-    path_8 = Path(file_path_8)
+            print(f"\n--- Finalizing {current_month_name} ---")
+            avg_df = get_historical_averages(folder2_path, current_month_names, current_month_name)
+            final_df = finalize_rollover_frame(final_df, avg_df, master)
+            final_df = add_history_stats(final_df, folder2_path, current_month_name)
 
-    # 1. Try to read the file in DDMMYY format
-    if path_6.exists():
-        return str(path_6)
+            # The CSV must exist before the next month's averages are calculated
+            write_csv_report(final_df, folder2_path, current_month_name)
+            write_index_report(index_df, folder2_path, current_month_name)
+            sector_df = write_sector_report(final_df, folder2_path, current_month_name)
+            record_month_history(final_df, folder2_path, current_month_name)
+            if csv_only:
+                continue
+            excel_jobs.append(pool.submit(
+                run_profiled, write_excel_report, final_df, folder1_path, current_month_name,
+                dates['curr_6'], dates['prev_6'], dates['next_6'], sector_df))
 
-    # 2. Try to read the file in DDMMYYYY format
-    elif path_8.exists():
-        return str(path_8)
+        for job in excel_jobs:
+            _batch_result(job)
 
-    # 3. If neither exists, generate mock data (for demonstration purposes)
-    else:
-        if give_empty_string:
-            return ""
-        raise FileNotFoundError(f"Could not generate or find file for type {file_type} at {path_6} or {path_8}")
+    print(f"\nBatch finished for {len(month_inputs)} months.")
 
 if __name__ == '__main__':
     # parser = argparse.ArgumentParser(
@@ -768,56 +1299,247 @@ if __name__ == '__main__':
         default='',
         help='The month and year (MMMYY) for the report (e.g., DEC25). Defaults to current month/year.'
     )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Parse every input CSV from scratch without reading or writing the parsed input cache.'
+    )
+    parser.add_argument(
+        '--rebuild-cache',
+        action='store_true',
+        help='Re-parse every input CSV and overwrite its parsed input cache entry.'
+    )
+    parser.add_argument(
+        '--cache-size-mb',
+        type=float,
+        default=512,
+        help='Size cap of the parsed input cache in MB. Least recently used entries are evicted first.'
+    )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        '--ingest',
+        choices=['pandas', 'arrow'],
+        default='pandas',
+        help="CSV reader of the futures and equity bhavcopies. 'arrow' reads only the used columns with the pyarrow engine "
+             "and pre-parses the contracts (see arrow_ingest.py)."
+    )
+    parser.add_argument(
+        '--float32-prices',
+        action='store_true',
+        help='With --ingest arrow, read prices as float32. Uses less memory but changes the last digits of some values.'
+    )
 
-    # 1. Calculate dates and month name
-    try:
-        dates = get_curr_and_prev_month_dates(args.month_year)
-    except ValueError as e:
-        print(f"Error processing month/year input: {e}")
-        exit()
+    parser.add_argument(
+        '--range',
+        dest='month_range',
+        type=str,
+        help='Generate every month in a MMMYY:MMMYY range (e.g., FEB25:NOV25) in one batch.'
+    )
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='Generate every month that has a futures file in fo_data in one batch.'
+    )
+    parser.add_argument(
+        '--csv-only',
+        action='store_true',
+        help='Only write generated_csv_data/<Mon><YYYY>_Rollover_Data.csv and skip the Excel workbook.'
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['pandas', 'lean'],
+        default='pandas',
+        help="Report engine. 'lean' computes the CSV report with the csv module and NumPy only (implies --csv-only). "
+             "It writes no sector summary or index report; the history database and matrix pick the month up from "
+             "its CSV when they are next opened. generate_files.py still imports pandas at start-up; run "
+             "lean_report.py directly to avoid that import."
+    )
+    parser.add_argument(
+        '--daily',
+        action='store_true',
+        help='Track rollover on every trading day of the month_year series and append the days to the daily store.'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and regenerate a month (and the averages of the months after it) as soon as its input files land.'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=2.0,
+        help='Seconds between two polls of the input folders in --watch mode.'
+    )
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Run a local HTTP/JSON server answering report queries by symbol, sector, signal or month range.'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='Port of the --serve query server (it listens on 127.0.0.1).'
+    )
+    parser.add_argument(
+        '--cache-months',
+        type=int,
+        default=12,
+        help='Number of recently queried months the --serve query server keeps in memory.'
+    )
+    parser.add_argument(
+        '--backtest',
+        action='store_true',
+        help='Backtest the signal buckets over every generated month (hit rate, forward returns and equity curves per '
+             'bucket, sector and month) and write the Backtest_*.csv tables.'
+    )
+    parser.add_argument(
+        '--backtest-source',
+        choices=['matrix', 'db'],
+        default='matrix',
+        help='History --backtest and --sweep read: the memory-mapped history matrix (default) or the rollover history database.'
+    )
+    parser.add_argument(
+        '--sweep',
+        metavar='GRID',
+        type=str,
+        help="Backtest every combination of a grid of signal thresholds on M_o_M%%, Diff Rollover%% and Diff Rollover Cost "
+             "(e.g. 'mom=0,2;pct=0,1,3,5;cost=0,0.05') in parallel and write the ranked Backtest_Sweep.csv."
+    )
+    parser.add_argument(
+        '--sweep-rank',
+        choices=['mean', 'median', 'hit-rate', 'equity'],
+        default='mean',
+        help='Statistic the --sweep configurations are ranked by: mean or median trade return, hit rate or final equity.'
+    )
+    parser.add_argument(
+        '--sweep-min-signals',
+        type=int,
+        default=30,
+        help='Minimum number of signals for a --sweep configuration to be ranked.'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes for batch mode and --sweep. Defaults to the number of CPUs.'
+    )
 
-    curr_date_6, curr_date_8 = dates['curr_6'], dates['curr_8']
-    prev_date_6, prev_date_8 = dates['prev_6'], dates['prev_8']
-    next_date_6, next_date_8 = dates['next_6'], dates['next_8']
+    parser.add_argument(
+        '--avg-source',
+        choices=['store', 'csv', 'db', 'matrix'],
+        default='store',
+        help="Where historical averages come from: the incremental rolling average store (default), the last N CSV files, "
+             "the rollover history database or the memory-mapped history matrix."
+    )
+    parser.add_argument(
+        '--avg-window',
+        type=int,
+        default=6,
+        help='Number of previous months used for the historical averages.'
+    )
+    parser.add_argument(
+        '--rebuild-averages',
+        action='store_true',
+        help='Rebuild the rolling average store from the generated CSV files before using it.'
+    )
+    parser.add_argument(
+        '--history-stats',
+        action='store_true',
+        help='Add z-score and percentile columns for Rollover%%, Rollover cost and Basis against each symbol\'s full history.'
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='table',
+        choices=['table', 'json'],
+        help='Print the wall time, rows in/out and peak traced memory of every stage as a table (default) or JSON. '
+             'Memory tracing slows the run down.'
+    )
+    parser.add_argument(
+        '--log-level',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        default='WARNING',
+        help='Level of the debug log (intermediate frames at DEBUG, resolved input files at INFO).'
+    )
 
-    # 2. Define standard folder and file names
-    folder1 = "generated_data"
-    folder2 = "generated_csv_data"
+    args = parser.parse_args()
 
-    # Define file paths for DDMMYY and DDMMYYYY
-    file1_6 = f"fo_data/fo{curr_date_6}.csv"
-    file2_6 = f"equity_data/sec_bhavdata_full_{curr_date_6}.csv"
-    file3_6 = f"equity_data/sec_bhavdata_full_{prev_date_6}.csv"
-    file5_6 = f"equity_data/sec_bhavdata_full_{next_date_6}.csv"
+    configure_cache(enabled=not args.no_cache, rebuild=args.rebuild_cache, max_mb=args.cache_size_mb)
+    configure_ingest(engine=args.ingest, float32=args.float32_prices)
+    configure_averages(source=args.avg_source, window=args.avg_window, rebuild=args.rebuild_averages)
+    configure_history_stats(enabled=args.history_stats)
+    configure_profiling(enabled=args.profile is not None, output_format=args.profile or 'table')
+    logging.basicConfig(level=getattr(logging, args.log_level), format='%(levelname)s %(name)s: %(message)s')
 
-    file1_8 = f"fo_data/fo{curr_date_8}.csv"
-    file2_8 = f"equity_data/sec_bhavdata_full_{curr_date_8}.csv"
-    file3_8 = f"equity_data/sec_bhavdata_full_{prev_date_8}.csv"
-    file5_8 = f"equity_data/sec_bhavdata_full_{next_date_8}.csv"
+    if args.daily:
+        from daily_tracking import run_daily_mode
+        try:
+            run_daily_mode(args.month_year)
+        except ValueError as e:
+            print(f"Error processing month/year input: {e}")
+        print_profile_report()
+        exit()
 
-    file4 = f"index.csv" # File 4 does not use date
+    if args.watch:
+        from watch_mode import run_watch_mode
+        run_watch_mode(csv_only=args.csv_only, interval=args.poll_interval)
+        print_profile_report()
+        exit()
 
-    # 3. Generate or find the required files
-    print("\n--- Generating/Locating Input Files ---")
+    if args.serve:
+        from query_server import run_query_server
+        run_query_server(port=args.port, capacity=args.cache_months)
+        print_profile_report()
+        exit()
 
-    # File 1 (Futures) uses DDMMYY or DDMMYYYY format
-    file1_resolved = try_file_read(file1_6, file1_8, 'file1', False)
+    if args.sweep:
+        from backtest import run_sweep
+        try:
+            run_sweep(args.sweep, source=args.backtest_source, workers=args.workers,
+                      min_signals=args.sweep_min_signals, rank_by=args.sweep_rank)
+        except ValueError as e:
+            print(f"Error processing sweep grid: {e}")
+        print_profile_report()
+        exit()
 
-    # File 2 (Current Spot) uses DDMMYY or DDMMYYYY format
-    file2_resolved = try_file_read(file2_6, file2_8, 'file2', False)
+    if args.backtest:
+        from backtest import run_backtest
+        run_backtest(source=args.backtest_source)
+        print_profile_report()
+        exit()
 
-    # File 3 (Previous Spot) uses DDMMYY or DDMMYYYY format
-    file3_resolved = try_file_read(file3_6, file3_8, 'file3', False)
-    file5_resolved = try_file_read(file5_6, file5_8, 'file3', True)
+    if args.month_range or args.all:
+        try:
+            month_years = parse_month_range(args.month_range) if args.month_range else find_available_months()
+        except ValueError as e:
+            print(f"Error processing month range input: {e}")
+            exit()
+        run_batch(month_years, workers=args.workers, csv_only=args.csv_only)
+        print_profile_report()
+        exit()
+
+    if args.engine == 'lean':
+        from lean_report import generate_lean_report
+        try:
+            generate_lean_report(args.month_year, window=args.avg_window)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"Error: {e}")
+        exit()
+
+    # 1. Calculate dates and locate the required files
+    print("\n--- Generating/Locating Input Files ---")
+    try:
+        inputs = resolve_report_inputs(args.month_year)
+    except ValueError as e:
+        print(f"Error processing month/year input: {e}")
+        exit()
 
-    file4_resolved = Path(file4)
+    dates = inputs['dates']
 
-    print(file1_resolved)
-    print(file2_resolved)
-    print(file3_resolved)
-    print(file4_resolved)
-    print(file5_resolved)
+    for key in ('file1', 'file2', 'file3', 'file4', 'file5', 'index_close', 'prev_index_close'):
+        logger.info("%s: %s", key, inputs[key])
 
-    generate_rollover_report(folder1, folder2, file1_resolved, file2_resolved, file3_resolved, file4_resolved, file5_resolved, curr_date_6, prev_date_6, next_date_6)
+    generate_rollover_report(FOLDER1, FOLDER2, inputs['file1'], inputs['file2'], inputs['file3'], inputs['file4'], inputs['file5'], dates['curr_6'], dates['prev_6'], dates['next_6'], csv_only=args.csv_only,
+                             index_close_path=inputs['index_close'], prev_index_close_path=inputs['prev_index_close'])
+    print_profile_report()
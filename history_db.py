@@ -0,0 +1,334 @@
+import argparse
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from report_inputs import FOLDER2
+from report_math import month_index, report_value
+from rolling_averages import STORE_FOLDER, csv_stamp
+from signals import classify_signals
+
+# --- Rollover History Database ---
+#
+# Every generated month is also written into one SQLite table, indexed on (month, symbol).
+# The historical averages and cross-month screens then run as indexed queries instead of
+# globbing and re-reading one CSV per month. import_csv_history loads the CSV reports
+# generated before the database existed.
+#
+# The database holds the history of one CSV folder, recorded in its meta table. Opening it
+# for another folder empties it and imports that folder's CSV reports instead, like the
+# history matrix and the rolling average store discard the state of another folder.
+# Every month is stamped with the size and modification time of its CSV report, so months
+# written without the database (e.g. by the lean engine) or rewritten since are imported
+# again when the database is opened.
+
+DB_PATH = STORE_FOLDER / 'rollover_history.sqlite'
+
+# Report column -> database column
+DB_COLUMNS = {
+    'Sectoral Index': 'sector',
+    'Symbol': 'symbol',
+    'Spot': 'spot',
+    'Future Price': 'future_price',
+    'Basis': 'basis',
+    'Rollover%': 'rollover_pct',
+    'Avg. Roll Over': 'avg_rollover_pct',
+    'Rollover cost': 'rollover_cost',
+    'Avg. Rollover Cost': 'avg_rollover_cost',
+    'Diff Rollover%': 'diff_rollover_pct',
+    'Diff Rollover Cost': 'diff_rollover_cost',
+    'M_o_M%': 'mom',
+    'Next_M_o_M%': 'next_mom',
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS rollover (
+    month INTEGER NOT NULL,       -- year * 12 + month - 1, see rolling_averages.month_index
+    month_name TEXT NOT NULL,     -- MmmYYYY, e.g. Oct2025
+    row INTEGER NOT NULL,         -- position in the month's report
+    {', '.join(f'{column} {"TEXT" if column in ("sector", "symbol") else "REAL"}' for column in DB_COLUMNS.values())},
+    signal TEXT
+);
+CREATE INDEX IF NOT EXISTS rollover_month_symbol ON rollover (month, symbol);
+CREATE INDEX IF NOT EXISTS rollover_symbol_month ON rollover (symbol, month);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS month_stamp (
+    month INTEGER PRIMARY KEY,    -- see rolling_averages.month_index
+    size INTEGER,                 -- size and mtime_ns of the month's CSV report when it was
+    mtime_ns INTEGER              -- stored, NULL when it had none
+);
+"""
+
+def connect(db_path=DB_PATH):
+    """
+    Opens the history database, creating the file and the table on first use.
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    # The query server's handler threads share one connection; they write one at a time
+    connection = sqlite3.connect(db_path, check_same_thread=False)
+    connection.executescript(SCHEMA)
+    return connection
+
+def stored_folder(connection):
+    """
+    The resolved CSV folder whose history the database holds, or None for a new database
+    (or one written before the folder was recorded).
+    """
+    row = connection.execute("SELECT value FROM meta WHERE key = 'folder'").fetchone()
+    return row[0] if row else None
+
+def bind_folder(connection, folder2_path):
+    """
+    Makes the database hold the history of folder2_path. When it holds no recorded folder or
+    another one, its rows are dropped and the CSV reports of folder2_path are imported.
+    """
+    folder = str(Path(folder2_path).resolve())
+    if stored_folder(connection) == folder:
+        return
+    if months_in_store(connection):
+        print(f"Rollover history database holds another CSV folder's history, rebuilding it from {folder2_path}...")
+    else:
+        # First use: load the months generated before the database existed
+        print(f"Importing the CSV reports of {folder2_path} into the rollover history database...")
+    with connection:
+        connection.execute('DELETE FROM rollover')
+        connection.execute('DELETE FROM month_stamp')
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('folder', ?)", (folder,))
+    import_csv_history(connection, folder2_path)
+
+_CONNECTIONS = {}
+
+def open_for_folder(folder2_path=FOLDER2, db_path=DB_PATH, refresh_months=True):
+    """
+    The history database connection of a CSV folder. The connection is opened once per
+    process and database file; every call checks that the database still holds this
+    folder's history (see bind_folder), so two folders used in turn never share rows, and
+    re-imports the months whose CSV report changed (see refresh) unless refresh_months is
+    False (e.g. right before the month is written from its report frame anyway).
+    """
+    key = str(Path(db_path).resolve())
+    if key not in _CONNECTIONS:
+        _CONNECTIONS[key] = connect(db_path)
+    bind_folder(_CONNECTIONS[key], folder2_path)
+    if refresh_months:
+        refresh(_CONNECTIONS[key], folder2_path)
+    return _CONNECTIONS[key]
+
+def write_month(connection, month_name, final_df):
+    """
+    Replaces the rows of month_name with the rows of a finished report frame, stamped with
+    the month's CSV report in the database's folder (written before).
+    """
+    signals = final_df['Signal'] if 'Signal' in final_df.columns else classify_signals(
+        final_df['M_o_M%'], final_df['Diff Rollover%'], final_df['Diff Rollover Cost'])
+    signals = [None if pd.isna(signal) else signal for signal in signals]
+
+    rows = []
+    # Reports written by older versions lack some columns (e.g. Next_M_o_M%), those stay NULL
+    for position, record in enumerate(final_df.reindex(columns=list(DB_COLUMNS)).itertuples(index=False, name=None)):
+        sector, symbol, *values = record
+        # Symbols without a sector are written as 0 in the report
+        sector = None if pd.isna(sector) or sector == 0 or sector == '0' else sector
+        rows.append((month_index(month_name), month_name, position, sector, symbol,
+                     *(report_value(v) for v in values), signals[position]))
+
+    folder = stored_folder(connection)
+    stamp = csv_stamp(report_path(folder, month_name)) if folder is not None else None
+    placeholders = ', '.join('?' * (len(DB_COLUMNS) + 4))
+    with connection:
+        connection.execute('DELETE FROM rollover WHERE month = ?', (month_index(month_name),))
+        connection.executemany(
+            f"INSERT INTO rollover (month, month_name, row, {', '.join(DB_COLUMNS.values())}, signal) VALUES ({placeholders})",
+            rows,
+        )
+        connection.execute('INSERT OR REPLACE INTO month_stamp (month, size, mtime_ns) VALUES (?, ?, ?)',
+                           (month_index(month_name), *(stamp or (None, None))))
+
+def drop_month(connection, month_name):
+    """
+    Removes the rows and the stamp of month_name.
+    """
+    with connection:
+        connection.execute('DELETE FROM rollover WHERE month = ?', (month_index(month_name),))
+        connection.execute('DELETE FROM month_stamp WHERE month = ?', (month_index(month_name),))
+
+def query(connection, sql, params=()):
+    """
+    Runs an ad-hoc SQL query against the history and returns the result as a DataFrame.
+    """
+    return pd.read_sql_query(sql, connection, params=params)
+
+def averages_for(connection, month_name, window=6):
+    """
+    Averages Rollover% and Rollover cost per symbol over the `window` months before month_name,
+    in the layout returned by calculate_averages. The rows come from one range scan of the
+    (month, symbol) index and are averaged in report order, like calculate_averages does.
+    """
+    end = month_index(month_name)
+    history_df = query(
+        connection,
+        'SELECT symbol AS "Symbol", rollover_pct AS "Rollover%", rollover_cost AS "Rollover cost" '
+        'FROM rollover WHERE month >= ? AND month < ? ORDER BY month, row',
+        (end - window, end),
+    )
+    if history_df.empty:
+        return pd.DataFrame(columns=['Symbol', 'Avg. Roll Over', 'Avg. Rollover Cost'])
+
+    history_df[['Rollover%', 'Rollover cost']] = history_df[['Rollover%', 'Rollover cost']].astype(float)
+    avg_df = history_df.groupby('Symbol').agg({'Rollover%': 'mean', 'Rollover cost': 'mean'})
+    return avg_df.rename(columns={
+        'Rollover%': 'Avg. Roll Over',
+        'Rollover cost': 'Avg. Rollover Cost',
+    }).reset_index()
+
+def months_in_store(connection):
+    """
+    Returns the MmmYYYY names of the stored months, oldest first.
+    """
+    return [row[0] for row in connection.execute('SELECT DISTINCT month_name, month FROM rollover ORDER BY month')]
+
+# --- Screens ---
+
+def beat_average_streak(connection, end_month, months=3):
+    """
+    Symbols whose Rollover% was above their Avg. Roll Over in each of the `months` months
+    ending at end_month (inclusive).
+    """
+    end = month_index(end_month)
+    return query(
+        connection,
+        'SELECT symbol AS "Symbol", MAX(sector) AS "Sectoral Index", COUNT(DISTINCT month) AS "Months", '
+        'AVG(rollover_pct - avg_rollover_pct) AS "Mean Diff Rollover%" '
+        'FROM rollover WHERE month > ? AND month <= ? AND rollover_pct > avg_rollover_pct '
+        'GROUP BY symbol HAVING COUNT(DISTINCT month) = ? ORDER BY "Mean Diff Rollover%" DESC',
+        (end - months, end, months),
+    )
+
+def signal_streak(connection, end_month, signal, months=3):
+    """
+    Symbols that were in the same signal bucket (e.g. Long Rolls) in each of the `months`
+    months ending at end_month (inclusive).
+    """
+    end = month_index(end_month)
+    return query(
+        connection,
+        'SELECT symbol AS "Symbol", MAX(sector) AS "Sectoral Index", COUNT(DISTINCT month) AS "Months" '
+        'FROM rollover WHERE month > ? AND month <= ? AND signal = ? '
+        'GROUP BY symbol HAVING COUNT(DISTINCT month) = ? ORDER BY symbol',
+        (end - months, end, signal, months),
+    )
+
+def symbol_history(connection, symbol):
+    """
+    Every stored month of one symbol, oldest first.
+    """
+    return query(connection, 'SELECT * FROM rollover WHERE symbol = ? ORDER BY month, row', (symbol,))
+
+# --- CSV Import ---
+
+def report_path(folder2_path, month_name):
+    return Path(folder2_path) / f"{month_name}_Rollover_Data.csv"
+
+def report_months(folder2_path):
+    """
+    The MmmYYYY names of the <Mon><YYYY>_Rollover_Data.csv reports in folder2, oldest first.
+    """
+    months = []
+    for file_path in sorted(Path(folder2_path).glob('*_Rollover_Data.csv')):
+        month_name = file_path.name.split('_')[0]
+        try:
+            datetime.strptime(month_name, '%b%Y')
+        except ValueError:
+            print(f"Skipping {file_path.name}: not a <Mon><YYYY>_Rollover_Data.csv report.")
+            continue
+        months.append(month_name)
+    return sorted(months, key=month_index)
+
+def import_month(connection, folder2_path, month_name):
+    month_df = pd.read_csv(report_path(folder2_path, month_name), skipinitialspace=True)
+    write_month(connection, month_name, month_df)
+    print(f"Imported {len(month_df)} rows of {month_name}")
+
+def import_csv_history(connection, folder2_path=FOLDER2):
+    """
+    One-shot import of every <Mon><YYYY>_Rollover_Data.csv in folder2 into the database.
+    Months already in the database are replaced.
+    """
+    imported = report_months(folder2_path)
+    for month_name in imported:
+        import_month(connection, folder2_path, month_name)
+    return imported
+
+def refresh(connection, folder2_path=FOLDER2):
+    """
+    Re-imports the months whose CSV report was written or rewritten since they were stored,
+    and drops the stored months whose CSV report was removed, so the database matches the
+    CSV folder like the rolling average store does.
+
+    Returns:
+        The names of the months that were imported or dropped.
+    """
+    stamps = {month: None if size is None else [size, mtime_ns]
+              for month, size, mtime_ns in connection.execute('SELECT month, size, mtime_ns FROM month_stamp')}
+    month_names = {month_index(month_name): month_name for month_name in months_in_store(connection)}
+    month_names.update((month_index(month_name), month_name) for month_name in report_months(folder2_path))
+
+    changed = []
+    for month in sorted(month_names):
+        stamp = csv_stamp(report_path(folder2_path, month_names[month]))
+        # Rows stored without a stamp (before stamps were kept) count as changed
+        if month in stamps and stamps[month] == stamp:
+            continue
+        if stamp is None:
+            drop_month(connection, month_names[month])
+        else:
+            import_month(connection, folder2_path, month_names[month])
+        changed.append(month_names[month])
+    if changed:
+        print(f"Rollover history database: updated {', '.join(changed)} from {folder2_path}.")
+    return changed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Imports the generated CSV reports into the rollover history database and runs screens on it."
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Import every *_Rollover_Data.csv of the CSV folder.')
+
+    streak_parser = subparsers.add_parser('streak', help='Symbols whose Rollover%% beat their average N months in a row.')
+    streak_parser.add_argument('end_month', help='Last month of the streak (MMMYY, e.g. NOV25).')
+    streak_parser.add_argument('--months', type=int, default=3, help='Length of the streak.')
+    streak_parser.add_argument('--signal', help='Screen for N months in this signal bucket instead (e.g. "Long Rolls").')
+
+    sql_parser = subparsers.add_parser('sql', help='Run an ad-hoc SQL query against the rollover table.')
+    sql_parser.add_argument('query', help='The SQL query.')
+
+    for subparser in (import_parser, streak_parser, sql_parser):
+        subparser.add_argument('--folder', default=FOLDER2, help='Folder with the CSV reports (default generated_csv_data).')
+
+    args = parser.parse_args()
+    connection = open_for_folder(args.folder)
+
+    if args.command == 'import':
+        months = import_csv_history(connection, args.folder)
+        print(f"\nImported {len(months)} months into {DB_PATH.resolve()}")
+    elif args.command == 'streak':
+        try:
+            end_month = datetime.strptime(args.end_month, '%b%y').strftime('%b%Y')
+        except ValueError:
+            print("Error: Input format must be MMMYY (e.g., DEC25).")
+            exit()
+        if args.signal:
+            result = signal_streak(connection, end_month, args.signal, args.months)
+        else:
+            result = beat_average_streak(connection, end_month, args.months)
+        print(result.to_string(index=False))
+    else:
+        print(query(connection, args.query).to_string(index=False))
@@ -0,0 +1,347 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from report_math import kahan_step, month_index, month_name_of
+from rolling_averages import STORE_FOLDER, csv_stamp
+
+# --- Memory-Mapped History Matrix ---
+#
+# Every generated month of Rollover%, Rollover cost, Basis, M_o_M%, Spot and the signal
+# inputs (Diff Rollover%, Diff Rollover Cost, Next_M_o_M%), one flat float32 file per
+# metric, opened with np.memmap. A small dictionary.json next to them names the symbol and
+# the latest Sectoral Index of every column and the month of every row. Opening the history reads
+# only the dictionary; the values are paged in by the OS when a slice is used.
+#
+# The files are month-major: row m holds month m of every symbol, `capacity` floats wide.
+# A new month is one contiguous append at the end of each file, and matrix() exposes the
+# same bytes as a symbols x months view (a transpose, not a copy). When more symbols show up
+# than the capacity holds, the files are rewritten once with twice the capacity.
+#
+# Values are the report's 2-decimal numbers. float32 holds them exactly enough that
+# rounding back to 2 decimals restores the report value for anything below 131072, which
+# covers every Rollover%, Rollover cost, Basis and M_o_M%. Spot can be a few cents off
+# above that.
+#
+# Some older reports list a symbol twice in a month. The matrix holds the first row; the
+# later ones are kept as 'extra_rows' in the dictionary, so averages count every row like
+# the CSV, store and database sources do.
+#
+# The dictionary also stamps every month with the size and modification time of its CSV
+# report. refresh() rewrites the months whose CSV was written (e.g. by the lean engine, which
+# does not write the matrix), rewritten or removed since, like the rolling average store.
+
+MATRIX_FOLDER = STORE_FOLDER / 'history_matrix'
+
+METRICS = ['Rollover%', 'Rollover cost', 'Basis', 'M_o_M%', 'Spot', 'Diff Rollover%', 'Diff Rollover Cost', 'Next_M_o_M%']
+
+INITIAL_CAPACITY = 512
+
+def _metric_filename(metric):
+    # 'Rollover%' -> rollover_pct.f32, 'M_o_M%' -> m_o_m_pct.f32, 'Next_M_o_M%' -> next_m_o_m_pct.f32
+    return metric.lower().replace('%', '_pct').replace(' ', '_') + '.f32'
+
+class MappedHistory:
+    """
+    The symbols x months history matrix of one CSV folder, stored under `folder`.
+
+    Attributes:
+        symbols: The symbol of every column of the matrices, in the order they were first seen.
+        months: The month index (rolling_averages.month_index) of every row, in append order.
+        capacity: The number of symbol slots of every row on disk.
+        sectors: The Sectoral Index of every symbol in its latest stored month, as a string.
+        stamps: The (size, mtime_ns) of every month's CSV report when it was stored, None
+            when it had none.
+    """
+
+    def __init__(self, folder, folder2_path, symbols=(), months=(), capacity=INITIAL_CAPACITY, extra_rows=None,
+                 sectors=None, stamps=None):
+        self.folder = Path(folder)
+        self.folder2_path = Path(folder2_path)
+        self.symbols = list(symbols)
+        self.months = [int(month) for month in months]
+        self.capacity = capacity
+        self.symbol_columns = {symbol: column for column, symbol in enumerate(self.symbols)}
+        self.month_rows = {month: row for row, month in enumerate(self.months)}
+        # month index -> [[symbol column, value of every metric], ...] of repeated symbol rows
+        self.extra_rows = {int(month): rows for month, rows in (extra_rows or {}).items()}
+        self.sectors = dict(sectors or {})
+        self.stamps = {int(month): stamp for month, stamp in (stamps or {}).items()}
+        self._maps = {}
+
+    @classmethod
+    def open(cls, folder2_path, folder=MATRIX_FOLDER):
+        """
+        Opens the history of folder2_path. A history built from another CSV folder, with
+        other metrics or with missing metric files, is discarded and starts empty.
+        """
+        history = cls(folder, folder2_path)
+        dictionary_path = history.folder / 'dictionary.json'
+        if not dictionary_path.exists():
+            return history
+        try:
+            data = json.loads(dictionary_path.read_text())
+        except (ValueError, OSError) as e:
+            print(f"Warning: Could not read history matrix dictionary {dictionary_path}, it will be rebuilt: {e}")
+            return history
+        complete = all((history.folder / _metric_filename(metric)).exists() for metric in METRICS)
+        if data.get('folder') != str(history.folder2_path.resolve()) or data.get('metrics') != METRICS or not complete:
+            return history
+        return cls(folder, folder2_path, data['symbols'], data['months'], data['capacity'], data.get('extra_rows'),
+                   data.get('sectors'), data.get('stamps'))
+
+    def csv_path(self, month_name):
+        return self.folder2_path / f"{month_name}_Rollover_Data.csv"
+
+    # --- Reading ---
+
+    def metric(self, metric):
+        """
+        The raw months x capacity float32 memmap of one metric (read-only).
+        """
+        if metric not in self._maps:
+            if not self.months:
+                return np.empty((0, self.capacity), dtype=np.float32)
+            self._maps[metric] = np.memmap(self.folder / _metric_filename(metric), dtype=np.float32, mode='r',
+                                           shape=(len(self.months), self.capacity))
+        return self._maps[metric]
+
+    def matrix(self, metric):
+        """
+        The symbols x months view of one metric, in self.symbols and self.months order. No copy.
+        """
+        return self.metric(metric)[:, :len(self.symbols)].T
+
+    def rows_of(self, months):
+        """
+        The rows of the given month indices that are stored, as a slice when they are
+        consecutive rows (so slicing with it does not copy), else as an index array.
+
+        Returns:
+            A tuple (row selector, the month indices found).
+        """
+        found = [month for month in months if month in self.month_rows]
+        rows = [self.month_rows[month] for month in found]
+        if rows and rows == list(range(rows[0], rows[0] + len(rows))):
+            return slice(rows[0], rows[0] + len(rows)), found
+        return np.asarray(rows, dtype=np.intp), found
+
+    def window(self, metric, months):
+        """
+        The symbols x len(found) values of one metric in the given months (see rows_of).
+
+        Returns:
+            A tuple (values, the month indices found).
+        """
+        rows, found = self.rows_of(months)
+        return self.metric(metric)[rows, :len(self.symbols)].T, found
+
+    def averages_for(self, month_name, window=6):
+        """
+        Averages Rollover% and Rollover cost per symbol over the `window` months before
+        month_name, in the layout returned by calculate_averages. Months are summed oldest
+        first with the compensated summation pandas' groupby mean uses, so the averages
+        round like calculate_averages. A symbol listed twice in a month counts every row
+        (its extra_rows follow the month's first row), like the CSV source.
+        """
+        end = month_index(month_name)
+        months = list(range(end - window, end))
+
+        averages = {}
+        for metric, name in (('Rollover%', 'Avg. Roll Over'), ('Rollover cost', 'Avg. Rollover Cost')):
+            values, found = self.window(metric, months)
+            # Back to the report's float64 2-decimal values
+            values = np.round(values.astype(np.float64), 2)
+            total = np.zeros(len(self.symbols))
+            compensation = np.zeros(len(self.symbols))
+            count = np.zeros(len(self.symbols), dtype=np.int64)
+            metric_position = 1 + METRICS.index(metric)
+            for column, month in enumerate(found):
+                value = values[:, column]
+                valid = ~np.isnan(value)
+                t, c = kahan_step(total, compensation, value)
+                compensation = np.where(valid, c, compensation)
+                total = np.where(valid, t, total)
+                count += valid
+                # Repeated rows follow the month's first row, as in the report
+                for extra in self.extra_rows.get(month, []):
+                    symbol_column, value = extra[0], extra[metric_position]
+                    if value is None:
+                        continue
+                    total[symbol_column], compensation[symbol_column] = kahan_step(
+                        total[symbol_column], compensation[symbol_column], value)
+                    count[symbol_column] += 1
+            with np.errstate(invalid='ignore', divide='ignore'):
+                averages[name] = np.where(count > 0, total / count, np.nan)
+            averages[f"{name} count"] = count
+
+        # Like the groupby, only symbols with a row in one of the months are listed
+        listed = (averages['Avg. Roll Over count'] > 0) | (averages['Avg. Rollover Cost count'] > 0)
+        return pd.DataFrame({
+            'Symbol': np.asarray(self.symbols, dtype=object)[listed],
+            'Avg. Roll Over': averages['Avg. Roll Over'][listed],
+            'Avg. Rollover Cost': averages['Avg. Rollover Cost'][listed],
+        })
+
+    # --- Writing ---
+
+    def _save_dictionary(self):
+        data = {
+            'folder': str(self.folder2_path.resolve()),
+            'capacity': self.capacity,
+            'metrics': METRICS,
+            'symbols': self.symbols,
+            'months': self.months,
+            'extra_rows': {str(month): rows for month, rows in self.extra_rows.items()},
+            'sectors': self.sectors,
+            'stamps': {str(month): stamp for month, stamp in self.stamps.items()},
+        }
+        path = self.folder / 'dictionary.json'
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, path)
+
+    def _grow(self, symbol_count):
+        """
+        Rewrites every metric file with enough capacity for symbol_count symbols.
+        """
+        capacity = self.capacity
+        while capacity < symbol_count:
+            capacity *= 2
+        for metric in METRICS:
+            old = np.array(self.metric(metric))
+            new = np.full((len(self.months), capacity), np.nan, dtype=np.float32)
+            new[:, :self.capacity] = old
+            self._maps.pop(metric, None)
+            new.tofile(self.folder / _metric_filename(metric))
+        self.capacity = capacity
+
+    def write_month(self, month_name, final_df):
+        """
+        Stores one month of a finished report frame: appended as a new row of every metric
+        file, or written over the month's row when it is already stored. The month is stamped
+        with its CSV report (written before).
+        """
+        self.folder.mkdir(parents=True, exist_ok=True)
+        new_symbols = [symbol for symbol in pd.unique(final_df['Symbol']) if symbol not in self.symbol_columns]
+        if len(self.symbols) + len(new_symbols) > self.capacity:
+            self._grow(len(self.symbols) + len(new_symbols))
+        for symbol in new_symbols:
+            self.symbol_columns[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+
+        columns = np.fromiter((self.symbol_columns[symbol] for symbol in final_df['Symbol']), dtype=np.intp,
+                              count=len(final_df))
+        first = ~pd.Series(columns).duplicated().to_numpy()
+        metric_values = {
+            metric: np.round(final_df[metric].to_numpy(dtype=np.float64), 2) if metric in final_df.columns
+            else np.full(len(final_df), np.nan)
+            for metric in METRICS
+        }
+
+        month = month_index(month_name)
+        row = self.month_rows.get(month)
+        if 'Sectoral Index' in final_df.columns and (not self.months or month >= max(self.months)):
+            # Symbols without a sector have the int 0, read back from the CSV as '0'
+            self.sectors.update(zip(final_df['Symbol'], final_df['Sectoral Index'].astype(str)))
+        self.extra_rows.pop(month, None)
+        if not first.all():
+            self.extra_rows[month] = [
+                [int(columns[i])] + [None if np.isnan(metric_values[metric][i]) else float(metric_values[metric][i])
+                                     for metric in METRICS]
+                for i in np.flatnonzero(~first)
+            ]
+
+        for metric in METRICS:
+            values = np.full(self.capacity, np.nan, dtype=np.float32)
+            values[columns[first]] = metric_values[metric][first]
+            path = self.folder / _metric_filename(metric)
+            self._maps.pop(metric, None)
+            if row is None:
+                # The first month starts the file over (a discarded history may have left one)
+                with open(path, 'ab' if self.months else 'wb') as f:
+                    values.tofile(f)
+            else:
+                mapped = np.memmap(path, dtype=np.float32, mode='r+', shape=(len(self.months), self.capacity))
+                mapped[row] = values
+                mapped.flush()
+                del mapped
+
+        if row is None:
+            self.month_rows[month] = len(self.months)
+            self.months.append(month)
+        self.stamps[month] = csv_stamp(self.csv_path(month_name))
+        self._save_dictionary()
+
+    def report_months(self):
+        """
+        The MmmYYYY names of the <Mon><YYYY>_Rollover_Data.csv reports of the CSV folder, oldest first.
+        """
+        reports = []
+        for file_path in self.folder2_path.glob('*_Rollover_Data.csv'):
+            month_name = file_path.name.split('_')[0]
+            try:
+                reports.append((datetime.strptime(month_name, '%b%Y'), month_name))
+            except ValueError:
+                continue
+        return [month_name for _, month_name in sorted(reports)]
+
+    def import_csv_history(self):
+        """
+        Stores every <Mon><YYYY>_Rollover_Data.csv of the CSV folder, oldest month first.
+        """
+        month_names = self.report_months()
+        for month_name in month_names:
+            self.write_month(month_name, pd.read_csv(self.csv_path(month_name), skipinitialspace=True))
+        return month_names
+
+    def refresh(self):
+        """
+        Rewrites the months whose CSV report was written or rewritten since they were stored.
+        A stored month whose CSV report was removed is emptied (its row stays, all NaN).
+
+        Returns:
+            The names of the months that were rewritten.
+        """
+        month_names = {month: month_name_of(month) for month in self.months}
+        month_names.update((month_index(month_name), month_name) for month_name in self.report_months())
+
+        changed = []
+        for month in sorted(month_names):
+            stamp = csv_stamp(self.csv_path(month_names[month]))
+            # Months stored without a stamp (before stamps were kept) count as changed
+            if month in self.stamps and self.stamps[month] == stamp:
+                continue
+            if stamp is None:
+                self.write_month(month_names[month], pd.DataFrame(columns=['Symbol']))
+            else:
+                self.write_month(month_names[month], pd.read_csv(self.csv_path(month_names[month]), skipinitialspace=True))
+            changed.append(month_names[month])
+        return changed
+
+_HISTORIES = {}
+
+def open_for_folder(folder2_path, folder=MATRIX_FOLDER, refresh_months=True):
+    """
+    The MappedHistory of a CSV folder, opened once per process. Every call rewrites the
+    months whose CSV report changed (see MappedHistory.refresh) unless refresh_months is
+    False (e.g. right before the month is written from its report frame anyway). On first
+    use, an empty history is filled with the folder's CSV reports.
+    """
+    key = (str(Path(folder2_path).resolve()), str(Path(folder).resolve()))
+    if key not in _HISTORIES:
+        _HISTORIES[key] = MappedHistory.open(folder2_path, folder)
+    history = _HISTORIES[key]
+    if not history.months:
+        # First use: load the months generated before the history matrix existed
+        print(f"Importing the CSV reports of {folder2_path} into the history matrix...")
+        history.refresh()
+    elif refresh_months:
+        changed = history.refresh()
+        if changed:
+            print(f"History matrix: updated {', '.join(changed)} from {folder2_path}.")
+    return history
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from history_matrix import METRICS
+
+# --- Historical Z-Scores and Percentiles ---
+#
+# Ranks this month's Rollover%, Rollover cost and Basis of every symbol against that symbol's
+# whole history instead of a flat 6-month mean. The history is read from the memory-mapped
+# history matrix (history_matrix.MappedHistory) as one symbols x months slice per column, so
+# the z-scores and percentile ranks of all symbols are a handful of whole-array operations.
+
+STAT_COLUMNS = ['Rollover%', 'Rollover cost', 'Basis']
+
+# The added report columns, e.g. 'Rollover% Z' and 'Rollover% Pctl'
+HISTORY_STAT_COLUMNS = [f"{column} {kind}" for column in STAT_COLUMNS for kind in ('Z', 'Pctl')]
+
+def zscore_and_percentile(history, current):
+    """
+    Z-score and percentile rank of current[i] against the non-NaN values of history[i, :].
+
+    The z-score uses the sample standard deviation and is NaN with fewer than two past
+    values or no spread. The percentile rank is the share of past values below the current
+    one, counting ties as half (like scipy's percentileofscore(kind='mean')), in 0-100.
+
+    Args:
+        history: A float array of shape (symbols, months), NaN where a month has no value.
+        current: A float array of shape (symbols,).
+
+    Returns:
+        A tuple (z-scores, percentile ranks), both of shape (symbols,).
+    """
+    valid = ~np.isnan(history)
+    count = valid.sum(axis=1)
+    current_column = current[:, None]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, history, 0.0).sum(axis=1) / count
+        deviations = np.where(valid, history - mean[:, None], 0.0)
+        std = np.sqrt((deviations ** 2).sum(axis=1) / (count - 1))
+        zscores = (current - mean) / std
+
+        below = (history < current_column).sum(axis=1)
+        ties = (history == current_column).sum(axis=1)
+        percentiles = (below + 0.5 * ties) / count * 100
+
+    zscores[(count < 2) | ~(std > 0)] = np.nan
+    percentiles[(count == 0) | np.isnan(current)] = np.nan
+    return zscores, percentiles
+
+def history_stats(history, month, final_df):
+    """
+    Computes the HISTORY_STAT_COLUMNS of final_df's rows against every month of a
+    history_matrix.MappedHistory before `month`. Symbols without history get NaN. A symbol
+    listed twice in a past month is ranked against that month's last row.
+
+    Returns:
+        A DataFrame of the stat columns, aligned with final_df's index.
+    """
+    past = sorted(m for m in history.months if m < month)
+    rows = pd.Index(history.symbols).get_indexer(final_df['Symbol'])
+    known = rows >= 0
+
+    stats = {}
+    for column in STAT_COLUMNS:
+        values, found = history.window(column, past)
+        # Back to the report's float64 2-decimal values
+        values = np.round(values.astype(np.float64), 2)
+        metric_position = 1 + METRICS.index(column)
+        for position, past_month in enumerate(found):
+            for extra in history.extra_rows.get(past_month, []):
+                value = extra[metric_position]
+                values[extra[0], position] = np.nan if value is None else value
+
+        matrix = np.full((len(rows), len(found)), np.nan)
+        matrix[known] = values[rows[known]]
+        zscores, percentiles = zscore_and_percentile(matrix, final_df[column].to_numpy(dtype=float))
+        stats[f"{column} Z"] = zscores
+        stats[f"{column} Pctl"] = percentiles
+    return pd.DataFrame(stats, index=final_df.index)[HISTORY_STAT_COLUMNS]
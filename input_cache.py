@@ -0,0 +1,137 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from report_inputs import input_source
+
+# --- Parsed Input Cache ---
+#
+# Parsed bhavcopies are stored as Parquet files under .cache/bhavcopy, keyed by the source
+# path, its size and modification time and the read parameters. A later run that reads the
+# same file with the same parameters loads the Parquet copy instead of re-parsing the CSV.
+
+# Bump this when the way inputs are parsed changes, so old cache entries are not reused.
+CACHE_VERSION = 2
+
+CACHE_SETTINGS = {
+    'enabled': True,
+    'rebuild': False,
+    'folder': Path('.cache') / 'bhavcopy',
+    'max_bytes': 512 * 1024 * 1024,
+}
+
+def configure_cache(enabled=True, rebuild=False, folder=None, max_mb=None):
+    """
+    Updates the cache settings used by load_cached (e.g. from the --no-cache,
+    --rebuild-cache and --cache-size-mb command line switches).
+    """
+    CACHE_SETTINGS['enabled'] = enabled
+    CACHE_SETTINGS['rebuild'] = rebuild
+    if folder is not None:
+        CACHE_SETTINGS['folder'] = Path(folder)
+    if max_mb is not None:
+        CACHE_SETTINGS['max_bytes'] = int(max_mb * 1024 * 1024)
+
+def cache_key(path, **params):
+    """
+    Builds the cache key for a file: its resolved path, size and mtime plus the read parameters.
+    Any change to the file on disk produces a new key.
+    """
+    path = Path(path)
+    stat = path.stat()
+    parts = [
+        str(CACHE_VERSION),
+        str(path.resolve()),
+        str(stat.st_size),
+        str(stat.st_mtime_ns),
+        repr(sorted(params.items())),
+    ]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def evict_cache(max_bytes=None):
+    """
+    Deletes the least recently used cache entries until the cache folder fits in max_bytes.
+    Entries are touched on every hit, so their mtime is the last time they were used.
+    """
+    folder = CACHE_SETTINGS['folder']
+    max_bytes = CACHE_SETTINGS['max_bytes'] if max_bytes is None else max_bytes
+    if not folder.exists():
+        return
+
+    entries = []
+    for entry in folder.glob('*.parquet'):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        try:
+            entry.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def load_cached(path, loader, **params):
+    """
+    Returns loader(path), using the Parquet cache when possible.
+
+    Args:
+        path: The input file the frame is parsed from.
+        loader: A callable taking the path and returning the parsed DataFrame.
+        params: Anything that changes what loader returns (e.g. usecols); part of the cache key.
+    """
+    if not CACHE_SETTINGS['enabled'] or not _parquet_available():
+        return loader(path)
+
+    folder = CACHE_SETTINGS['folder']
+    entry = folder / f"{cache_key(path, **params)}.parquet"
+
+    if entry.exists() and not CACHE_SETTINGS['rebuild']:
+        try:
+            df = pd.read_parquet(entry)
+            os.utime(entry) # Mark as recently used for LRU eviction
+            return df
+        except Exception as e:
+            print(f"Warning: Could not read cache entry {entry.name}, re-parsing {Path(path).name}: {e}")
+
+    df = loader(path)
+
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary name first so concurrent readers never see a partial file
+        tmp_entry = entry.with_suffix(f'.{os.getpid()}.tmp')
+        df.to_parquet(tmp_entry, index=False)
+        os.replace(tmp_entry, entry)
+        evict_cache()
+    except Exception as e:
+        print(f"Warning: Could not write cache entry for {Path(path).name}: {e}")
+
+    return df
+
+def read_input_csv(path, **read_kwargs):
+    """
+    pd.read_csv for input files that may be compressed (.zip, .gz or .zst), which are
+    decompressed while they are parsed.
+    """
+    with input_source(path) as source:
+        return pd.read_csv(source, **read_kwargs)
+
+def read_csv_cached(path, **read_kwargs):
+    """
+    Cached equivalent of read_input_csv(path, **read_kwargs).
+    """
+    return load_cached(path, lambda p: read_input_csv(p, **read_kwargs), **read_kwargs)
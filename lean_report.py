@@ -0,0 +1,287 @@
+import argparse
+import csv
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from report_inputs import FOLDER2, open_input, resolve_report_inputs
+from report_math import kahan_mean, shift_month
+
+# --- Lean CSV Report Engine ---
+#
+# Computes generated_csv_data/<Mon><YYYY>_Rollover_Data.csv for the FUTSTK rows with the csv
+# module and NumPy only. It uses the same formulas, joins, rounding and sort order as
+# generate_rollover_report but never imports pandas, dateutil or xlsxwriter, which makes it
+# the cheaper option for scheduled jobs that only need the CSV report. Run this script
+# directly for that: `generate_files.py --engine lean` gives the same report but has already
+# imported pandas by the time it dispatches here.
+#
+# Only the CSV report is written: the sector summary and the index report need the pandas
+# engine. The rolling average store, the history database and the history matrix stamp every
+# month with its CSV, so they read a month written here on their next use.
+
+CONTRACT_RE = re.compile(r'^FUTSTK([A-Z0-9]+)(\d{2}-[A-Z]{3}-\d{4})$')
+INDEX_CONTRACT_RE = re.compile(r'^FUTIDX([A-Z0-9]+)(\d{2}-[A-Z]{3}-\d{4})$')
+
+OUTPUT_COLUMNS = [
+    'Sectoral Index', 'Symbol', 'Spot', 'Future Price', 'Basis', 'Rollover%',
+    'Avg. Roll Over', 'Rollover cost', 'Avg. Rollover Cost',
+    'Diff Rollover%', 'Diff Rollover Cost', 'M_o_M%', 'Next_M_o_M%'
+]
+
+@contextmanager
+def _open_csv(file_path):
+    # Compressed inputs (.zip, .gz, .zst) are decompressed as they are read
+    with open_input(file_path) as f:
+        yield csv.reader(f, skipinitialspace=True)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return float('nan')
+
+def read_futures(file1_path):
+    """
+    Parses the FUTSTK rows of a futures bhavcopy.
+
+    Returns:
+        {symbol: [(contract date, CLOSE_PRIC, OI_NO_CON), ...]} with contracts sorted by date.
+    """
+    with _open_csv(file1_path) as reader:
+        header = next(reader)
+        contract_col = header.index('CONTRACT_D')
+        close_col = header.index('CLOSE_PRIC')
+        oi_col = header.index('OI_NO_CON')
+
+        contracts = {}
+        unparsed = 0
+        for row in reader:
+            match = CONTRACT_RE.match(row[contract_col])
+            if not match:
+                # Index futures are valid contracts, they are just not part of this report
+                if not INDEX_CONTRACT_RE.match(row[contract_col]):
+                    unparsed += 1
+                continue
+            try:
+                contract_date = datetime.strptime(match.group(2), '%d-%b-%Y')
+            except ValueError:
+                unparsed += 1
+                continue
+            contracts.setdefault(match.group(1), []).append((contract_date, _to_float(row[close_col]), _to_float(row[oi_col])))
+
+    if unparsed:
+        print(f"Warning: Skipped {unparsed} contract rows that do not match the FUT<STK|IDX><SYMBOL><DD-MMM-YYYY> format.")
+
+    for symbol_contracts in contracts.values():
+        symbol_contracts.sort(key=lambda c: c[0])
+    return contracts
+
+def read_spot(file_path, symbols):
+    """
+    Reads the CLOSE_PRICE of the EQ series rows of the given symbols from an equity bhavcopy,
+    one line at a time.
+
+    Returns:
+        {symbol: [close, ...]} in file order.
+    """
+    with _open_csv(file_path) as reader:
+        header = next(reader)
+        symbol_col = header.index('SYMBOL')
+        series_col = header.index('SERIES')
+        close_col = header.index('CLOSE_PRICE')
+
+        closes = {}
+        for row in reader:
+            if row[symbol_col] in symbols and row[series_col] == 'EQ':
+                closes.setdefault(row[symbol_col], []).append(_to_float(row[close_col]))
+    return closes
+
+def read_sectors(file4_path):
+    """
+    Reads the first Sectoral Index listed for every Symbol in index.csv.
+    """
+    with _open_csv(file4_path) as reader:
+        header = next(reader)
+        sector_col = header.index('Sectoral Index')
+        symbol_col = header.index('Symbol')
+
+        sectors = {}
+        for row in reader:
+            sectors.setdefault(row[symbol_col], row[sector_col])
+    return sectors
+
+def read_history_averages(folder2_path, month_name, window=6):
+    """
+    Averages Rollover% and Rollover cost per symbol over the `window` monthly CSV reports
+    before month_name. Months without a report are left out.
+
+    Returns:
+        {symbol: (Avg. Roll Over, Avg. Rollover Cost)}
+    """
+    pcts = {}
+    costs = {}
+    for offset in range(window, 0, -1):
+        file_path = Path(folder2_path) / f"{shift_month(month_name, -offset)}_Rollover_Data.csv"
+        if not file_path.exists():
+            continue
+        with _open_csv(file_path) as reader:
+            header = next(reader)
+            symbol_col = header.index('Symbol')
+            pct_col = header.index('Rollover%')
+            cost_col = header.index('Rollover cost')
+            for row in reader:
+                pct = _to_float(row[pct_col])
+                cost = _to_float(row[cost_col])
+                pct_values = pcts.setdefault(row[symbol_col], [])
+                cost_values = costs.setdefault(row[symbol_col], [])
+                if pct == pct:
+                    pct_values.append(pct)
+                if cost == cost:
+                    cost_values.append(cost)
+    # Same summation as pandas' groupby mean, so the averages round identically
+    return {symbol: (kahan_mean(pcts[symbol]), kahan_mean(costs[symbol])) for symbol in pcts}
+
+def _format(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return str(value)
+    return '' if value != value else '%.2f' % value
+
+def generate_lean_report(month_year, folder2=FOLDER2, window=6):
+    """
+    Generates the CSV rollover report of a MMMYY month without pandas.
+    """
+    inputs = resolve_report_inputs(month_year)
+    folder2_path = Path(folder2)
+    folder2_path.mkdir(parents=True, exist_ok=True)
+
+    # 1. Futures columns
+    contracts = read_futures(inputs['file1'])
+    if not contracts:
+        print("Error: No valid symbols found in futures data.")
+        return None
+
+    current_month_names = {symbol: c[0][0].strftime('%b%Y') for symbol, c in sorted(contracts.items())}
+    current_month_name = max(set(current_month_names.values()), key=list(current_month_names.values()).count)
+
+    futures = {}
+    skipped = []
+    for symbol in sorted(contracts):
+        symbol_contracts = contracts[symbol]
+        if len(symbol_contracts) < 2:
+            skipped.append(symbol)
+            continue
+        _, curr_close, curr_oi = symbol_contracts[0]
+        _, next_close, next_oi = symbol_contracts[1]
+        next_to_next_oi = symbol_contracts[2][2] if len(symbol_contracts) > 2 else 0
+        total_oi = curr_oi + next_oi + next_to_next_oi
+        rollover_pct = 0.0 if total_oi == 0 else (next_oi + next_to_next_oi) / total_oi * 100
+        futures[symbol] = (next_close, rollover_pct, next_close - curr_close)
+    if skipped:
+        print(f"Skipping {len(skipped)} symbols with less than 2 contract months available: {', '.join(skipped)}")
+
+    # 2. Spot joins (inner joins, like generate_rollover_report)
+    spot = read_spot(inputs['file2'], futures)
+    prev_spot = read_spot(inputs['file3'], futures)
+    next_spot = read_spot(inputs['file5'], futures) if inputs['file5'] != "" else None
+    sectors = read_sectors(inputs['file4'])
+    averages = read_history_averages(folder2_path, current_month_name, window)
+
+    rows = []
+    for symbol, (future_price, rollover_pct, cost_numerator) in futures.items():
+        for spot_close in spot.get(symbol, []):
+            for prev_close in prev_spot.get(symbol, []):
+                for next_close in (next_spot.get(symbol, []) if next_spot is not None else [None]):
+                    rows.append((symbol, spot_close, prev_close, next_close, future_price, rollover_pct, cost_numerator))
+
+    if not rows:
+        print("Error: No valid rollover calculations could be performed.")
+        return None
+
+    # 3. Whole-column calculations
+    symbols = [r[0] for r in rows]
+    spot_arr = np.array([r[1] for r in rows], dtype=float)
+    prev_arr = np.array([r[2] for r in rows], dtype=float)
+    future_arr = np.array([r[4] for r in rows], dtype=float)
+    rollover_arr = np.array([r[5] for r in rows], dtype=float)
+    numerator_arr = np.array([r[6] for r in rows], dtype=float)
+
+    basis = future_arr - spot_arr
+    rollover_cost = (numerator_arr / spot_arr) * 100
+    mom = (spot_arr - prev_arr) / prev_arr * 100
+    if next_spot is not None:
+        next_arr = np.array([r[3] for r in rows], dtype=float)
+        next_mom = (next_arr - spot_arr) / spot_arr * 100
+    else:
+        next_mom = None
+
+    avg_pct = np.array([averages.get(s, (np.nan, np.nan))[0] for s in symbols], dtype=float)
+    avg_cost = np.array([averages.get(s, (np.nan, np.nan))[1] for s in symbols], dtype=float)
+    # Missing averages count as 0, like the fillna(0) after the pandas join
+    avg_pct = np.nan_to_num(avg_pct, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    avg_cost = np.nan_to_num(avg_cost, nan=0.0, posinf=np.inf, neginf=-np.inf)
+
+    diff_pct = rollover_arr - avg_pct
+    diff_cost = rollover_cost - avg_cost
+
+    columns = {
+        'Spot': np.round(spot_arr, 2),
+        'Future Price': np.round(future_arr, 2),
+        'Basis': np.round(basis, 2),
+        'Rollover%': np.round(rollover_arr, 2),
+        'Avg. Roll Over': np.round(avg_pct, 2),
+        'Rollover cost': np.round(rollover_cost, 2),
+        'Avg. Rollover Cost': np.round(avg_cost, 2),
+        'Diff Rollover%': np.round(diff_pct, 2),
+        'Diff Rollover Cost': np.round(diff_cost, 2),
+        'M_o_M%': np.round(mom, 2),
+        'Next_M_o_M%': np.round(next_mom, 2) if next_mom is not None else None,
+    }
+
+    # 4. Sort by sectoral index (symbols without one sort first as 0), then by symbol
+    sector_values = [sectors.get(s) or 0 for s in symbols]
+    order = sorted(range(len(rows)), key=lambda i: (str(sector_values[i]), symbols[i]))
+
+    output_path = folder2_path / f"{current_month_name}_Rollover_Data.csv"
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(OUTPUT_COLUMNS)
+        for i in order:
+            row = [sector_values[i], symbols[i]]
+            for column in OUTPUT_COLUMNS[2:]:
+                values = columns[column]
+                row.append(0 if values is None else float(values[i]))
+            writer.writerow([_format(v) for v in row])
+
+    print(f"\nSuccessfully generated report: {output_path.name}")
+    print(f"Output saved to: {output_path.resolve()}")
+    return output_path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Generates the CSV Stock Rollover Data report without pandas (FUTSTK rows only)."
+    )
+    parser.add_argument(
+        'month_year',
+        type=str,
+        nargs='?',
+        default='',
+        help='The month and year (MMMYY) for the report (e.g., DEC25). Defaults to current month/year.'
+    )
+    parser.add_argument(
+        '--avg-window',
+        type=int,
+        default=6,
+        help='Number of previous months used for the historical averages.'
+    )
+    args = parser.parse_args()
+
+    try:
+        generate_lean_report(args.month_year, window=args.avg_window)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}")
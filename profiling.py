@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# --- Stage Profiling ---
+#
+# Named pipeline stages (read futures, rollover calc, spot joins, ...) record their wall time,
+# the rows going in and out and, when profiling is on, their peak traced memory. Stages are
+# not nested, so each stage's tracemalloc peak belongs to that stage alone. With profiling
+# off a stage only costs two perf_counter calls.
+#
+# tracemalloc's peak is process-wide, so only stages on the main thread measure it. Stages
+# that overlap on a thread pool run inside a concurrent_stage: they keep their wall time and
+# rows, and the enclosing block records the peak memory of all of them together. Stages run
+# in pool worker processes are sent back with each task's result (see run_profiled) and
+# merged into this process's records.
+
+PROFILE_SETTINGS = {
+    'enabled': False,
+    'format': 'table',
+}
+
+STAGE_RECORDS = []
+
+class StageRecord:
+    """
+    Measurements of one run of a stage. rows_in / rows_out are filled in by the caller.
+    """
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_seconds = 0.0
+        self.peak_bytes = None
+        self.within = None # The concurrent_stage this stage ran in
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'wall_ms': round(self.wall_seconds * 1000, 3),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'peak_mb': None if self.peak_bytes is None else round(self.peak_bytes / (1024 * 1024), 3),
+            'within': self.within,
+        }
+
+# The name of the concurrent_stage currently running, if any
+_CONCURRENT = {'name': None}
+
+def configure_profiling(enabled=False, output_format='table'):
+    """
+    Turns stage profiling on or off (e.g. from the --profile command line switch).
+    Memory tracing starts here, because tracemalloc only sees allocations made after it starts.
+    """
+    PROFILE_SETTINGS['enabled'] = enabled
+    PROFILE_SETTINGS['format'] = output_format
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    Times the enclosed block as one stage and yields its StageRecord:
+
+        with stage('spot joins', rows_in=len(final_df)) as record:
+            ...
+            record.rows_out = len(final_df)
+    """
+    record = StageRecord(name, rows_in)
+    profiling = PROFILE_SETTINGS['enabled']
+    record.within = _CONCURRENT['name']
+    measure_memory = profiling and record.within is None and threading.current_thread() is threading.main_thread()
+    if measure_memory:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.wall_seconds = time.perf_counter() - start
+        if measure_memory:
+            record.peak_bytes = tracemalloc.get_traced_memory()[1]
+        if profiling:
+            STAGE_RECORDS.append(record)
+
+@contextmanager
+def concurrent_stage(name, rows_in=None):
+    """
+    Times a block whose stages overlap on a thread pool as one stage (see stage). The stages
+    inside record no peak memory of their own; the block's peak covers all of them.
+    """
+    with stage(name, rows_in) as record:
+        _CONCURRENT['name'] = name
+        try:
+            yield record
+        finally:
+            _CONCURRENT['name'] = None
+
+def take_stage_records():
+    """
+    Removes and returns the stages recorded so far.
+    """
+    records = list(STAGE_RECORDS)
+    del STAGE_RECORDS[:]
+    return records
+
+def merge_stage_records(records):
+    """
+    Adds stages recorded in another process (see run_profiled) to this process's records.
+    """
+    STAGE_RECORDS.extend(records)
+
+def run_profiled(func, *args):
+    """
+    Process pool task: runs func(*args) and returns (its result, the stages it recorded), so
+    the parent can merge the worker's stages with merge_stage_records.
+    """
+    take_stage_records()
+    result = func(*args)
+    return result, take_stage_records()
+
+def print_profile_report():
+    """
+    Prints the recorded stages as a table or as JSON, per the configured format.
+    """
+    if not PROFILE_SETTINGS['enabled']:
+        return
+    records = [record.as_dict() for record in STAGE_RECORDS]
+    if PROFILE_SETTINGS['format'] == 'json':
+        total_ms = sum(r['wall_ms'] for r in records if r['within'] is None)
+        print(json.dumps({'stages': records, 'total_ms': round(total_ms, 3)}, indent=2))
+        return
+
+    def cell(value):
+        return '' if value is None else str(value)
+
+    print("\n--- Stage Profile ---")
+    print(f"{'Stage':<22}{'Wall (ms)':>12}{'Rows in':>10}{'Rows out':>10}{'Peak (MB)':>12}")
+    for r in records:
+        # Stages of a concurrent block are indented; their time is part of the block's
+        name = r['stage'] if r['within'] is None else f"  {r['stage']}"
+        print(f"{name:<22}{r['wall_ms']:>12.1f}{cell(r['rows_in']):>10}{cell(r['rows_out']):>10}{cell(r['peak_mb']):>12}")
+    print(f"{'total':<22}{sum(r['wall_ms'] for r in records if r['within'] is None):>12.1f}")
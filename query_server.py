@@ -0,0 +1,296 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from generate_files import (
+    AVERAGE_SETTINGS, FOLDER1, FOLDER2, ensure_output_folders, find_available_months, parse_month_range,
+    record_month_history, report_columns, write_csv_report, write_index_report, write_sector_report,
+)
+from report_inputs import resolve_report_inputs
+from report_math import shift_month
+from watch_mode import WatchState, _file_stamp, month_code
+
+logger = logging.getLogger('rollover')
+
+# --- Report Query Server ---
+#
+# A local HTTP/JSON service over the report pipeline, so looking up a few symbols does not
+# mean opening a workbook or re-running the script. The finalized report frames of the most
+# recently used months stay in memory (least recently used months are evicted first), together
+# with the parsed inputs they were built from. A month that is not in memory is computed with
+# the same steps as generate_rollover_report; its CSV reports are written if they do not exist
+# yet. A cached month is recomputed when one of its input files, or the report CSV of a month
+# its averages come from, changed.
+#
+#   GET /report?month=NOV25                     every row of one month
+#   GET /report?range=AUG25:NOV25&symbol=TCS     one symbol over a month range
+#   GET /report?month=NOV25&sector=NIFTY IT&signal=Long Rolls
+#   GET /months                                 the cached and the available months
+#
+# symbol, sector and signal accept several comma-separated values or repeated parameters.
+
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+CACHE_MONTHS = 12
+
+# Columns of a query result besides report_columns: the month and the signal bucket
+QUERY_COLUMNS = ['Month', 'Signal']
+
+INPUT_KEYS = ('file1', 'file2', 'file3', 'file4', 'file5', 'index_close', 'prev_index_close')
+
+class ReportCache:
+    """
+    The finalized report frames of the last `capacity` months used, keyed by the first day of
+    the month. The parsed input frames are kept for as long as a cached month uses them.
+
+    A cached month is keyed on the stamps of its input files and of the _Rollover_Data.csv
+    files its averages come from, so regenerating an earlier month recomputes it. Lookups only
+    hold `lock` briefly. A month that has to be computed is computed outside it, once: other
+    requests for the same month wait for its future. Computations run one at a time
+    (`compute_lock`), because they share the parsed inputs, the average store and the history
+    database.
+    """
+
+    def __init__(self, folder1=FOLDER1, folder2=FOLDER2, capacity=CACHE_MONTHS):
+        self.state = WatchState(folder1, folder2, csv_only=True)
+        self.capacity = capacity
+        self.reports = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.compute_lock = threading.Lock()
+
+    def month(self, month_dt):
+        """
+        Returns the finalized report frame of a month, computing it if it is not cached or one
+        of its inputs or history files changed.
+
+        Raises:
+            FileNotFoundError: The month's input files are not all present.
+            LookupError: The futures file has no rows to report.
+        """
+        with self.lock:
+            entry = self.reports.get(month_dt)
+            if entry is not None and entry[0] == self._stamps(entry[1]):
+                self.reports.move_to_end(month_dt)
+                return entry[2]
+            future = self.pending.get(month_dt)
+            owner = future is None
+            if owner:
+                future = self.pending[month_dt] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            with self.compute_lock:
+                paths, final_df = self._compute(month_dt)
+        except BaseException as e:
+            with self.lock:
+                del self.pending[month_dt]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self.reports[month_dt] = (self._stamps(paths), paths, final_df)
+            self.reports.move_to_end(month_dt)
+            while len(self.reports) > self.capacity:
+                evicted, _ = self.reports.popitem(last=False)
+                self._evict(evicted)
+            del self.pending[month_dt]
+        future.set_result(final_df)
+        return final_df
+
+    def cached_months(self):
+        with self.lock:
+            return [month_code(month_dt) for month_dt in self.reports]
+
+    @staticmethod
+    def _stamps(input_paths):
+        return tuple(_file_stamp(p) if p != "" else None for p in input_paths)
+
+    def _history_paths(self, current_month_name):
+        """
+        The _Rollover_Data.csv files of the months a month's averages are taken from.
+        """
+        return [str(self.state.folder2_path / f"{shift_month(current_month_name, -offset)}_Rollover_Data.csv")
+                for offset in range(1, AVERAGE_SETTINGS['window'] + 1)]
+
+    def _compute(self, month_dt):
+        """
+        Computes one month.
+
+        Returns:
+            A tuple (the month's input paths followed by its history CSV paths, final_df).
+        """
+        start = time.perf_counter()
+        inputs = resolve_report_inputs(month_code(month_dt), give_error=False)
+        report = self.state.finalize_month(month_dt, inputs)
+        if report is None:
+            raise LookupError(f"The futures file of {month_code(month_dt)} has no contracts to report.")
+        final_df, index_df, current_month_name = report
+
+        folder2_path = self.state.folder2_path
+        if not (folder2_path / f"{current_month_name}_Rollover_Data.csv").exists():
+            write_csv_report(final_df, folder2_path, current_month_name)
+            write_index_report(index_df, folder2_path, current_month_name)
+            write_sector_report(final_df, folder2_path, current_month_name)
+            record_month_history(final_df, folder2_path, current_month_name)
+
+        final_df = final_df[report_columns(final_df) + ['Signal']].copy()
+        final_df.insert(0, 'Month', month_code(month_dt))
+        print(f"Computed {current_month_name} in {time.perf_counter() - start:.2f}s")
+        input_paths = [str(inputs[key]) if inputs[key] != "" else "" for key in INPUT_KEYS]
+        return input_paths + self._history_paths(current_month_name), final_df
+
+    def _evict(self, month_dt):
+        """
+        Drops an evicted month's build and the parsed inputs no cached month still uses.
+        """
+        self.state.builds.pop(month_dt, None)
+        in_use = {p for entry in self.reports.values() for p in entry[1]}
+        for key in [k for k in self.state.frames if k[0] not in in_use]:
+            del self.state.frames[key]
+
+# --- Queries ---
+
+def _values(params, name):
+    """
+    The comma-separated and repeated values of a query parameter, or None when it is absent.
+    """
+    values = [value.strip() for raw in params.get(name, []) for value in raw.split(',') if value.strip()]
+    return values or None
+
+def query_months(params):
+    """
+    The MMMYY months a query covers: 'month', 'range' (MMMYY:MMMYY) or 'from'/'to', else the
+    latest month with a futures file.
+    """
+    if 'range' in params:
+        return parse_month_range(params['range'][0])
+    if 'from' in params or 'to' in params:
+        available = find_available_months()
+        if not available and not ('from' in params and 'to' in params):
+            raise FileNotFoundError("No futures files found.")
+        start = params.get('from', available[:1])[0]
+        end = params.get('to', available[-1:])[0]
+        return parse_month_range(f"{start}:{end}")
+    months = _values(params, 'month')
+    if months:
+        for month in months:
+            try:
+                datetime.strptime(month, '%b%y')
+            except ValueError:
+                raise ValueError(f"Month {month} must be in MMMYY format (e.g., NOV25).")
+        return [month.upper() for month in months]
+    available = find_available_months()
+    if not available:
+        raise FileNotFoundError("No futures files found.")
+    return available[-1:]
+
+def filter_report(final_df, symbols=None, sectors=None, signals=None):
+    """
+    The rows of a report frame matching every given filter (any of its values).
+    """
+    mask = pd.Series(True, index=final_df.index)
+    if symbols:
+        mask &= final_df['Symbol'].isin([symbol.upper() for symbol in symbols])
+    if sectors:
+        # Symbols without a sector have the int 0 as their Sectoral Index
+        mask &= final_df['Sectoral Index'].astype(str).isin(sectors)
+    if signals:
+        mask &= final_df['Signal'].isin(signals)
+    return final_df[mask]
+
+def run_query(cache, params):
+    """
+    Answers a /report query.
+
+    Returns:
+        A JSON-ready dict with the months covered, the months skipped for missing inputs and
+        the matching rows.
+    """
+    months = query_months(params)
+    symbols, sectors, signals = _values(params, 'symbol'), _values(params, 'sector'), _values(params, 'signal')
+
+    frames = []
+    missing = []
+    for month in months:
+        try:
+            final_df = cache.month(datetime.strptime(month, '%b%y'))
+        except (FileNotFoundError, LookupError):
+            missing.append(month)
+            continue
+        frames.append(filter_report(final_df, symbols, sectors, signals))
+
+    rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=QUERY_COLUMNS)
+    return {
+        'months': [month for month in months if month not in missing],
+        'missing_months': missing,
+        'count': len(rows),
+        'rows': json.loads(rows.to_json(orient='records')),
+    }
+
+# --- HTTP ---
+
+class QueryHandler(BaseHTTPRequestHandler):
+    cache = None
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        try:
+            if url.path == '/report':
+                payload = run_query(self.cache, params)
+            elif url.path == '/months':
+                payload = {'cached': self.cache.cached_months(), 'available': find_available_months()}
+            else:
+                self._send(404, {'error': f"Unknown path {url.path}. Use /report or /months."})
+                return
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+        except FileNotFoundError as e:
+            self._send(404, {'error': str(e)})
+            return
+        except Exception as e:
+            logger.exception("Query %s failed", self.path)
+            self._send(500, {'error': f"An unexpected error occurred: {e}"})
+            return
+
+        payload['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        self._send(200, payload)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+def run_query_server(folder1=FOLDER1, folder2=FOLDER2, host=SERVER_HOST, port=SERVER_PORT, capacity=CACHE_MONTHS):
+    """
+    Serves report queries until interrupted (Ctrl+C).
+    """
+    ensure_output_folders(Path(folder1), Path(folder2))
+    QueryHandler.cache = ReportCache(folder1, folder2, capacity)
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    print(f"Serving report queries on http://{host}:{port}/report (keeping {capacity} months in memory, Ctrl+C to stop)...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped serving.")
+    finally:
+        server.server_close()
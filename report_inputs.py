@@ -0,0 +1,418 @@
+import calendar
+import csv
+import gzip
+import io
+import re
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# --- Expiry Dates and Input Files ---
+#
+# Expiry date calculation and input file resolution. This module only uses the standard
+# library so that lean_report.py can resolve a month's inputs without importing pandas.
+
+# Standard folder names
+FOLDER1 = "generated_data"
+FOLDER2 = "generated_csv_data"
+FO_FOLDER = "fo_data"
+EQUITY_FOLDER = "equity_data"
+INDEX_FILE = "index.csv" # File 4 does not use date
+INDEX_CLOSE_FOLDER = "index_data" # Daily index closes (ind_close_all_<DDMMYYYY>.csv), optional
+
+# Compressed variants of an input file, looked for after the plain .csv: both
+# fo251125.csv.gz and fo251125.gz are accepted for fo251125.csv.
+COMPRESSED_SUFFIXES = ['.zip', '.gz', '.zst']
+
+# Trading holidays (one date per row, DD-Mon-YYYY like the NSE holiday list, or YYYY-MM-DD),
+# optional. An expiry falling on a holiday moves to the previous trading day.
+HOLIDAYS_FILE = "holidays.csv"
+
+# (first month, expiry weekday) from that month on: the last Thursday until August 2025,
+# the last Tuesday from September 2025 (0=Mon, 6=Sun)
+EXPIRY_WEEKDAYS = [
+    (datetime(1900, 1, 1), calendar.THURSDAY),
+    (datetime(2025, 9, 1), calendar.TUESDAY),
+]
+
+def get_last_weekday_of_month(year, month, weekday):
+    """
+    Calculates the date of the last specified weekday (0=Mon, 6=Sun) of a given month.
+    """
+    _, num_days = calendar.monthrange(year, month)
+    last_day = datetime(year, month, num_days)
+    return last_day - timedelta(days=(last_day.weekday() - weekday) % 7)
+
+def expiry_weekday(year, month):
+    """
+    The weekday of the monthly expiry in a given month, from EXPIRY_WEEKDAYS.
+    """
+    month_start = datetime(year, month, 1)
+    return [weekday for start, weekday in EXPIRY_WEEKDAYS if start <= month_start][-1]
+
+def read_holidays(file_path=HOLIDAYS_FILE):
+    """
+    Reads the trading holidays file. A missing file means no holidays.
+
+    Returns:
+        A set of datetimes.
+    """
+    holidays = set()
+    path = Path(file_path)
+    if not path.exists():
+        return holidays
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip():
+                continue
+            for date_format in ('%d-%b-%Y', '%Y-%m-%d', '%d-%m-%Y'):
+                try:
+                    holidays.add(datetime.strptime(row[0].strip(), date_format))
+                    break
+                except ValueError:
+                    continue
+    return holidays
+
+class ExpiryCalendar:
+    """
+    The monthly expiry date of every month from first_year to last_year, computed once.
+    An expiry on a weekend or holiday moves back to the previous trading day. Months outside
+    the table are computed (and added) on first use.
+    """
+
+    def __init__(self, holidays=(), first_year=2000, last_year=2040):
+        self.holidays = set(holidays)
+        self.expiries = {}
+        for year in range(first_year, last_year + 1):
+            for month in range(1, 13):
+                self.expiries[(year, month)] = self._compute(year, month)
+
+    def _compute(self, year, month):
+        expiry_date = get_last_weekday_of_month(year, month, expiry_weekday(year, month))
+        while expiry_date in self.holidays or expiry_date.weekday() >= 5:
+            expiry_date -= timedelta(days=1)
+        return expiry_date
+
+    def expiry(self, year, month):
+        key = (year, month)
+        if key not in self.expiries:
+            self.expiries[key] = self._compute(year, month)
+        return self.expiries[key]
+
+_EXPIRY_CALENDARS = {}
+
+def expiry_calendar(holidays_file=HOLIDAYS_FILE):
+    """
+    The expiry calendar with the holidays of holidays_file, built once per process and
+    rebuilt when the file changes.
+    """
+    path = Path(holidays_file)
+    stamp = path.stat().st_mtime_ns if path.exists() else None
+    cached = _EXPIRY_CALENDARS.get(str(path))
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, ExpiryCalendar(read_holidays(path)))
+        _EXPIRY_CALENDARS[str(path)] = cached
+    return cached[1]
+
+def calculate_expiry_date(year, month, give_error):
+    """
+    Looks up the expiry date (last Thursday or last Tuesday, moved back over holidays) of
+    a given month/year in the expiry calendar.
+    """
+    expiry_date = expiry_calendar().expiry(year, month)
+
+    current_datetime = datetime.now()
+
+    if current_datetime < expiry_date and give_error:
+        raise ValueError(f"Current date {current_datetime} is less than expiry date for {expiry_date}")
+
+    return expiry_date
+
+def get_curr_and_prev_month_dates(input_month_year, give_error=True):
+    """
+    Parses the input MMMYY string, calculates current and previous month's expiry dates,
+    and returns them in DDMMYY format, with an optional DDMMYYYY fallback.
+    With give_error=False a month whose expiry is still ahead is accepted (watch mode
+    decides by the files that are present instead).
+    """
+    if input_month_year:
+        # Parse the input string (e.g., 'DEC-25')
+        try:
+            current_month_dt = datetime.strptime(input_month_year, '%b%y')
+        except ValueError:
+            raise ValueError("Input format must be MMMYY (e.g., DEC25).")
+    else:
+        # Use current month and year if input is empty
+        current_month_dt = datetime.now()
+
+    curr_year = current_month_dt.year
+    curr_month = current_month_dt.month
+
+    # Calculate Current Month Date
+    curr_month_expiry = calculate_expiry_date(curr_year, curr_month, give_error)
+    curr_month_date_6 = curr_month_expiry.strftime('%d%m%y')
+    curr_month_date_8 = curr_month_expiry.strftime('%d%m%Y')
+
+
+    # Calculate Previous Month Date
+    # Go back one month
+    if curr_month == 1:
+        prev_month = 12
+        prev_year = curr_year - 1
+    else:
+        prev_month = curr_month - 1
+        prev_year = curr_year
+
+    if curr_month == 12:
+        next_month = 1
+        next_year = curr_year + 1
+    else:
+        next_month = curr_month + 1
+        next_year = curr_year
+
+    prev_month_expiry = calculate_expiry_date(prev_year, prev_month, give_error)
+    prev_month_date_6 = prev_month_expiry.strftime('%d%m%y')
+    prev_month_date_8 = prev_month_expiry.strftime('%d%m%Y')
+
+    next_month_expiry = calculate_expiry_date(next_year, next_month, False)
+    next_month_date_6 = next_month_expiry.strftime('%d%m%y')
+    next_month_date_8 = next_month_expiry.strftime('%d%m%Y')
+
+    return {
+        'curr_6': curr_month_date_6,
+        'curr_8': curr_month_date_8,
+        'prev_6': prev_month_date_6,
+        'prev_8': prev_month_date_8,
+        'next_6': next_month_date_6,
+        'next_8': next_month_date_8,
+        'current_month_name': curr_month_expiry.strftime('%b%Y'),
+        'curr_expiry': curr_month_expiry,
+        'prev_expiry': prev_month_expiry,
+        'next_expiry': next_month_expiry,
+    }
+
+# --- Compressed Inputs ---
+
+def input_variants(file_path):
+    """
+    The names an input file may have on disk, in lookup order: the plain name, then
+    <name>.csv.<ext> and <name>.<ext> for every compressed suffix.
+    """
+    path = Path(file_path)
+    variants = [path]
+    for suffix in COMPRESSED_SUFFIXES:
+        variants.append(path.with_name(path.name + suffix))
+        variants.append(path.with_suffix(suffix))
+    return variants
+
+def find_input(file_path):
+    """
+    Returns the first existing variant of file_path (see input_variants), or None.
+    """
+    for variant in input_variants(file_path):
+        if variant.exists():
+            return variant
+    return None
+
+def is_compressed(file_path):
+    return Path(file_path).suffix in COMPRESSED_SUFFIXES
+
+def open_input(file_path):
+    """
+    Opens an input file as a text stream, decompressing .gz, .zip and .zst files on the fly.
+    A zip archive is read from its first .csv member. Reading .zst files needs the optional
+    zstandard package.
+    """
+    path = Path(file_path)
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rt', newline='')
+    if path.suffix == '.zip':
+        return io.TextIOWrapper(open_zip_member(path), newline='')
+    if path.suffix == '.zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f"Reading {path.name} needs the zstandard package (pip install zstandard).")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True), newline='')
+    return open(path, newline='')
+
+def open_zip_member(file_path):
+    """
+    Opens the first .csv member (else the first file) of a zip archive as a binary stream.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        members = [name for name in archive.namelist() if not name.endswith('/')]
+        if not members:
+            raise FileNotFoundError(f"No file found in archive {file_path}")
+        member = next((name for name in members if name.lower().endswith('.csv')), members[0])
+        # The member stream keeps the archive file open after the ZipFile is closed
+        return archive.open(member)
+
+@contextmanager
+def input_source(file_path):
+    """
+    Yields something pd.read_csv can read: the path itself for a plain file (so pandas
+    reads it directly), or a decompressing text stream that is closed on exit.
+    """
+    if not is_compressed(file_path):
+        yield file_path
+        return
+    stream = open_input(file_path)
+    try:
+        yield stream
+    finally:
+        stream.close()
+
+# --- Input File Resolution ---
+
+def try_file_read(file_path_6, file_path_8, file_type, give_empty_string):
+    """
+    Tries to read or generate a file using DDMMYY, falls back to DDMMYYYY.
+    For either name the plain .csv is preferred over a .zip, .gz or .zst variant.
+    """
+    path_6 = find_input(file_path_6)
+    path_8 = find_input(file_path_8)
+
+    # 1. Try to read the file in DDMMYY format
+    if path_6 is not None:
+        return str(path_6)
+
+    # 2. Try to read the file in DDMMYYYY format
+    elif path_8 is not None:
+        return str(path_8)
+
+    # 3. If neither exists, generate mock data (for demonstration purposes)
+    else:
+        if give_empty_string:
+            return ""
+        raise FileNotFoundError(f"Could not generate or find file for type {file_type} at {file_path_6} or {file_path_8}")
+
+def resolve_report_inputs(month_year, give_error=True):
+    """
+    Calculates the expiry dates for a MMMYY month and locates its input files.
+
+    Returns:
+        A dict with the 'dates' from get_curr_and_prev_month_dates and the resolved
+        'file1' (futures), 'file2' (current spot), 'file3' (previous spot),
+        'file4' (sectoral index) and 'file5' (next spot, "" if missing) paths, plus the
+        'index_close' and 'prev_index_close' index close files used for the index futures
+        ("" if missing). give_error is passed on to get_curr_and_prev_month_dates.
+    """
+    dates = get_curr_and_prev_month_dates(month_year, give_error)
+    curr_expiry, prev_expiry, next_expiry = dates['curr_expiry'], dates['prev_expiry'], dates['next_expiry']
+
+    return {
+        'dates': dates,
+        # Files 1-3 and 5 use DDMMYY or DDMMYYYY names; the input index knows both
+        'file1': find_indexed_input(FO_FOLDER, 'fo', curr_expiry, 'file1', False),
+        'file2': find_indexed_input(EQUITY_FOLDER, 'sec_bhavdata_full_', curr_expiry, 'file2', False),
+        'file3': find_indexed_input(EQUITY_FOLDER, 'sec_bhavdata_full_', prev_expiry, 'file3', False),
+        'file4': Path(INDEX_FILE),
+        'file5': find_indexed_input(EQUITY_FOLDER, 'sec_bhavdata_full_', next_expiry, 'file5', True),
+        'index_close': find_indexed_input(INDEX_CLOSE_FOLDER, 'ind_close_all_', curr_expiry, 'index_close', True),
+        'prev_index_close': find_indexed_input(INDEX_CLOSE_FOLDER, 'ind_close_all_', prev_expiry, 'prev_index_close', True),
+    }
+
+def find_indexed_input(folder, prefix, file_date, file_type, give_empty_string):
+    """
+    Looks up the {prefix}{date} input of folder in the input index, like try_file_read
+    does on disk.
+    """
+    file_path = INPUT_INDEX.find(folder, prefix, file_date)
+    if file_path is not None:
+        return str(file_path)
+    if give_empty_string:
+        return ""
+    raise FileNotFoundError(
+        f"Could not generate or find file for type {file_type} at "
+        f"{folder}/{prefix}{file_date:%d%m%y}.csv or {folder}/{prefix}{file_date:%d%m%Y}.csv"
+    )
+
+# --- Input File Index ---
+
+def _variant_rank(suffix):
+    """
+    The position of a file name ending (.csv, .csv.gz, .gz, ...) in input_variants' lookup order.
+    """
+    if suffix == '.csv':
+        return 0
+    for i, compressed in enumerate(COMPRESSED_SUFFIXES):
+        if suffix == '.csv' + compressed:
+            return 1 + 2 * i
+        if suffix == compressed:
+            return 2 + 2 * i
+    return len(COMPRESSED_SUFFIXES) * 2 + 1
+
+def scan_dated_files(folder, prefix):
+    """
+    Maps the trading date of every {prefix}{DDMMYY}.csv or {prefix}{DDMMYYYY}.csv file in
+    folder (or of its .zip, .gz or .zst variant) to its path, in one directory listing.
+    When a date has several files, the one try_file_read would pick wins: DDMMYY before
+    DDMMYYYY, and for each the plain .csv before the compressed ones.
+    """
+    suffixes = '|'.join(re.escape(suffix) for suffix in COMPRESSED_SUFFIXES)
+    pattern = re.compile(rf'^{re.escape(prefix)}(\d{{6}}|\d{{8}})(\.csv|\.csv(?:{suffixes})|{suffixes})$')
+    candidates = []
+    for file_path in Path(folder).glob(f'{prefix}*'):
+        match = pattern.match(file_path.name)
+        if not match:
+            continue
+        date_format = '%d%m%y' if len(match.group(1)) == 6 else '%d%m%Y'
+        try:
+            file_date = datetime.strptime(match.group(1), date_format)
+        except ValueError:
+            continue
+        candidates.append(((len(match.group(1)), _variant_rank(match.group(2))), file_date, file_path))
+
+    dated_files = {}
+    for _, file_date, file_path in sorted(candidates, key=lambda c: c[0]):
+        dated_files.setdefault(file_date, file_path)
+    return dated_files
+
+class InputIndex:
+    """
+    The dated input files of each (folder, prefix), listed once and looked up by date in O(1).
+    A folder is listed again when its modification time changes, i.e. when a file was added,
+    removed or renamed, so files landing while the process runs are found.
+    """
+
+    def __init__(self):
+        self.folders = {}
+
+    def dated_files(self, folder, prefix):
+        try:
+            stamp = Path(folder).stat().st_mtime_ns
+        except FileNotFoundError:
+            stamp = None
+        key = (str(folder), prefix)
+        cached = self.folders.get(key)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, scan_dated_files(folder, prefix) if stamp is not None else {})
+            self.folders[key] = cached
+        return cached[1]
+
+    def find(self, folder, prefix, file_date):
+        """
+        The input file of one trading date, or None.
+        """
+        return self.dated_files(folder, prefix).get(file_date)
+
+    def inputs_for(self, expiry_date):
+        """
+        Which inputs exist for an expiry date: {'fo', 'equity', 'index_close'} -> path or None.
+        """
+        return {
+            'fo': self.find(FO_FOLDER, 'fo', expiry_date),
+            'equity': self.find(EQUITY_FOLDER, 'sec_bhavdata_full_', expiry_date),
+            'index_close': self.find(INDEX_CLOSE_FOLDER, 'ind_close_all_', expiry_date),
+        }
+
+INPUT_INDEX = InputIndex()
+
+def list_dated_files(folder, prefix):
+    """
+    Maps the trading date of every {prefix}{DDMMYY}.csv or {prefix}{DDMMYYYY}.csv file
+    in folder (or of its .zip, .gz or .zst variant) to its path, from the input index.
+    """
+    return dict(INPUT_INDEX.dated_files(folder, prefix))
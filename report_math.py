@@ -0,0 +1,65 @@
+from datetime import datetime
+
+# --- Report Math ---
+#
+# Month arithmetic and the numeric conventions every averages source shares: values as the
+# CSV report writes them, and the compensated (Kahan) summation pandas' groupby mean uses.
+# The CSV, store, database, matrix and lean sources all average through these, which keeps
+# their averages byte-identical. Imports neither pandas nor dateutil, so the lean engine
+# can use it.
+
+def month_index(month_name):
+    """
+    Converts a MmmYYYY month name (e.g. Oct2025) into a sortable integer (year * 12 + month).
+    """
+    month_dt = datetime.strptime(month_name, '%b%Y')
+    return month_dt.year * 12 + month_dt.month - 1
+
+def month_name_of(index):
+    """
+    The MmmYYYY month name of a month_index.
+    """
+    return datetime(index // 12, index % 12 + 1, 1).strftime('%b%Y')
+
+def shift_month(month_name, months):
+    """
+    Returns the MmmYYYY month name `months` months after month_name (negative to go back).
+    """
+    return month_name_of(month_index(month_name) + months)
+
+def report_value(value):
+    """
+    The value as the CSV report writes it ('%.2f'), or None for a missing value, so a month
+    stored from a report frame averages exactly like the same month read back from its CSV.
+    """
+    if value is None or value != value:
+        return None
+    return float('%.2f' % value)
+
+def kahan_step(total, compensation, value):
+    """
+    Adds value to a compensated sum with the same steps as pandas' groupby mean. Works on
+    floats and on NumPy arrays (one sum per element) alike.
+
+    Returns:
+        A tuple (new total, new compensation).
+    """
+    y = value - compensation
+    t = total + y
+    return t, t - total - y
+
+def kahan_sum(values):
+    """
+    Compensated sum of values in the given order (see kahan_step).
+    """
+    total = 0.0
+    compensation = 0.0
+    for value in values:
+        total, compensation = kahan_step(total, compensation, value)
+    return total
+
+def kahan_mean(values):
+    """
+    The mean of a list of values as pandas' groupby mean computes it, NaN when it is empty.
+    """
+    return kahan_sum(values) / len(values) if values else float('nan')
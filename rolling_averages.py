@@ -0,0 +1,173 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from report_math import kahan_mean, month_index, report_value, shift_month
+
+# --- Rolling Average Store ---
+#
+# Keeps the Symbol, Rollover% and Rollover cost rows of the recently generated months, one
+# entry per month, each stamped with the size and modification time of the
+# <Mon><YYYY>_Rollover_Data.csv it matches (like the parsed input cache keys its entries).
+# The averages of a month are computed from the stored entries of its window; only the
+# months whose CSV was written or rewritten since they were stored are read again.
+#
+# The store keeps rows per month rather than a running sum and count per symbol: dropping
+# the oldest month from a running compensated sum does not give the bits a fresh sum over
+# the window gives, and the averages must stay byte-identical to the other sources.
+
+STORE_FOLDER = Path('generated_store')
+
+# Bump this when the layout of the store file changes, so old stores are discarded.
+STORE_VERSION = 2
+
+def csv_stamp(file_path):
+    """
+    The (size, mtime_ns) of a file as a list (JSON-friendly), or None when it does not exist.
+    """
+    try:
+        stat = Path(file_path).stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+class RollingAverageStore:
+    """
+    The Rollover% and Rollover cost rows of recently generated months of one CSV folder.
+
+    The store is a small JSON file:
+        {
+            'version': 2,
+            'window': 6,
+            'folder': '/path/to/generated_csv_data',
+            'months': {'Oct2025': {'stamp': [size, mtime_ns] or null (no CSV),
+                                   'rows': [[Symbol, Rollover%, Rollover cost], ...]}, ...}
+        }
+    """
+
+    def __init__(self, path, folder2_path, window=6):
+        self.path = Path(path)
+        self.folder2_path = Path(folder2_path)
+        self.window = window
+        self.months = {}
+
+    @classmethod
+    def open(cls, folder2_path, window=6, store_folder=STORE_FOLDER):
+        """
+        Loads the store from disk. A store of another version, window length or CSV folder is
+        discarded and refilled from the CSVs on first use.
+        """
+        store = cls(Path(store_folder) / 'rolling_averages.json', folder2_path, window)
+        if store.path.exists():
+            try:
+                data = json.loads(store.path.read_text())
+                if (data.get('version') == STORE_VERSION and data.get('window') == window
+                        and data.get('folder') == str(store.folder2_path.resolve())):
+                    store.months = data.get('months', {})
+            except (ValueError, OSError) as e:
+                print(f"Warning: Could not read rolling average store {store.path}, it will be rebuilt: {e}")
+        return store
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'version': STORE_VERSION,
+            'window': self.window,
+            'folder': str(self.folder2_path.resolve()),
+            'months': self.months,
+        }
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """
+        Drops every stored month, so they are all read again from the CSVs.
+        """
+        self.months = {}
+
+    def csv_path(self, month_name):
+        return self.folder2_path / f"{month_name}_Rollover_Data.csv"
+
+    def _store_month(self, month_name, history_df, stamp):
+        self.months[month_name] = {
+            'stamp': stamp,
+            'rows': [[symbol, report_value(pct), report_value(cost)] for symbol, pct, cost
+                     in zip(history_df['Symbol'], history_df['Rollover%'], history_df['Rollover cost'])],
+        }
+
+    def _read_month(self, month_name, stamp):
+        """
+        (Re)stores one month from its CSV; a missing or unreadable CSV stores no rows.
+        """
+        history_df = pd.DataFrame(columns=['Symbol', 'Rollover%', 'Rollover cost'])
+        if stamp is not None:
+            file_path = self.csv_path(month_name)
+            try:
+                history_df = pd.read_csv(file_path, usecols=['Symbol', 'Rollover%', 'Rollover cost'], skipinitialspace=True)
+            except Exception as e:
+                print(f"Error reading historical file {file_path.name}: {e}")
+        self._store_month(month_name, history_df, stamp)
+
+    def refresh(self, month_names):
+        """
+        Re-reads the months that are not stored or whose CSV changed since they were stored.
+
+        Returns:
+            The names of the months that were read.
+        """
+        read = []
+        for month_name in month_names:
+            stamp = csv_stamp(self.csv_path(month_name))
+            entry = self.months.get(month_name)
+            if entry is None or entry['stamp'] != stamp:
+                self._read_month(month_name, stamp)
+                read.append(month_name)
+        return read
+
+    def _prune(self):
+        # Keeps the window of the newest stored month (and that month) only
+        if self.months:
+            newest = max(month_index(month_name) for month_name in self.months)
+            self.months = {month_name: entry for month_name, entry in self.months.items()
+                           if month_index(month_name) >= newest - self.window}
+
+    def averages_for(self, month_name):
+        """
+        Returns the Avg. Roll Over / Avg. Rollover Cost of every symbol over the `window`
+        months before month_name, in the layout returned by calculate_averages. Every row of a
+        month counts, months are summed oldest first (see report_math.kahan_mean).
+        """
+        window_months = [shift_month(month_name, -offset) for offset in range(self.window, 0, -1)]
+        read = self.refresh(window_months)
+        if read:
+            print(f"Rolling average store: read {', '.join(read)} from {self.folder2_path}.")
+            self._prune()
+            self.save()
+
+        values = {}
+        for window_month in window_months:
+            for symbol, pct, cost in self.months.get(window_month, {'rows': []})['rows']:
+                pcts, costs = values.setdefault(symbol, ([], []))
+                if pct is not None:
+                    pcts.append(pct)
+                if cost is not None:
+                    costs.append(cost)
+
+        symbols = list(values)
+        return pd.DataFrame({
+            'Symbol': symbols,
+            'Avg. Roll Over': [kahan_mean(values[s][0]) for s in symbols],
+            'Avg. Rollover Cost': [kahan_mean(values[s][1]) for s in symbols],
+        })
+
+    def update(self, month_name, final_df):
+        """
+        Records a newly generated month from its report frame, stamped with its CSV (written
+        before), so the next month's averages need no file reads.
+        """
+        self._store_month(month_name, final_df, csv_stamp(self.csv_path(month_name)))
+        self._prune()
+        self.save()
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from report_math import shift_month
+from signals import SIGNAL_LABELS
+
+# --- Sector Summary ---
+#
+# One row per Sectoral Index of a finished report frame: the open-interest-weighted Rollover%,
+# the mean Rollover cost, the number of symbols in each signal bucket (breadth) and the
+# deviation of the weighted Rollover% and mean cost from the sector's own average over the
+# previous months' summaries. Written as <Mon><YYYY>_Sector_Summary.csv next to the CSV report
+# and as a sheet of the Excel workbook.
+
+SECTOR_COLUMNS = [
+    'Sectoral Index', 'Symbols', 'Total OI',
+    'OI Wtd Rollover%', 'Avg. Sector Rollover%', 'Diff Sector Rollover%',
+    'Mean Rollover cost', 'Avg. Sector Rollover Cost', 'Diff Sector Rollover Cost',
+] + SIGNAL_LABELS
+
+def sector_summary_filename(month_name):
+    return f"{month_name}_Sector_Summary.csv"
+
+def summarize_sectors(final_df):
+    """
+    Aggregates a finalized report frame (with its Total OI, Rolled OI and Signal columns) per
+    Sectoral Index in one groupby. The sector Rollover% is the sector's rolled-over OI over
+    its Total OI, so it does not pick up the rounding of the per-symbol Rollover%.
+
+    Returns:
+        A DataFrame with Sectoral Index, Symbols, Total OI, OI Wtd Rollover%, Mean Rollover cost
+        and one count column per signal bucket, in the report's sector order.
+    """
+    buckets = pd.get_dummies(final_df['Signal']).reindex(columns=SIGNAL_LABELS, fill_value=False).astype(int)
+    parts = pd.DataFrame({
+        'Sectoral Index': final_df['Sectoral Index'],
+        'Symbols': 1,
+        'Total OI': final_df['Total OI'],
+        'Rolled OI': final_df['Rolled OI'],
+        'Rollover cost': final_df['Rollover cost'],
+    }, index=final_df.index).join(buckets)
+
+    # The report is already sorted by sector, and symbols without a sector (0) mix an int
+    # into the string labels, so the groups keep their order of appearance
+    sums = parts.groupby('Sectoral Index', sort=False).sum()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sums['OI Wtd Rollover%'] = (sums['Rolled OI'] / sums['Total OI'] * 100).where(sums['Total OI'] != 0)
+    sums['Mean Rollover cost'] = sums['Rollover cost'] / sums['Symbols']
+    return sums.drop(columns=['Rolled OI', 'Rollover cost']).reset_index()
+
+def sector_averages(folder2_path, month_name, window=6):
+    """
+    Averages each sector's OI Wtd Rollover% and Mean Rollover cost over the sector summaries
+    of the `window` months before month_name. Months without a summary are left out.
+
+    Returns:
+        A DataFrame indexed by the sector label as a string, with Avg. Sector Rollover% and
+        Avg. Sector Rollover Cost.
+    """
+    history = []
+    for offset in range(window, 0, -1):
+        file_path = folder2_path / sector_summary_filename(shift_month(month_name, -offset))
+        if file_path.exists():
+            history.append(pd.read_csv(file_path, usecols=['Sectoral Index', 'OI Wtd Rollover%', 'Mean Rollover cost']))
+
+    if not history:
+        return pd.DataFrame(columns=['Avg. Sector Rollover%', 'Avg. Sector Rollover Cost'])
+
+    history_df = pd.concat(history, ignore_index=True)
+    history_df['Sectoral Index'] = history_df['Sectoral Index'].astype(str)
+    return history_df.groupby('Sectoral Index').mean().rename(columns={
+        'OI Wtd Rollover%': 'Avg. Sector Rollover%',
+        'Mean Rollover cost': 'Avg. Sector Rollover Cost',
+    })
+
+def build_sector_summary(final_df, folder2_path, month_name, window=6):
+    """
+    The rounded sector summary of month_name in SECTOR_COLUMNS order. Sectors without
+    history have blank averages and differences.
+    """
+    summary_df = summarize_sectors(final_df)
+    averages = sector_averages(folder2_path, month_name, window)
+    averages = averages.reindex(summary_df['Sectoral Index'].astype(str)).reset_index(drop=True)
+    summary_df = pd.concat([summary_df, averages], axis=1)
+
+    summary_df['Diff Sector Rollover%'] = summary_df['OI Wtd Rollover%'] - summary_df['Avg. Sector Rollover%']
+    summary_df['Diff Sector Rollover Cost'] = summary_df['Mean Rollover cost'] - summary_df['Avg. Sector Rollover Cost']
+
+    rounding_cols = [
+        'OI Wtd Rollover%', 'Avg. Sector Rollover%', 'Diff Sector Rollover%',
+        'Mean Rollover cost', 'Avg. Sector Rollover Cost', 'Diff Sector Rollover Cost',
+    ]
+    summary_df[rounding_cols] = summary_df[rounding_cols].astype(float).round(2)
+    return summary_df[SECTOR_COLUMNS]
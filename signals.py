@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# --- Signal Classification ---
+#
+# Every report row falls into at most one of four buckets, decided by the signs of
+# M_o_M%, Diff Rollover% and Diff Rollover Cost:
+#
+#   Long Rolls      (MoM+ , %Roll+ , Cost+)
+#   Short Rolls     (MoM- , %Roll+ , Cost-)
+#   Short Covering  (MoM+ , %Roll- , Cost+)
+#   Long Unwind     (MoM- , %Roll- , Cost-)
+
+# Bucket name, the sign of (M_o_M%, Diff Rollover%, Diff Rollover Cost) that selects a row,
+# and the sort order of the bucket's sheet.
+SIGNAL_SHEETS = [
+    ('Long Rolls', (1, 1, 1), ['Diff Rollover Cost', 'Diff Rollover%', 'M_o_M%'], [False, False, False]),
+    ('Short Rolls', (-1, 1, -1), ['Diff Rollover%', 'Diff Rollover Cost', 'M_o_M%'], [False, True, True]),
+    ('Short Covering', (1, -1, 1), ['M_o_M%', 'Diff Rollover Cost', 'Diff Rollover%'], [False, False, True]),
+    ('Long Unwind', (-1, -1, -1), ['M_o_M%', 'Diff Rollover Cost', 'Diff Rollover%'], [True, True, True]),
+]
+
+SIGNAL_LABELS = [name for name, _, _, _ in SIGNAL_SHEETS]
+
+# Minimum size of (M_o_M%, Diff Rollover%, Diff Rollover Cost) in a bucket's direction; the
+# report's rule is a plain sign test
+DEFAULT_THRESHOLDS = (0.0, 0.0, 0.0)
+
+def classify_signals(mom, diff_pct, diff_cost, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Labels every row with its signal bucket in one pass.
+
+    Args:
+        mom, diff_pct, diff_cost: Array-likes of M_o_M%, Diff Rollover% and Diff Rollover Cost.
+        thresholds: The amount (M_o_M%, Diff Rollover%, Diff Rollover Cost) each value must
+            exceed in its bucket's direction, e.g. (0, 3, 0) requires Diff Rollover% > 3 for
+            Long Rolls and < -3 for Long Unwind.
+
+    Returns:
+        A pd.Categorical over SIGNAL_LABELS; rows outside every bucket (a value within its
+        threshold, or NaN) are NaN.
+    """
+    mom = np.asarray(mom, dtype=float)
+    diff_pct = np.asarray(diff_pct, dtype=float)
+    diff_cost = np.asarray(diff_cost, dtype=float)
+    mom_min, pct_min, cost_min = thresholds
+
+    conditions = [
+        (mom * mom_sign > mom_min) & (diff_pct * pct_sign > pct_min) & (diff_cost * cost_sign > cost_min)
+        for _, (mom_sign, pct_sign, cost_sign), _, _ in SIGNAL_SHEETS
+    ]
+    codes = np.select(conditions, list(range(len(SIGNAL_SHEETS))), default=-1)
+    return pd.Categorical.from_codes(codes, categories=SIGNAL_LABELS)
+
+def add_signal_column(final_df):
+    """
+    Adds the categorical Signal column to a finalized report frame.
+    """
+    final_df['Signal'] = classify_signals(final_df['M_o_M%'], final_df['Diff Rollover%'], final_df['Diff Rollover Cost'])
+    return final_df
+
+def signal_sheet_rows(final_df):
+    """
+    Returns {bucket name: row positions of final_df in sheet order} for the four signal sheets.
+    Rows are grouped by the Signal column and ordered with np.lexsort, so no frame is copied.
+    """
+    positions_by_signal = final_df.reset_index(drop=True).groupby('Signal', observed=False).indices
+
+    sheet_rows = {}
+    for sheet_name, _, sort_cols, ascending in SIGNAL_SHEETS:
+        positions = np.asarray(positions_by_signal.get(sheet_name, []), dtype=int)
+        # np.lexsort sorts by the last key first and is stable, like sort_values
+        keys = [final_df[col].to_numpy(dtype=float)[positions] * (1 if asc else -1)
+                for col, asc in zip(sort_cols, ascending)]
+        sheet_rows[sheet_name] = positions[np.lexsort(keys[::-1])] if len(positions) else positions
+    return sheet_rows
@@ -0,0 +1,196 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from report_math import month_index
+from rolling_averages import STORE_FOLDER
+
+# --- Symbol Master ---
+#
+# One persisted table of every symbol the reports have seen, keyed by a small integer id:
+# its Sectoral Index (from index.csv), its futures lot size and the first and last series
+# it had futures in. The stages join on these ids instead of building string indexes, and
+# the table is only updated when index.csv changes or a futures file it has not seen yet
+# is used.
+
+class SymbolMaster:
+    """
+    The master is a small JSON file:
+        {
+            'index_file': [resolved path, size, mtime_ns],
+            'fo_files': {resolved path: [size, mtime_ns, [symbol id, ...]], ...},
+            'symbols': [[Symbol, Sectoral Index, lot size, first series, last series], ...]
+        }
+    A symbol's id is its position in 'symbols'. Symbols are only ever appended, so ids
+    never change.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index_file = None
+        self.fo_files = {}
+        self.symbols = []
+        self._ids = None
+        self._index = None
+
+    @classmethod
+    def open(cls, store_folder=STORE_FOLDER):
+        master = cls(Path(store_folder) / 'symbol_master.json')
+        if master.path.exists():
+            try:
+                data = json.loads(master.path.read_text())
+                master.index_file = data.get('index_file')
+                master.fo_files = data.get('fo_files', {})
+                master.symbols = data.get('symbols', [])
+            except (ValueError, OSError) as e:
+                print(f"Warning: Could not read symbol master {master.path}, it will be rebuilt: {e}")
+        return master
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'index_file': self.index_file,
+            'fo_files': self.fo_files,
+            'symbols': self.symbols,
+        }
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+
+    def __getstate__(self):
+        # The lookup index is rebuilt on demand, so pickling for the process pool stays small
+        state = self.__dict__.copy()
+        state['_ids'] = None
+        state['_index'] = None
+        return state
+
+    @staticmethod
+    def _file_stamp(file_path):
+        stat = Path(file_path).stat()
+        return [str(Path(file_path).resolve()), stat.st_size, stat.st_mtime_ns]
+
+    def _id_of(self, symbol):
+        """
+        Returns the id of symbol, adding it to the master first if needed.
+        """
+        if self._ids is None:
+            self._ids = {entry[0]: i for i, entry in enumerate(self.symbols)}
+        if symbol not in self._ids:
+            self._ids[symbol] = len(self.symbols)
+            self.symbols.append([symbol, None, None, None, None])
+            self._index = None
+        return self._ids[symbol]
+
+    def _lookup(self):
+        if self._index is None:
+            self._index = pd.Index([entry[0] for entry in self.symbols])
+        return self._index
+
+    def ids(self, symbols):
+        """
+        Returns the integer ids of symbols as an int32 array (-1 for symbols not in the master).
+        """
+        if isinstance(getattr(symbols, 'dtype', None), pd.CategoricalDtype):
+            # One lookup per category instead of one per row
+            symbols = pd.Categorical(symbols)
+            category_ids = self._lookup().get_indexer(symbols.categories)
+            return np.where(symbols.codes >= 0, category_ids[symbols.codes], -1).astype(np.int32)
+        return self._lookup().get_indexer(pd.Index(symbols)).astype(np.int32)
+
+    def names(self, ids):
+        """
+        Returns the Symbol of every id.
+        """
+        names = np.array([entry[0] for entry in self.symbols], dtype=object)
+        return names[np.asarray(ids)]
+
+    def sectors(self, ids):
+        """
+        Returns the Sectoral Index of every id, NaN for symbols that are not in index.csv.
+        """
+        sectors = np.array([np.nan if entry[1] is None else entry[1] for entry in self.symbols], dtype=object)
+        return sectors[np.asarray(ids)]
+
+    def update_from_index(self, index_path):
+        """
+        Reloads the sectors from index.csv if it changed since the last update.
+        Like the sector join, the first Sectoral Index listed for a Symbol wins.
+
+        Returns:
+            True if the master changed.
+        """
+        stamp = self._file_stamp(index_path)
+        if stamp == self.index_file:
+            return False
+
+        print(f"Updating symbol master sectors from {Path(index_path).name}...")
+        sector_df = pd.read_csv(index_path, usecols=['Sectoral Index', 'Symbol'], skipinitialspace=True)
+        sector_df = sector_df.drop_duplicates(subset=['Symbol'])
+        sectors = dict(zip(sector_df['Symbol'], sector_df['Sectoral Index']))
+
+        for symbol in sectors:
+            self._id_of(symbol)
+        for entry in self.symbols:
+            sector = sectors.get(entry[0])
+            entry[1] = None if pd.isna(sector) else sector
+
+        self.index_file = stamp
+        return True
+
+    def knows_futures_file(self, fo_path):
+        """
+        True if fo_path was already recorded and has not changed since.
+        """
+        stamp = self._file_stamp(fo_path)
+        return stamp[0] in self.fo_files and self.fo_files[stamp[0]][:2] == stamp[1:]
+
+    def update_from_futures(self, fo_path, futures_df, contracts_df):
+        """
+        Adds the symbols of a futures bhavcopy and updates their lot size and first/last series.
+        Callers skip files for which knows_futures_file is True.
+
+        Args:
+            fo_path: The futures file futures_df was read from.
+            futures_df: The futures bhavcopy (needs TRADED_QUA and TRD_NO_CON for the lot size).
+            contracts_df: parse_contract_details_vectorized(futures_df['CONTRACT_D']).
+        """
+        stamp = self._file_stamp(fo_path)
+        contracts = contracts_df.assign(
+            lot=futures_df['TRADED_QUA'] / futures_df['TRD_NO_CON'].where(futures_df['TRD_NO_CON'] > 0)
+        ).dropna(subset=['Symbol', 'Contract Date'])
+        contracts = contracts.sort_values(['Symbol', 'Contract Date'], kind='stable')
+
+        file_ids = []
+        for symbol, symbol_contracts in contracts.groupby('Symbol', sort=True):
+            symbol_id = self._id_of(symbol)
+            entry = self.symbols[symbol_id]
+            series = symbol_contracts['Contract Date'].iloc[0].strftime('%b%Y')
+            lots = symbol_contracts['lot'].dropna()
+
+            if entry[3] is None or month_index(series) < month_index(entry[3]):
+                entry[3] = series
+            if entry[4] is None or month_index(series) >= month_index(entry[4]):
+                entry[4] = series
+                if not lots.empty:
+                    entry[2] = int(round(lots.iloc[0]))
+            file_ids.append(symbol_id)
+
+        self.fo_files[stamp[0]] = stamp[1:] + [file_ids]
+
+    def futures_universe(self, fo_path):
+        """
+        Returns the set of symbols with futures in an already recorded futures file.
+        """
+        return set(self.names(self.fo_files[str(Path(fo_path).resolve())][2]))
+
+    def frame(self):
+        """
+        The whole master as a DataFrame indexed by symbol id.
+        """
+        return pd.DataFrame(
+            self.symbols,
+            columns=['Symbol', 'Sectoral Index', 'Lot Size', 'First Series', 'Last Series'],
+        ).rename_axis('Symbol ID')
@@ -0,0 +1,21 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+SAMPLE_CSV_FOLDER = REPO_DIR / 'generated_csv_data'
+
+@pytest.fixture
+def csv_folder(tmp_path):
+    """
+    A scratch copy of the committed <Mon><YYYY>_Rollover_Data.csv reports.
+    """
+    folder = tmp_path / 'generated_csv_data'
+    folder.mkdir()
+    for file_path in SAMPLE_CSV_FOLDER.glob('*_Rollover_Data.csv'):
+        shutil.copy2(file_path, folder)
+    return folder
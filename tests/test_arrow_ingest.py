@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+from generate_files import read_spot_filtered
+from symbol_master import SymbolMaster
+
+pytest.importorskip('pyarrow')
+
+from arrow_ingest import read_spot_arrow
+
+SPOT_PATH = REPO_DIR / 'equity_data' / 'sec_bhavdata_full_25112025.csv'
+
+def test_spot_symbols_are_categorical_and_match_pandas():
+    symbols = {'INFY', 'TCS', 'RELIANCE', 'NOTLISTED'}
+    arrow_df = read_spot_arrow(SPOT_PATH, symbols)
+    assert isinstance(arrow_df['SYMBOL'].dtype, pd.CategoricalDtype)
+    pandas_df = read_spot_filtered(SPOT_PATH, symbols)
+    pd.testing.assert_frame_equal(arrow_df.astype({'SYMBOL': object}), pandas_df.astype({'SYMBOL': object}),
+                                  check_dtype=False)
+
+def test_master_ids_of_categorical_symbols(tmp_path):
+    master = SymbolMaster(tmp_path / 'symbol_master.json')
+    for symbol in ['TCS', 'INFY']:
+        master._id_of(symbol)
+    symbols = pd.Series(['INFY', 'WIPRO', 'TCS', 'INFY', None], dtype='category')
+    assert master.ids(symbols).tolist() == [1, -1, 0, 1, -1]
+    assert master.ids(symbols.astype(object).fillna('WIPRO')).tolist() == [1, -1, 0, 1, -1]
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import (
+    SignalPanel, evaluate_thresholds, forward_returns, parse_threshold_grid, run_signal_backtest, sweep_thresholds,
+    trade_stats,
+)
+from history_matrix import MappedHistory
+from report_math import month_index
+
+NAN = np.nan
+JAN = month_index('Jan2025')
+
+# Jan, Feb and Apr 2025: Feb has no stored next month, Apr is the last month
+MONTHS = [JAN, JAN + 1, JAN + 3]
+
+@pytest.fixture
+def panel():
+    """
+    Three symbols over three months. With the report's thresholds the signalled cells with
+    a forward return are:
+        A Jan  Long Rolls   fwd -1 (Feb M_o_M%)      trade -1
+        C Jan  Long Rolls   fwd  3 (Feb M_o_M%)      trade  3
+        B Jan  Long Unwind  fwd  4 (Feb M_o_M%)      trade -4
+        A Feb  Short Rolls  fwd  5 (Next_M_o_M%)     trade -5
+        B Apr  Long Rolls   fwd  6 (Next_M_o_M%)     trade  6
+    """
+    mom = np.array([[2.0, -1.0, 3.0], [-2.0, 4.0, 1.0], [1.0, 3.0, NAN]])
+    diff_pct = np.array([[1.0, 1.0, 1.0], [-1.0, 1.0, 1.0], [2.0, 0.0, NAN]])
+    diff_cost = np.array([[1.0, -1.0, 1.0], [-1.0, 1.0, 1.0], [2.0, 0.0, NAN]])
+    next_mom = np.array([[9.0, 5.0, 0.0], [7.0, NAN, 6.0], [0.0, 0.0, 0.0]])
+    return SignalPanel(['A', 'B', 'C'], ['IT', 'BANK', 'IT'], MONTHS, mom, diff_pct, diff_cost, next_mom)
+
+def test_forward_returns_prefer_the_next_stored_month(panel):
+    expected = np.array([[-1.0, 5.0, NAN], [4.0, NAN, 6.0], [3.0, NAN, NAN]])
+    np.testing.assert_array_equal(panel.forward, expected)
+
+def test_forward_returns_of_no_months():
+    assert forward_returns([], np.empty((2, 0)), np.empty((2, 0))).shape == (2, 0)
+
+def test_trades_are_signed_by_the_bucket_direction(panel):
+    trades_df = panel.trades().sort_values(['Month', 'Symbol']).reset_index(drop=True)
+    assert trades_df['Symbol'].tolist() == ['A', 'B', 'C', 'A', 'B']
+    assert trades_df['Signal'].tolist() == ['Long Rolls', 'Long Unwind', 'Long Rolls', 'Short Rolls', 'Long Rolls']
+    assert trades_df['Fwd Return%'].tolist() == [-1.0, 4.0, 3.0, 5.0, 6.0]
+    assert trades_df['Trade Return%'].tolist() == [-1.0, -4.0, 3.0, -5.0, 6.0]
+
+def test_trade_stats_per_bucket(panel):
+    stats = trade_stats(panel.trades(), ['Signal']).set_index('Signal')
+    assert stats.index.tolist() == ['Long Rolls', 'Short Rolls', 'Long Unwind']
+
+    long_rolls = stats.loc['Long Rolls']
+    assert long_rolls['Signals'] == 3
+    assert long_rolls['Hit Rate%'] == pytest.approx(200 / 3)
+    assert long_rolls['Mean Fwd Return%'] == pytest.approx(8 / 3)
+    assert long_rolls['Median Fwd Return%'] == 3.0
+    assert long_rolls['Mean Trade Return%'] == pytest.approx(8 / 3)
+    assert long_rolls['Median Trade Return%'] == 3.0
+
+    assert stats.loc['Short Rolls', 'Hit Rate%'] == 0.0
+    assert stats.loc['Short Rolls', 'Mean Fwd Return%'] == 5.0
+    assert stats.loc['Long Unwind', 'Mean Trade Return%'] == -4.0
+
+def test_equity_curve_compounds_the_monthly_mean(panel):
+    results = run_signal_backtest(panel)
+
+    months_df = results['months']
+    long_rolls = months_df[months_df['Signal'] == 'Long Rolls']
+    assert long_rolls['Month'].tolist() == ['Jan2025', 'Apr2025']
+    # Jan: mean of -1 and 3; Apr: 6
+    np.testing.assert_allclose(long_rolls['Equity'], [1.01, 1.01 * 1.06])
+
+    signals_df = results['signals'].set_index('Signal')
+    assert signals_df.loc['Long Rolls', 'Months'] == 2
+    assert signals_df.loc['Long Rolls', 'Final Equity'] == pytest.approx(1.01 * 1.06)
+    assert signals_df.loc['Short Rolls', 'Final Equity'] == pytest.approx(0.95)
+
+    sectors_df = results['sectors']
+    it_long_rolls = sectors_df[(sectors_df['Signal'] == 'Long Rolls') & (sectors_df['Sectoral Index'] == 'IT')]
+    assert it_long_rolls['Signals'].tolist() == [2]
+    assert it_long_rolls['Mean Trade Return%'].tolist() == [1.0]
+
+# --- Threshold Sweep ---
+
+def test_sweep_point_at_zero_matches_the_backtest(panel):
+    result = evaluate_thresholds(panel, (0.0, 0.0, 0.0))
+    assert result['Signals'] == 5
+    assert result['Hit Rate%'] == pytest.approx(40.0)
+    assert result['Mean Trade Return%'] == pytest.approx(-0.2)
+    assert result['Months'] == 3
+    # Jan: mean of -1, -4 and 3; Feb: -5; Apr: 6
+    assert result['Final Equity'] == pytest.approx((1 - 2 / 300) * 0.95 * 1.06)
+
+    signals_df = run_signal_backtest(panel)['signals'].set_index('Signal')
+    for label, row in signals_df.iterrows():
+        assert result[f"{label} Signals"] == row['Signals']
+        assert result[f"{label} Hit Rate%"] == pytest.approx(row['Hit Rate%'])
+    assert result['Short Covering Signals'] == 0
+
+def test_sweep_ranks_and_leaves_thin_configurations_unranked(panel):
+    sweep_df = sweep_thresholds(panel, parse_threshold_grid('mom=0,1.5;pct=0,1.5'), workers=1, min_signals=2)
+    assert sweep_df['Rank'].isna().tolist() == [False, False, True, True]
+    assert sweep_df['Rank'][:2].tolist() == [1, 2]
+    assert (sweep_df['Signals'][:2] >= 2).all() and (sweep_df['Signals'][2:] < 2).all()
+    assert sweep_df['Mean Trade Return%'].iloc[0] >= sweep_df['Mean Trade Return%'].iloc[1]
+
+def test_sweep_on_the_pool_matches_the_serial_sweep(csv_folder, tmp_path):
+    history = MappedHistory.open(csv_folder, folder=tmp_path / 'history_matrix')
+    history.import_csv_history()
+    sample_panel = SignalPanel.from_mapped_history(history)
+    grid = parse_threshold_grid('mom=0,1,3;pct=0,2,5;cost=0,0.1')
+
+    serial = sweep_thresholds(sample_panel, grid, workers=1, min_signals=10)
+    pooled = sweep_thresholds(sample_panel, grid, workers=3, min_signals=10)
+    assert len(serial) == 18
+    pd.testing.assert_frame_equal(pooled, serial)
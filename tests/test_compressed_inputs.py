@@ -0,0 +1,73 @@
+import gzip
+import shutil
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import arrow_ingest
+from conftest import REPO_DIR
+from generate_files import read_spot_filtered
+from input_cache import read_input_csv
+from report_inputs import find_input, open_input, scan_dated_files
+
+FO_SAMPLE = sorted((REPO_DIR / 'fo_data').glob('fo*.csv'))[-1]
+EQUITY_SAMPLE = sorted((REPO_DIR / 'equity_data').glob('sec_bhavdata_full_*.csv'))[-1]
+
+def compress(source, folder, suffix):
+    """
+    Writes a compressed copy of source into folder, named <stem><suffix>.
+    """
+    target = folder / f"{source.stem}{suffix}"
+    data = source.read_bytes()
+    if suffix.endswith('.gz'):
+        target.write_bytes(gzip.compress(data))
+    elif suffix == '.zip':
+        # The reader takes the first .csv member, not the first member
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('README.txt', 'not the bhavcopy')
+            archive.writestr(source.name, data)
+    else:
+        zstandard = pytest.importorskip('zstandard')
+        target.write_bytes(zstandard.ZstdCompressor().compress(data))
+    return target
+
+@pytest.fixture(params=['.csv.gz', '.gz', '.zip', '.zst'])
+def suffix(request):
+    return request.param
+
+def test_compressed_input_reads_as_the_plain_text(tmp_path, suffix):
+    with open_input(compress(FO_SAMPLE, tmp_path, suffix)) as f:
+        assert f.read() == FO_SAMPLE.read_text()
+
+def test_compressed_futures_parse_like_the_plain_csv(tmp_path, suffix):
+    compressed = compress(FO_SAMPLE, tmp_path, suffix)
+    pd.testing.assert_frame_equal(read_input_csv(compressed, skipinitialspace=True),
+                                  read_input_csv(FO_SAMPLE, skipinitialspace=True))
+
+def test_compressed_spot_parses_like_the_plain_csv(tmp_path, suffix):
+    compressed = compress(EQUITY_SAMPLE, tmp_path, suffix)
+    pd.testing.assert_frame_equal(read_spot_filtered(compressed, chunk_rows=500), read_spot_filtered(EQUITY_SAMPLE))
+
+def test_compressed_futures_parse_like_the_plain_csv_with_arrow(tmp_path, suffix):
+    pytest.importorskip('pyarrow')
+    compressed = compress(FO_SAMPLE, tmp_path, suffix)
+    pd.testing.assert_frame_equal(arrow_ingest.read_futures_arrow(compressed), arrow_ingest.read_futures_arrow(FO_SAMPLE))
+
+def test_plain_csv_wins_over_compressed_variants(tmp_path):
+    plain = tmp_path / FO_SAMPLE.name
+    shutil.copy2(FO_SAMPLE, plain)
+    for suffix in ['.csv.gz', '.gz', '.zip']:
+        compress(FO_SAMPLE, tmp_path, suffix)
+
+    assert find_input(plain) == plain
+    file_date = datetime.strptime(FO_SAMPLE.stem[2:], '%d%m%y')
+    assert scan_dated_files(tmp_path, 'fo') == {file_date: plain}
+
+    # Without the plain file: .zip before .gz, and <name>.csv.gz before <name>.gz
+    plain.unlink()
+    assert find_input(plain) == tmp_path / f"{FO_SAMPLE.stem}.zip"
+    (tmp_path / f"{FO_SAMPLE.stem}.zip").unlink()
+    assert find_input(plain) == tmp_path / f"{FO_SAMPLE.stem}.csv.gz"
+    assert scan_dated_files(tmp_path, 'fo') == {file_date: tmp_path / f"{FO_SAMPLE.stem}.csv.gz"}
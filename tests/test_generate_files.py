@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from conftest import REPO_DIR
+from generate_files import calculate_futures_rollover, calculate_futures_rollover_loop, futures_symbols
+
+def test_futures_symbols_leaves_out_index_futures():
+    futures_df = pd.DataFrame({
+        'CONTRACT_D': ['FUTSTKINFY27-NOV-2025', 'FUTSTKINFY30-DEC-2025', 'FUTIDXNIFTY27-NOV-2025', 'FUTIDXBANKNIFTY27-NOV-2025'],
+        'CLOSE_PRIC': [1500.0, 1510.0, 26000.0, 59000.0],
+        'OI_NO_CON': [100.0, 50.0, 1000.0, 500.0],
+    })
+    assert futures_symbols(futures_df) == {'INFY'}
+
+# --- Loop vs Vectorized Rollover ---
+
+def assert_engines_agree(futures_df):
+    loop_df, loop_names = calculate_futures_rollover_loop(futures_df.copy())
+    vector_df, vector_names = calculate_futures_rollover(futures_df.copy())
+    # The loop engine only knows stock futures
+    vector_df = vector_df[vector_df['Instrument'] == 'FUTSTK'].drop(columns=['Instrument'])
+    pd.testing.assert_frame_equal(loop_df, vector_df, check_index_type=False)
+    assert loop_names == vector_names
+    return vector_df
+
+def test_engines_agree_on_two_and_three_contracts_and_zero_oi():
+    futures_df = pd.DataFrame({
+        'CONTRACT_D': [
+            'FUTSTKAAA29-JAN-2026', 'FUTSTKAAA25-NOV-2025', 'FUTSTKAAA30-DEC-2025',
+            'FUTSTKBBB30-DEC-2025', 'FUTSTKBBB25-NOV-2025',
+            'FUTSTKCCC25-NOV-2025', 'FUTSTKCCC30-DEC-2025', 'FUTSTKCCC29-JAN-2026',
+            'FUTSTKDDD25-NOV-2025',
+            'FUTIDXNIFTY25-NOV-2025', 'FUTIDXNIFTY30-DEC-2025',
+        ],
+        'CLOSE_PRIC': [103.0, 100.0, 101.5, 51.0, 50.0, 10.0, 10.2, 10.4, 70.0, 26000.0, 26100.0],
+        'OI_NO_CON': [20.0, 50.0, 30.0, 40.0, 60.0, 0.0, 0.0, 0.0, 5.0, 1000.0, 500.0],
+    })
+    rollover_df = assert_engines_agree(futures_df)
+
+    # DDD has a single contract and is skipped
+    assert sorted(rollover_df.index) == ['AAA', 'BBB', 'CCC']
+    assert rollover_df.loc['AAA', 'Rollover%'] == pytest.approx(50.0)
+    assert rollover_df.loc['AAA', 'Future Price'] == 101.5
+    assert rollover_df.loc['BBB', 'Rollover%'] == pytest.approx(40.0)
+    assert rollover_df.loc['CCC', 'Rollover%'] == 0.0
+    assert rollover_df.loc['CCC', 'Total OI'] == 0.0
+
+def test_engines_agree_on_a_sample_futures_file():
+    fo_path = sorted((REPO_DIR / 'fo_data').glob('fo*.csv'))[-1]
+    assert_engines_agree(pd.read_csv(fo_path, skipinitialspace=True))
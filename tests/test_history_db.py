@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+import history_db
+from generate_files import calculate_averages
+
+def assert_same_averages(db_df, csv_df):
+    columns = ['Symbol', 'Avg. Roll Over', 'Avg. Rollover Cost']
+    db_df = db_df[columns].sort_values('Symbol').reset_index(drop=True)
+    csv_df = csv_df[columns].sort_values('Symbol').reset_index(drop=True)
+    pd.testing.assert_frame_equal(db_df, csv_df, check_exact=True, check_dtype=False)
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # A fresh connection cache, as in a new process
+    monkeypatch.setattr(history_db, '_CONNECTIONS', {})
+    return tmp_path / 'store' / 'rollover_history.sqlite'
+
+@pytest.fixture
+def other_folder(csv_folder, tmp_path):
+    # A second CSV folder with a shorter, shifted history
+    folder = tmp_path / 'other_csv_data'
+    folder.mkdir()
+    for month in ['Aug2025', 'Sep2025', 'Oct2025']:
+        month_df = pd.read_csv(csv_folder / f"{month}_Rollover_Data.csv", skipinitialspace=True)
+        month_df['Rollover%'] += 1
+        month_df.to_csv(folder / f"{month}_Rollover_Data.csv", index=False, float_format='%.2f')
+    return folder
+
+def test_folders_keep_separate_histories(csv_folder, other_folder, db_path):
+    connection = history_db.open_for_folder(csv_folder, db_path)
+    assert len(history_db.months_in_store(connection)) == 10
+    assert_same_averages(history_db.averages_for(connection, 'Nov2025'), calculate_averages(csv_folder, {}, 'Nov2025'))
+
+    # The other folder's run sees only its own months
+    connection = history_db.open_for_folder(other_folder, db_path)
+    assert history_db.months_in_store(connection) == ['Aug2025', 'Sep2025', 'Oct2025']
+    assert_same_averages(history_db.averages_for(connection, 'Nov2025'), calculate_averages(other_folder, {}, 'Nov2025'))
+
+    # A later process on the first folder finds the database rebuilt from that folder again
+    history_db._CONNECTIONS.clear()
+    connection = history_db.open_for_folder(csv_folder, db_path)
+    assert history_db.stored_folder(connection) == str(csv_folder.resolve())
+    assert len(history_db.months_in_store(connection)) == 10
+    assert_same_averages(history_db.averages_for(connection, 'Nov2025'), calculate_averages(csv_folder, {}, 'Nov2025'))
+
+def test_database_of_same_folder_is_not_reimported(csv_folder, db_path, capsys):
+    history_db.open_for_folder(csv_folder, db_path)
+    history_db._CONNECTIONS.clear()
+    capsys.readouterr()
+    history_db.open_for_folder(csv_folder, db_path)
+    assert 'Imported' not in capsys.readouterr().out
+
+def test_unrecorded_database_is_rebuilt(csv_folder, other_folder, db_path):
+    # A database written before the folder was recorded may hold any folder's rows
+    connection = history_db.connect(db_path)
+    history_db.import_csv_history(connection, other_folder)
+    connection.close()
+
+    connection = history_db.open_for_folder(csv_folder, db_path)
+    assert len(history_db.months_in_store(connection)) == 10
+    assert_same_averages(history_db.averages_for(connection, 'Oct2025'), calculate_averages(csv_folder, {}, 'Oct2025'))
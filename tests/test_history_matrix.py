@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+import history_matrix
+from generate_files import calculate_averages
+from history_matrix import MappedHistory
+from report_math import month_index
+
+@pytest.fixture
+def history(csv_folder, tmp_path):
+    history = MappedHistory.open(csv_folder, folder=tmp_path / 'history_matrix')
+    history.import_csv_history()
+    return history
+
+def test_sample_has_duplicate_symbol_months(csv_folder):
+    jul_df = pd.read_csv(csv_folder / 'Jul2025_Rollover_Data.csv', skipinitialspace=True)
+    assert jul_df['Symbol'].duplicated().any()
+
+@pytest.mark.parametrize('month', ['Jun2025', 'Aug2025', 'Oct2025', 'Nov2025'])
+def test_averages_match_csv_source(history, csv_folder, month):
+    assert history.extra_rows, "the sample reports list some symbols twice in a month"
+    columns = ['Symbol', 'Avg. Roll Over', 'Avg. Rollover Cost']
+    matrix_df = history.averages_for(month)[columns].sort_values('Symbol').reset_index(drop=True)
+    csv_df = calculate_averages(csv_folder, {}, month)[columns].sort_values('Symbol').reset_index(drop=True)
+    pd.testing.assert_frame_equal(matrix_df, csv_df, check_exact=True, check_dtype=False)
+
+def test_reopened_history_keeps_extra_rows(history, csv_folder, tmp_path):
+    reopened = MappedHistory.open(csv_folder, folder=tmp_path / 'history_matrix')
+    assert reopened.months == history.months
+    assert reopened.extra_rows == history.extra_rows
+    assert month_index('Jul2025') in reopened.extra_rows
+
+def test_open_for_folder_follows_rewritten_and_removed_csvs(history, csv_folder, tmp_path, monkeypatch):
+    monkeypatch.setattr(history_matrix, '_HISTORIES', {})
+    sep_path = csv_folder / 'Sep2025_Rollover_Data.csv'
+    sep_df = pd.read_csv(sep_path, skipinitialspace=True)
+    sep_df['Rollover cost'] += 0.5
+    sep_df.to_csv(sep_path, index=False, float_format='%.2f')
+    (csv_folder / 'Jun2025_Rollover_Data.csv').unlink()
+
+    reopened = history_matrix.open_for_folder(csv_folder, folder=tmp_path / 'history_matrix')
+    columns = ['Symbol', 'Avg. Roll Over', 'Avg. Rollover Cost']
+    for month in ['Oct2025', 'Nov2025']:
+        matrix_df = reopened.averages_for(month)[columns].sort_values('Symbol').reset_index(drop=True)
+        csv_df = calculate_averages(csv_folder, {}, month)[columns].sort_values('Symbol').reset_index(drop=True)
+        pd.testing.assert_frame_equal(matrix_df, csv_df, check_exact=True, check_dtype=False)
+    assert history_matrix.open_for_folder(csv_folder, folder=tmp_path / 'history_matrix').refresh() == []
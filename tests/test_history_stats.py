@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from history_matrix import MappedHistory
+from history_stats import HISTORY_STAT_COLUMNS, STAT_COLUMNS, history_stats, zscore_and_percentile
+from report_math import month_index
+
+def test_zscore_uses_the_sample_std():
+    history = np.array([[1.0, 2.0, 3.0, np.nan], [10.0, 14.0, np.nan, 12.0]])
+    zscores, percentiles = zscore_and_percentile(history, np.array([4.0, 11.0]))
+    # Means 2 and 12, sample std 1 and 2
+    np.testing.assert_allclose(zscores, [2.0, -0.5])
+    np.testing.assert_allclose(percentiles, [100.0, 100 / 3])
+
+def test_percentile_counts_ties_as_half():
+    history = np.array([[1.0, 2.0, 2.0, 3.0], [5.0, 5.0, 5.0, 6.0]])
+    _, percentiles = zscore_and_percentile(history, np.array([2.0, 5.0]))
+    np.testing.assert_allclose(percentiles, [50.0, 37.5])
+
+def test_too_little_history_gives_nan():
+    history = np.array([
+        [5.0, np.nan, np.nan],        # one past value: no z-score, a percentile
+        [np.nan, np.nan, np.nan],     # no history
+        [2.0, 2.0, 2.0],              # no spread
+        [1.0, 2.0, 3.0],              # no current value
+    ])
+    zscores, percentiles = zscore_and_percentile(history, np.array([6.0, 1.0, 2.0, np.nan]))
+    assert np.isnan(zscores).all()
+    np.testing.assert_array_equal(np.isnan(percentiles), [False, True, False, True])
+    np.testing.assert_allclose(percentiles[[0, 2]], [100.0, 50.0])
+
+def reference_stats(csv_folder, month_name, final_df):
+    # Per symbol and column, the values of every earlier CSV (its last row when listed twice)
+    past = [path for path in csv_folder.glob('*_Rollover_Data.csv')
+            if month_index(path.name.split('_')[0]) < month_index(month_name)]
+    frames = [pd.read_csv(path, skipinitialspace=True).drop_duplicates('Symbol', keep='last').set_index('Symbol')
+              for path in past]
+
+    stats = {name: [] for name in HISTORY_STAT_COLUMNS}
+    for symbol, row in final_df.set_index('Symbol').iterrows():
+        for column in STAT_COLUMNS:
+            values = np.array([frame.at[symbol, column] for frame in frames if symbol in frame.index], dtype=float)
+            values = values[~np.isnan(values)]
+            current = row[column]
+            z = np.nan
+            if len(values) >= 2 and values.std(ddof=1) > 0:
+                z = (current - values.mean()) / values.std(ddof=1)
+            pctl = np.nan
+            if len(values) and not np.isnan(current):
+                pctl = ((values < current).sum() + 0.5 * (values == current).sum()) / len(values) * 100
+            stats[f"{column} Z"].append(z)
+            stats[f"{column} Pctl"].append(pctl)
+    return pd.DataFrame(stats, index=final_df.index)
+
+@pytest.mark.parametrize('month_name', ['Aug2025', 'Nov2025'])
+def test_history_stats_match_a_per_symbol_reference(csv_folder, tmp_path, month_name):
+    history = MappedHistory.open(csv_folder, folder=tmp_path / 'history_matrix')
+    history.import_csv_history()
+    assert month_index('Jul2025') in history.extra_rows, "the sample lists some symbols twice in Jul2025"
+
+    final_df = pd.read_csv(csv_folder / f"{month_name}_Rollover_Data.csv", skipinitialspace=True)
+    final_df = final_df.drop_duplicates('Symbol').reset_index(drop=True)
+    stats_df = history_stats(history, month_index(month_name), final_df)
+
+    assert list(stats_df.columns) == HISTORY_STAT_COLUMNS
+    pd.testing.assert_frame_equal(stats_df, reference_stats(csv_folder, month_name, final_df), rtol=1e-9)
+
+def test_symbols_without_history_get_nan(csv_folder, tmp_path):
+    history = MappedHistory.open(csv_folder, folder=tmp_path / 'history_matrix')
+    history.import_csv_history()
+    final_df = pd.DataFrame({'Symbol': ['NOT_LISTED'], 'Rollover%': [50.0], 'Rollover cost': [0.5], 'Basis': [1.0]})
+    assert history_stats(history, month_index('Nov2025'), final_df).isna().all(axis=None)
+
+def test_duplicate_symbol_is_ranked_against_its_last_row(csv_folder, tmp_path):
+    # The sample's duplicate Jul2025 rows are equal; make the last GAIL row stand out
+    jul_path = csv_folder / 'Jul2025_Rollover_Data.csv'
+    jul_df = pd.read_csv(jul_path, skipinitialspace=True)
+    last_gail = jul_df.index[jul_df['Symbol'] == 'GAIL'][-1]
+    jul_df.loc[last_gail, 'Rollover%'] = 10.0
+    jul_df.to_csv(jul_path, index=False, float_format='%.2f')
+
+    history = MappedHistory.open(csv_folder, folder=tmp_path / 'history_matrix')
+    history.import_csv_history()
+    final_df = pd.DataFrame({'Symbol': ['GAIL'], 'Rollover%': [10.0], 'Rollover cost': [0.1], 'Basis': [0.0]})
+    stats_df = history_stats(history, month_index('Aug2025'), final_df)
+
+    pd.testing.assert_frame_equal(stats_df, reference_stats(csv_folder, 'Aug2025', final_df), rtol=1e-9)
+    # 10.0 is below every other month's GAIL Rollover% and ties only the last Jul2025 row
+    assert 0 < stats_df.at[0, 'Rollover% Pctl'] < 50
@@ -0,0 +1,20 @@
+import gzip
+
+import lean_report
+from report_inputs import open_input
+
+def test_readers_close_their_files(tmp_path, monkeypatch):
+    index_path = tmp_path / 'index.csv.gz'
+    with gzip.open(index_path, 'wt', newline='') as f:
+        f.write('Sectoral Index,Symbol\nNIFTY IT,TCS\nNIFTY IT,WIPRO\n')
+
+    opened = []
+
+    def recording_open_input(file_path):
+        f = open_input(file_path)
+        opened.append(f)
+        return f
+
+    monkeypatch.setattr(lean_report, 'open_input', recording_open_input)
+    assert lean_report.read_sectors(index_path) == {'TCS': 'NIFTY IT', 'WIPRO': 'NIFTY IT'}
+    assert opened and all(f.closed for f in opened)
@@ -0,0 +1,75 @@
+import threading
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import profiling
+from arrow_ingest import INGEST_SETTINGS
+from conftest import REPO_DIR
+from generate_files import _batch_result, _configure_batch_worker, _load_batch_input
+from input_cache import CACHE_SETTINGS
+from profiling import concurrent_stage, run_profiled, stage
+
+@pytest.fixture
+def profile(monkeypatch):
+    """
+    Profiling turned on, with a fresh list of stage records.
+    """
+    monkeypatch.setattr(profiling, 'STAGE_RECORDS', [])
+    profiling.configure_profiling(True)
+    yield profiling.STAGE_RECORDS
+    profiling.configure_profiling(False)
+    tracemalloc.stop()
+
+def run_in_thread(func):
+    thread = threading.Thread(target=func)
+    thread.start()
+    thread.join()
+
+def test_stage_on_another_thread_records_no_peak(profile):
+    def work():
+        with stage('thread stage'):
+            bytearray(1024)
+    run_in_thread(work)
+    with stage('main stage'):
+        bytearray(1024)
+
+    assert [(r.name, r.peak_bytes is None) for r in profile] == [('thread stage', True), ('main stage', False)]
+
+def test_concurrent_stage_records_the_peak_of_its_stages(profile):
+    def work():
+        with stage('thread stage'):
+            data = bytearray(4 * 1024 * 1024)
+            del data
+    with concurrent_stage('block'):
+        run_in_thread(work)
+        with stage('main stage'):
+            pass
+
+    records = {r.name: r for r in profile}
+    assert records['thread stage'].within == records['main stage'].within == 'block'
+    assert records['thread stage'].peak_bytes is None and records['main stage'].peak_bytes is None
+    assert records['block'].within is None
+    assert records['block'].peak_bytes >= 4 * 1024 * 1024
+
+def test_total_leaves_out_stages_of_a_concurrent_block(profile, capsys):
+    with concurrent_stage('block'):
+        with stage('inner'):
+            pass
+    profile[0].wall_seconds, profile[1].wall_seconds = 1.0, 2.0
+    profiling.print_profile_report()
+
+    total = [line for line in capsys.readouterr().out.splitlines() if line.startswith('total')]
+    assert total == [f"{'total':<22}{2000.0:>12.1f}"]
+
+def test_batch_worker_stages_are_merged(profile):
+    fo_path = str(sorted((REPO_DIR / 'fo_data').glob('fo*.csv'))[0])
+    with ProcessPoolExecutor(max_workers=1, initializer=_configure_batch_worker,
+                             initargs=(dict(CACHE_SETTINGS, enabled=False), dict(INGEST_SETTINGS),
+                                       dict(profiling.PROFILE_SETTINGS))) as pool:
+        futures_df = _batch_result(pool.submit(run_profiled, _load_batch_input, 'futures', fo_path))
+
+    assert [r.name for r in profile] == ['read futures']
+    assert profile[0].rows_out == len(futures_df)
+    assert profile[0].peak_bytes > 0
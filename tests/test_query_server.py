@@ -0,0 +1,13 @@
+import pytest
+
+import query_server
+
+def test_from_without_futures_files_is_not_found(monkeypatch):
+    monkeypatch.setattr(query_server, 'find_available_months', lambda: [])
+    with pytest.raises(FileNotFoundError):
+        query_server.query_months({'from': ['NOV25']})
+
+def test_from_to_range(monkeypatch):
+    monkeypatch.setattr(query_server, 'find_available_months', lambda: ['SEP25', 'OCT25', 'NOV25'])
+    assert query_server.query_months({'from': ['OCT25']}) == ['OCT25', 'NOV25']
+    assert query_server.query_months({'to': ['OCT25']}) == ['SEP25', 'OCT25']
@@ -0,0 +1,101 @@
+import calendar
+import os
+from datetime import datetime
+
+import pytest
+
+import report_inputs
+from report_inputs import (
+    HOLIDAYS_FILE, ExpiryCalendar, InputIndex, calculate_expiry_date, read_holidays, scan_dated_files, try_file_read,
+)
+
+def test_missing_input_names_the_paths_tried(tmp_path):
+    path_6 = tmp_path / 'fo251199.csv'
+    path_8 = tmp_path / 'fo25111999.csv'
+    with pytest.raises(FileNotFoundError) as excinfo:
+        try_file_read(str(path_6), str(path_8), 'file1', False)
+    assert str(path_6) in str(excinfo.value)
+    assert str(path_8) in str(excinfo.value)
+
+def test_missing_input_can_be_empty(tmp_path):
+    assert try_file_read(str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv'), 'file5', True) == ""
+
+# --- Expiry Calendar ---
+
+def loop_expiry(year, month):
+    # The expiry calculation the calendar replaced: walk back from the month's last day
+    weekday = calendar.THURSDAY if datetime(year, month, 1) < datetime(2025, 9, 1) else calendar.TUESDAY
+    _, num_days = calendar.monthrange(year, month)
+    for day in range(num_days, num_days - 7, -1):
+        if datetime(year, month, day).weekday() == weekday:
+            return datetime(year, month, day)
+
+def test_calendar_matches_the_old_loop():
+    # 1990-1999 and 2041-2059 are outside the precomputed table and added on first use
+    expiry_calendar = ExpiryCalendar()
+    for year in range(1990, 2060):
+        for month in range(1, 13):
+            assert expiry_calendar.expiry(year, month) == loop_expiry(year, month), (year, month)
+    assert (1990, 1) in expiry_calendar.expiries and (2059, 12) in expiry_calendar.expiries
+
+def test_expiry_moves_from_thursday_to_tuesday_in_september_2025():
+    expiry_calendar = ExpiryCalendar()
+    assert expiry_calendar.expiry(2025, 8) == datetime(2025, 8, 28)
+    assert expiry_calendar.expiry(2025, 8).weekday() == calendar.THURSDAY
+    assert expiry_calendar.expiry(2025, 9) == datetime(2025, 9, 30)
+    assert expiry_calendar.expiry(2025, 9).weekday() == calendar.TUESDAY
+
+def test_expiry_on_a_holiday_moves_back_over_the_weekend():
+    holidays = [datetime(2025, 10, 28), datetime(2025, 10, 27)]
+    assert ExpiryCalendar(holidays[:1]).expiry(2025, 10) == datetime(2025, 10, 27)
+    # Tuesday and Monday are holidays: back to Friday
+    assert ExpiryCalendar(holidays).expiry(2025, 10) == datetime(2025, 10, 24)
+
+def test_holidays_file_is_used_and_reread_when_it_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(report_inputs, '_EXPIRY_CALENDARS', {})
+    assert calculate_expiry_date(2025, 10, False) == datetime(2025, 10, 28)
+
+    holidays_path = tmp_path / HOLIDAYS_FILE
+    holidays_path.write_text("28-Oct-2025\n\n2025-12-30\n")
+    assert read_holidays(holidays_path) == {datetime(2025, 10, 28), datetime(2025, 12, 30)}
+    assert calculate_expiry_date(2025, 10, False) == datetime(2025, 10, 27)
+    assert calculate_expiry_date(2025, 12, False) == datetime(2025, 12, 29)
+
+    holidays_path.write_text("27-10-2025\n28-Oct-2025\n")
+    stat = holidays_path.stat()
+    os.utime(holidays_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert calculate_expiry_date(2025, 10, False) == datetime(2025, 10, 24)
+    assert calculate_expiry_date(2025, 12, False) == datetime(2025, 12, 30)
+
+# --- Input File Index ---
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_input_index_lists_a_folder_again_when_it_changes(tmp_path, monkeypatch):
+    scans = []
+    def counting_scan(folder, prefix):
+        scans.append(folder)
+        return scan_dated_files(folder, prefix)
+    monkeypatch.setattr(report_inputs, 'scan_dated_files', counting_scan)
+
+    (tmp_path / 'fo251125.csv').write_text('')
+    index = InputIndex()
+    assert index.find(tmp_path, 'fo', datetime(2025, 11, 25)) == tmp_path / 'fo251125.csv'
+    assert index.find(tmp_path, 'fo', datetime(2025, 12, 30)) is None
+    assert len(scans) == 1
+
+    (tmp_path / 'fo30122025.csv').write_text('')
+    bump_mtime(tmp_path)
+    assert index.find(tmp_path, 'fo', datetime(2025, 12, 30)) == tmp_path / 'fo30122025.csv'
+    assert len(scans) == 2
+
+def test_input_index_of_a_missing_folder_is_empty(tmp_path):
+    assert InputIndex().find(tmp_path / 'missing', 'fo', datetime(2025, 11, 25)) is None
+
+def test_ddmmyy_name_wins_over_ddmmyyyy(tmp_path):
+    (tmp_path / 'fo25112025.csv').write_text('')
+    (tmp_path / 'fo251125.csv').write_text('')
+    assert scan_dated_files(tmp_path, 'fo') == {datetime(2025, 11, 25): tmp_path / 'fo251125.csv'}
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from report_math import kahan_mean, kahan_step, month_index, month_name_of, report_value, shift_month
+
+def test_kahan_mean_matches_pandas_groupby_mean():
+    rng = np.random.default_rng(3)
+    # 2-decimal report values of mixed magnitude, where a naive sum loses the last bits
+    values = np.round(np.concatenate([rng.normal(90, 5, 600), rng.normal(0.01, 1e4, 600)]), 2)
+    groups = rng.integers(0, 40, len(values))
+    expected = pd.Series(values).groupby(groups).mean()
+    for group, mean in expected.items():
+        assert kahan_mean(list(values[groups == group])) == mean
+
+def test_kahan_step_on_arrays_matches_floats():
+    rng = np.random.default_rng(5)
+    values = np.round(rng.normal(50, 30, (7, 12)), 2)
+    total = np.zeros(12)
+    compensation = np.zeros(12)
+    for row in values:
+        total, compensation = kahan_step(total, compensation, row)
+    for column in range(12):
+        assert total[column] / 7 == kahan_mean(list(values[:, column]))
+
+def test_kahan_mean_of_nothing_is_nan():
+    assert np.isnan(kahan_mean([]))
+
+def test_shift_month_crosses_years():
+    assert shift_month('Nov2025', 2) == 'Jan2026'
+    assert shift_month('Feb2025', -6) == 'Aug2024'
+    assert shift_month('Dec2025', -12) == 'Dec2024'
+    assert month_name_of(month_index('Mar2031')) == 'Mar2031'
+
+def test_report_value_round_trips_through_the_csv_format():
+    assert report_value(1.005) == float('%.2f' % 1.005)
+    assert report_value(np.float64(96.23999999)) == 96.24
+    assert report_value(float('nan')) is None
+    assert report_value(None) is None
@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+
+from generate_files import calculate_averages
+from rolling_averages import RollingAverageStore
+
+def assert_same_averages(store_df, csv_df):
+    columns = ['Symbol', 'Avg. Roll Over', 'Avg. Rollover Cost']
+    store_df = store_df[columns].sort_values('Symbol').reset_index(drop=True)
+    csv_df = csv_df[columns].sort_values('Symbol').reset_index(drop=True)
+    pd.testing.assert_frame_equal(store_df, csv_df, check_exact=True, check_dtype=False)
+
+def test_store_matches_csv_averages(csv_folder, tmp_path):
+    store = RollingAverageStore.open(csv_folder, store_folder=tmp_path / 'store')
+    for month in ['Aug2025', 'Sep2025', 'Oct2025', 'Nov2025']:
+        assert_same_averages(store.averages_for(month), calculate_averages(csv_folder, {}, month))
+
+def test_rerun_of_latest_month_reads_no_csv(csv_folder, tmp_path):
+    store = RollingAverageStore.open(csv_folder, store_folder=tmp_path / 'store')
+    store.averages_for('Nov2025')
+    nov_df = pd.read_csv(csv_folder / 'Nov2025_Rollover_Data.csv', skipinitialspace=True)
+    store.update('Nov2025', nov_df)
+
+    # A rerun of Nov2025 (and a reopened store) finds every month of its window stored
+    reopened = RollingAverageStore.open(csv_folder, store_folder=tmp_path / 'store')
+    window = [f"{month}2025" for month in ['May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct']]
+    assert reopened.refresh(window) == []
+    assert_same_averages(reopened.averages_for('Nov2025'), calculate_averages(csv_folder, {}, 'Nov2025'))
+
+def test_rewritten_csv_is_read_again(csv_folder, tmp_path):
+    store = RollingAverageStore.open(csv_folder, store_folder=tmp_path / 'store')
+    before = store.averages_for('Nov2025')
+
+    # Rewrite Sep2025 like a re-export would
+    sep_path = csv_folder / 'Sep2025_Rollover_Data.csv'
+    sep_df = pd.read_csv(sep_path, skipinitialspace=True)
+    sep_df['Rollover%'] += 1
+    sep_df.to_csv(sep_path, index=False, float_format='%.2f')
+    stat = sep_path.stat()
+    os.utime(sep_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    after = store.averages_for('Nov2025')
+    assert_same_averages(after, calculate_averages(csv_folder, {}, 'Nov2025'))
+    assert not after.sort_values('Symbol')['Avg. Roll Over'].reset_index(drop=True).equals(
+        before.sort_values('Symbol')['Avg. Roll Over'].reset_index(drop=True))
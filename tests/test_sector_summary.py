@@ -0,0 +1,19 @@
+import pandas as pd
+import pytest
+
+from sector_summary import summarize_sectors
+
+def test_sector_rollover_is_weighted_on_unrounded_oi():
+    # Rollover% rounds 1/3 and 2/3 of the OI to 33.33 and 66.67; the sector rolled over 5 of 9
+    final_df = pd.DataFrame({
+        'Sectoral Index': ['NIFTY IT', 'NIFTY IT'],
+        'Symbol': ['AAA', 'BBB'],
+        'Rollover%': [33.33, 66.67],
+        'Rollover cost': [0.5, 0.7],
+        'Total OI': [3.0, 6.0],
+        'Rolled OI': [1.0, 4.0],
+        'Signal': ['Long Rolls', 'Long Rolls'],
+    })
+    summary_df = summarize_sectors(final_df)
+    assert summary_df.loc[0, 'OI Wtd Rollover%'] == pytest.approx(500 / 9, abs=1e-12)
+    assert summary_df.loc[0, 'Total OI'] == 9.0
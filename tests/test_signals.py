@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from signals import SIGNAL_LABELS, SIGNAL_SHEETS, add_signal_column, classify_signals, signal_sheet_rows
+
+def test_each_sign_pattern_selects_its_bucket():
+    mom = [1.0, -1.0, 1.0, -1.0, 1.0, -1.0]
+    diff_pct = [2.0, 2.0, -2.0, -2.0, 2.0, -2.0]
+    diff_cost = [0.5, -0.5, 0.5, -0.5, -0.5, 0.5]
+    signals = classify_signals(mom, diff_pct, diff_cost)
+
+    assert list(signals.categories) == SIGNAL_LABELS
+    assert list(signals[:4]) == ['Long Rolls', 'Short Rolls', 'Short Covering', 'Long Unwind']
+    # (MoM+, %Roll+, Cost-) and (MoM-, %Roll-, Cost+) are in no bucket
+    assert signals[4:].isna().all()
+
+def test_zero_and_nan_are_in_no_bucket():
+    mom = [0.0, 1.0, 1.0, np.nan, -0.0]
+    diff_pct = [1.0, 0.0, 1.0, 1.0, -1.0]
+    diff_cost = [1.0, 1.0, np.nan, 1.0, -1.0]
+    assert classify_signals(mom, diff_pct, diff_cost).isna().all()
+
+def test_thresholds_apply_in_the_bucket_direction():
+    mom = [1.0, 1.0, -1.0, -1.0]
+    diff_pct = [3.0, 3.5, -3.0, -3.5]
+    diff_cost = [1.0, 1.0, -1.0, -1.0]
+    signals = classify_signals(mom, diff_pct, diff_cost, thresholds=(0, 3, 0))
+    assert signals.isna().tolist() == [True, False, True, False]
+    assert list(signals[[1, 3]]) == ['Long Rolls', 'Long Unwind']
+
+def test_sheet_rows_match_sort_values():
+    rng = np.random.default_rng(7)
+    rows = 400
+    final_df = pd.DataFrame({
+        'Symbol': [f"S{i}" for i in range(rows)],
+        # Few distinct values, so the secondary keys and the stable order are exercised
+        'M_o_M%': rng.choice([-2.0, -1.0, 0.0, 1.0, 2.0], rows),
+        'Diff Rollover%': rng.choice([-3.0, -1.5, 1.5, 3.0, np.nan], rows),
+        'Diff Rollover Cost': rng.choice([-0.2, -0.1, 0.1, 0.2], rows),
+    }, index=rng.permutation(rows))
+    final_df = add_signal_column(final_df)
+
+    sheet_rows = signal_sheet_rows(final_df)
+    for sheet_name, _, sort_cols, ascending in SIGNAL_SHEETS:
+        expected = (final_df.reset_index(drop=True)
+                    .loc[lambda df: df['Signal'] == sheet_name]
+                    .sort_values(sort_cols, ascending=ascending, kind='stable'))
+        assert len(expected) > 0
+        assert sheet_rows[sheet_name].tolist() == expected.index.tolist()
+
+def test_sheet_rows_of_an_empty_bucket():
+    final_df = add_signal_column(pd.DataFrame({
+        'M_o_M%': [1.0], 'Diff Rollover%': [1.0], 'Diff Rollover Cost': [1.0],
+    }))
+    sheet_rows = signal_sheet_rows(final_df)
+    assert sheet_rows['Long Rolls'].tolist() == [0]
+    assert all(len(sheet_rows[name]) == 0 for name in SIGNAL_LABELS[1:])
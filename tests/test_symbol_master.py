@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from generate_files import parse_contract_details_vectorized
+from symbol_master import SymbolMaster
+
+def write_index(path, rows):
+    pd.DataFrame(rows, columns=['Sectoral Index', 'Symbol']).to_csv(path, index=False)
+
+def write_futures(path, rows):
+    """
+    Writes a futures bhavcopy of (CONTRACT_D, TRADED_QUA, TRD_NO_CON) rows and returns its frame.
+    """
+    futures_df = pd.DataFrame(rows, columns=['CONTRACT_D', 'TRADED_QUA', 'TRD_NO_CON'])
+    futures_df.to_csv(path, index=False)
+    return futures_df
+
+def record_futures(master, path):
+    futures_df = pd.read_csv(path)
+    master.update_from_futures(path, futures_df, parse_contract_details_vectorized(futures_df['CONTRACT_D']))
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+@pytest.fixture
+def inputs(tmp_path):
+    write_index(tmp_path / 'index.csv', [['IT', 'INFY'], ['BANK', 'HDFCBANK'], ['NIFTY IT', 'INFY']])
+    write_futures(tmp_path / 'fo281025.csv', [
+        ['FUTSTKINFY28-OCT-2025', 1000, 4], ['FUTSTKINFY25-NOV-2025', 500, 2],
+        ['FUTSTKTCS28-OCT-2025', 350, 2],
+    ])
+    write_futures(tmp_path / 'fo251125.csv', [
+        ['FUTSTKINFY25-NOV-2025', 1200, 3], ['FUTSTKINFY30-DEC-2025', 400, 1],
+        # No trades in the current contract: the lot comes from the next one
+        ['FUTSTKWIPRO25-NOV-2025', 0, 0], ['FUTSTKWIPRO30-DEC-2025', 3000, 1],
+        ['FUTIDXNIFTY25-NOV-2025', 750, 10],
+    ])
+    return tmp_path
+
+def test_ids_are_stable_across_runs(inputs):
+    store = inputs / 'store'
+    master = SymbolMaster.open(store)
+    master.update_from_index(inputs / 'index.csv')
+    record_futures(master, inputs / 'fo281025.csv')
+    master.save()
+    first_ids = {entry[0]: i for i, entry in enumerate(master.symbols)}
+
+    reopened = SymbolMaster.open(store)
+    record_futures(reopened, inputs / 'fo251125.csv')
+    reopened.save()
+    ids = reopened.ids(list(first_ids))
+    assert ids.tolist() == list(first_ids.values())
+
+    # New symbols are appended in symbol order; unknown ones are -1, with or without a categorical
+    again = SymbolMaster.open(store)
+    symbols = ['WIPRO', 'NIFTY', 'INFY', 'NOTLISTED']
+    expected = [len(first_ids) + 1, len(first_ids), first_ids['INFY'], -1]
+    assert again.ids(symbols).tolist() == expected
+    assert again.ids(pd.Series(symbols, dtype='category')).tolist() == expected
+    assert again.names(np.array(expected[:3])).tolist() == symbols[:3]
+
+def test_index_is_reread_only_when_it_changes(inputs, tmp_path):
+    index_path = inputs / 'index.csv'
+    master = SymbolMaster.open(tmp_path / 'store')
+    assert master.update_from_index(index_path) is True
+    assert master.update_from_index(index_path) is False
+
+    # Same size and content, newer mtime
+    bump_mtime(index_path)
+    assert master.update_from_index(index_path) is True
+    assert master.update_from_index(index_path) is False
+
+    write_index(index_path, [['FINANCE', 'HDFCBANK'], ['IT', 'TCS']])
+    bump_mtime(index_path)
+    assert master.update_from_index(index_path) is True
+    sectors = master.sectors(master.ids(['INFY', 'HDFCBANK', 'TCS']))
+    assert pd.isna(sectors[0]) and sectors[1:].tolist() == ['FINANCE', 'IT']
+
+def test_first_sector_listed_wins(inputs, tmp_path):
+    master = SymbolMaster.open(tmp_path / 'store')
+    master.update_from_index(inputs / 'index.csv')
+    assert master.sectors(master.ids(['INFY'])).tolist() == ['IT']
+
+def test_lot_size_and_series(inputs, tmp_path):
+    master = SymbolMaster.open(tmp_path / 'store')
+    record_futures(master, inputs / 'fo251125.csv')
+    record_futures(master, inputs / 'fo281025.csv')
+    frame = master.frame().set_index('Symbol')
+
+    # The latest series sets the lot size: 1200 / 3, not October's 1000 / 4
+    assert frame.loc['INFY', 'Lot Size'] == 400
+    assert (frame.loc['INFY', 'First Series'], frame.loc['INFY', 'Last Series']) == ('Oct2025', 'Nov2025')
+    assert frame.loc['WIPRO', 'Lot Size'] == 3000
+    assert frame.loc['TCS', 'Lot Size'] == 175
+    assert frame.loc['NIFTY', 'Lot Size'] == 75
+    assert master.futures_universe(inputs / 'fo281025.csv') == {'INFY', 'TCS'}
+
+def test_changed_futures_file_is_recorded_again(inputs, tmp_path):
+    fo_path = inputs / 'fo281025.csv'
+    master = SymbolMaster.open(tmp_path / 'store')
+    record_futures(master, fo_path)
+    assert master.knows_futures_file(fo_path)
+
+    write_futures(fo_path, [['FUTSTKINFY28-OCT-2025', 1000, 4], ['FUTSTKINFY25-NOV-2025', 500, 2]])
+    bump_mtime(fo_path)
+    assert not master.knows_futures_file(fo_path)
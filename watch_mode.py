@@ -0,0 +1,293 @@
+import time
+from datetime import datetime
+from pathlib import Path
+
+from dateutil.relativedelta import relativedelta
+
+from generate_files import (
+    AVERAGE_SETTINGS, EQUITY_FOLDER, FO_FOLDER, FOLDER1, FOLDER2, INDEX_FILE,
+    add_history_stats, build_rollover_frame, calculate_expiry_date, ensure_output_folders, finalize_rollover_frame,
+    get_historical_averages, list_dated_files, load_futures, load_index_closes,
+    load_spot, load_symbol_master, record_month_history, write_csv_report, write_excel_report,
+    write_index_report, write_sector_report,
+)
+from report_inputs import INDEX_CLOSE_FOLDER, resolve_report_inputs
+
+# --- Watch Mode ---
+#
+# Polls the input folders and regenerates a month's reports as soon as a complete set of its
+# inputs is present, without waiting for someone to run generate_files.py MMMYY. Polling only
+# stats the files. A new or changed file is used once its size and mtime stayed the same for
+# one poll, so files still being downloaded are not read half-written.
+#
+# Parsed inputs and the futures/spot calculations of every month stay in memory between
+# updates, so an update only parses the files that changed. After a month is regenerated,
+# the already generated months within the averaging window after it are finalized again,
+# because their historical averages include it.
+
+POLL_SECONDS = 2.0
+
+# Input folder -> file name prefix of its dated files
+WATCHED_FOLDERS = {
+    'fo': (FO_FOLDER, 'fo'),
+    'equity': (EQUITY_FOLDER, 'sec_bhavdata_full_'),
+    'index_close': (INDEX_CLOSE_FOLDER, 'ind_close_all_'),
+}
+
+def expiry_month(file_date):
+    """
+    Returns the first day of the month whose expiry is file_date, or None for other trading days.
+    """
+    month_dt = datetime(file_date.year, file_date.month, 1)
+    if calculate_expiry_date(month_dt.year, month_dt.month, False).date() != file_date.date():
+        return None
+    return month_dt
+
+def month_code(month_dt):
+    return month_dt.strftime('%b%y').upper()
+
+def _file_stamp(file_path):
+    try:
+        stat = Path(file_path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def snapshot_inputs():
+    """
+    Stats every watched input file.
+
+    Returns:
+        {path: (kind, trading date or None, (size, mtime_ns))} for the dated futures, equity
+        and index close files and index.csv.
+    """
+    snapshot = {}
+    for kind, (folder, prefix) in WATCHED_FOLDERS.items():
+        for file_date, file_path in list_dated_files(folder, prefix).items():
+            stamp = _file_stamp(file_path)
+            if stamp is not None:
+                snapshot[str(file_path)] = (kind, file_date, stamp)
+    stamp = _file_stamp(INDEX_FILE)
+    if stamp is not None:
+        snapshot[str(INDEX_FILE)] = ('index', None, stamp)
+    return snapshot
+
+class WatchState:
+    """
+    What watch mode keeps between polls: the last two snapshots, the parsed input frames,
+    the futures/spot calculations of every month and the symbol master.
+    """
+
+    def __init__(self, folder1=FOLDER1, folder2=FOLDER2, csv_only=False):
+        self.folder1_path = Path(folder1)
+        self.folder2_path = Path(folder2)
+        self.csv_only = csv_only
+        self.seen = snapshot_inputs()
+        # The stamp of every file when it was last acted on; files present at start count as handled
+        self.handled = {path: entry[2] for path, entry in self.seen.items()}
+        self.frames = {}
+        self.builds = {}
+        self.master = None
+
+    # --- Warm inputs ---
+
+    def _cached(self, key, file_path, loader):
+        """
+        Returns a parsed input from memory while file_path is unchanged, else parses it again.
+        Frames of older versions of the same file are dropped.
+        """
+        stamp = _file_stamp(file_path)
+        full_key = (str(file_path), stamp) + key
+        if full_key not in self.frames:
+            for stale in [k for k in self.frames if k[0] == str(file_path) and k[1] != stamp]:
+                del self.frames[stale]
+            self.frames[full_key] = loader()
+        return self.frames[full_key]
+
+    def _spot(self, file_path, column_name, symbols):
+        if file_path == "":
+            return None
+        # Cached under CLOSE_PRICE, so one month's current spot is the next month's previous spot without a re-read
+        spot_df = self._cached(('spot', symbols), file_path, lambda: load_spot(file_path, 'CLOSE_PRICE', symbols))
+        return spot_df.rename(columns={'CLOSE_PRICE': column_name})
+
+    def _index_closes(self, file_path, column_name):
+        if file_path == "":
+            return None
+        return self._cached(('index_close', column_name), file_path, lambda: load_index_closes(file_path, column_name))
+
+    def build_month(self, month_dt, inputs):
+        """
+        Returns the build_rollover_frame result of a month, reusing the one in memory while
+        none of the month's inputs changed.
+        """
+        input_paths = [inputs[key] for key in ('file1', 'file2', 'file3', 'file4', 'file5', 'index_close', 'prev_index_close')]
+        build_key = tuple((str(p), _file_stamp(p) if p != "" else None) for p in input_paths)
+        cached = self.builds.get(month_dt)
+        if cached is not None and cached[0] == build_key:
+            return cached[1]
+
+        file1_path = inputs['file1']
+        futures_df = self._cached(('futures',), file1_path, lambda: load_futures(file1_path))
+        self.master = load_symbol_master(inputs['file4'], [(file1_path, futures_df)], self.master)
+        symbols = frozenset(self.master.futures_universe(file1_path))
+        result = build_rollover_frame(
+            futures_df,
+            self._spot(inputs['file2'], 'Spot', symbols),
+            self._spot(inputs['file3'], 'PrevMonthSpot', symbols),
+            self._spot(inputs['file5'], 'NextMonthSpot', symbols),
+            self.master,
+            self._index_closes(inputs['index_close'], 'Spot'),
+            self._index_closes(inputs['prev_index_close'], 'PrevMonthSpot'),
+        )
+        self.builds[month_dt] = (build_key, result)
+        return result
+
+    def finalize_month(self, month_dt, inputs):
+        """
+        Builds a month from its resolved inputs and finalizes it against the historical averages.
+
+        Returns:
+            (final_df, index_df, current_month_name), or None when the month has no rows.
+        """
+        result = self.build_month(month_dt, inputs)
+        if result is None:
+            return None
+        final_df, index_df, current_month_name, current_month_names = result
+        avg_df = get_historical_averages(self.folder2_path, current_month_names, current_month_name)
+        final_df = finalize_rollover_frame(final_df, avg_df, self.master)
+        final_df = add_history_stats(final_df, self.folder2_path, current_month_name)
+        return final_df, index_df, current_month_name
+
+    # --- Updates ---
+
+    def regenerate(self, month_dt):
+        """
+        Regenerates the reports of one month. Months without a complete set of inputs are skipped.
+
+        Returns:
+            True if the reports were written.
+        """
+        try:
+            inputs = resolve_report_inputs(month_code(month_dt), give_error=False)
+        except FileNotFoundError:
+            print(f"Waiting for the remaining input files of {month_code(month_dt)}.")
+            return False
+
+        start = time.perf_counter()
+        try:
+            report = self.finalize_month(month_dt, inputs)
+            if report is None:
+                return False
+            final_df, index_df, current_month_name = report
+
+            write_csv_report(final_df, self.folder2_path, current_month_name)
+            write_index_report(index_df, self.folder2_path, current_month_name)
+            sector_df = write_sector_report(final_df, self.folder2_path, current_month_name)
+            record_month_history(final_df, self.folder2_path, current_month_name)
+            if not self.csv_only:
+                dates = inputs['dates']
+                write_excel_report(final_df, self.folder1_path, current_month_name, dates['curr_6'], dates['prev_6'], dates['next_6'],
+                                   sector_df)
+        except Exception as e:
+            print(f"An unexpected error occurred while processing {month_code(month_dt)}: {e}")
+            return False
+
+        print(f"Updated {current_month_name} in {time.perf_counter() - start:.2f}s")
+        return True
+
+    def downstream_months(self, month_dt):
+        """
+        The already generated months whose historical averages include month_dt.
+        """
+        months = []
+        for offset in range(1, AVERAGE_SETTINGS['window'] + 1):
+            later = month_dt + relativedelta(months=offset)
+            if (self.folder2_path / f"{later:%b%Y}_Rollover_Data.csv").exists():
+                months.append(later)
+        return months
+
+    def affected_months(self, ready):
+        """
+        Maps the files that became ready to the months whose reports use them:
+        a futures file to its own month, an equity file to the months using it as
+        previous, current or next spot, an index close file to the months using it as
+        current or previous close, and index.csv to every generated month.
+        """
+        months = set()
+        for kind, file_date in ready:
+            if kind == 'index':
+                for report_path in self.folder2_path.glob('*_Rollover_Data.csv'):
+                    try:
+                        months.add(datetime.strptime(report_path.name.split('_')[0], '%b%Y'))
+                    except ValueError:
+                        continue
+                continue
+            month_dt = expiry_month(file_date)
+            if month_dt is None:
+                continue # A daily file (see --daily), not an expiry day
+            if kind == 'fo':
+                months.add(month_dt)
+            elif kind == 'equity':
+                months.update(month_dt + relativedelta(months=offset) for offset in (-1, 0, 1))
+            else:
+                months.update(month_dt + relativedelta(months=offset) for offset in (0, 1))
+        return months
+
+    def process(self, months):
+        """
+        Regenerates months in chronological order, then re-finalizes the generated months
+        whose averages depend on them.
+        """
+        regenerated = [month_dt for month_dt in sorted(months) if self.regenerate(month_dt)]
+        downstream = set()
+        for month_dt in regenerated:
+            downstream.update(self.downstream_months(month_dt))
+        for month_dt in sorted(downstream - set(regenerated)):
+            self.regenerate(month_dt)
+
+    def catch_up(self):
+        """
+        Generates the expiry months that have a futures file but no report yet.
+        """
+        months = set()
+        for file_date in list_dated_files(FO_FOLDER, 'fo'):
+            month_dt = expiry_month(file_date)
+            if month_dt is not None and not (self.folder2_path / f"{month_dt:%b%Y}_Rollover_Data.csv").exists():
+                months.add(month_dt)
+        if months:
+            print(f"Generating {len(months)} months without a report: {', '.join(month_code(m) for m in sorted(months))}")
+            self.process(months)
+
+    def poll(self):
+        """
+        Takes a new snapshot and processes the files that changed and then stayed unchanged
+        for one poll.
+        """
+        current = snapshot_inputs()
+        ready = []
+        for path, (kind, file_date, stamp) in current.items():
+            previous = self.seen.get(path)
+            if previous is not None and previous[2] == stamp and self.handled.get(path) != stamp:
+                ready.append((kind, file_date))
+                self.handled[path] = stamp
+        self.seen = current
+
+        if ready:
+            print(f"\n--- {len(ready)} new or changed input files ---")
+            self.process(self.affected_months(ready))
+
+def run_watch_mode(folder1=FOLDER1, folder2=FOLDER2, csv_only=False, interval=POLL_SECONDS):
+    """
+    Watches the input folders until interrupted (Ctrl+C).
+    """
+    ensure_output_folders(Path(folder1), Path(folder2))
+    state = WatchState(folder1, folder2, csv_only)
+    state.catch_up()
+    print(f"Watching {FO_FOLDER}, {EQUITY_FOLDER}, {INDEX_CLOSE_FOLDER} and {INDEX_FILE} every {interval:g}s (Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(interval)
+            state.poll()
+    except KeyboardInterrupt:
+        print("\nStopped watching.")